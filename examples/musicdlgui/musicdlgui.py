@@ -106,21 +106,19 @@ class MusicdlGUI(QWidget):
                 music_sources.append(cb.text())
         # keyword
         keyword = self.lineedit_keyword.text()
-        # search
+        # search and show each row as soon as it arrives
         self.music_client = musicdl.MusicClient(music_sources=music_sources)
-        self.search_results = self.music_client.search(keyword=keyword)
-        # showing
-        count, row = 0, 0
-        for per_source_search_results in self.search_results.values():
-            count += len(per_source_search_results)
-        self.results_table.setRowCount(count)
-        for _, (_, per_source_search_results) in enumerate(self.search_results.items()):
-            for _, per_source_search_result in enumerate(per_source_search_results):
-                for column, item in enumerate([str(row), per_source_search_result['singers'], per_source_search_result['song_name'], per_source_search_result['file_size'], per_source_search_result['duration'], per_source_search_result['album'], per_source_search_result['source']]):
-                    self.results_table.setItem(row, column, QTableWidgetItem(item))
-                    self.results_table.item(row, column).setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-                self.music_records.update({str(row): per_source_search_result})
-                row += 1
+        # rows, download map and results of the previous search are all dropped together
+        self.results_table.setRowCount(0)
+        self.search_results, self.music_records = {}, {}
+        for row, search_result in enumerate(self.music_client.itersearch(keyword=keyword)):
+            self.search_results.setdefault(search_result['source'], []).append(search_result)
+            self.results_table.insertRow(row)
+            for column, item in enumerate([str(row), search_result['singers'], search_result['song_name'], search_result['file_size'], search_result['duration'], search_result['album'], search_result['source']]):
+                self.results_table.setItem(row, column, QTableWidgetItem(item))
+                self.results_table.item(row, column).setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
+            self.music_records.update({str(row): search_result})
+            QApplication.processEvents()
         # return
         return self.search_results
 
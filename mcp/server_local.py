@@ -29,13 +29,13 @@ def getclient(music_sources=None, init_music_clients_cfg=None, clients_threading
 
 
 @mcp.tool()
-def search(keyword: str, music_sources: list[str] | None = None) -> dict:
-    """Search tracks (only use content you have rights to access/download)."""
-    res = getclient(music_sources=music_sources).search(keyword=keyword)
-    flat = []
-    for source, items in res.items():
-        for i, it in enumerate(items):
-            flat.append({"source": source, "index": i, "song_info": it})
+def search(keyword: str, music_sources: list[str] | None = None, limit: int | None = None) -> dict:
+    """Search tracks (only use content you have rights to access/download). Returns as soon as `limit` tracks are found if `limit` is set."""
+    flat, indices = [], {}
+    for it in getclient(music_sources=music_sources).itersearch(keyword=keyword):
+        indices[it.source] = indices.get(it.source, -1) + 1
+        flat.append({"source": it.source, "index": indices[it.source], "song_info": it})
+        if limit and len(flat) >= limit: break
     return {"results": flat}
 
 
@@ -1,9 +1,10 @@
 '''initialize'''
-from .sources import MusicClientBuilder, BaseMusicClient, BuildMusicClient
+from .sources import MusicClientBuilder, BaseMusicClient, BuildMusicClient, DownloadScheduler
 from .utils import (
     BaseModuleBuilder, LoggerHandle, AudioLinkTester, WhisperLRC, QuarkParser, SongInfo, SongInfoUtils, RandomIPGenerator, SodaTimedLyricsParser, LanZouYParser,
     cachecookies, resp2json, isvalidresp, safeextractfromdict, replacefile, printfullline, smarttrunctable, usesearchheaderscookies, byte2mb, seconds2hms,
     usedownloadheaderscookies, useparseheaderscookies, cookies2dict, cookies2string, touchdir, estimatedurationwithfilesizebr, estimatedurationwithfilelink,
     extractdurationsecondsfromlrc, searchdictbykey, colorize, optionalimportfrom, legalizestring, kuwolyricslisttolrc, shortenpathsinsonginfos, cursorpickintable, 
-    printtable, optionalimport, cleanlrc
+    printtable, optionalimport, cleanlrc, buildrequestssession, TokenBucket, AIMDLimiter, HostRateLimiter,
+    TTLCache, SQLiteCache, JSONLResultsStore, LibraryIndex, SearchResultsMerger, ServerClock
 )
\ No newline at end of file
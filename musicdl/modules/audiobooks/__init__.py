@@ -1,4 +1,10 @@
 '''initialize'''
-from .lizhi import LizhiMusicClient
-from .ximalaya import XimalayaMusicClient
-from .qingting import QingtingMusicClient
\ No newline at end of file
+from ..utils.importutils import lazyregistry
+
+
+'''LAZY_MODULES'''
+LAZY_MODULES = {'LizhiMusicClient': '.lizhi', 'XimalayaMusicClient': '.ximalaya', 'QingtingMusicClient': '.qingting'}
+
+
+'''__getattr__'''
+__getattr__ = lazyregistry(__name__, LAZY_MODULES)
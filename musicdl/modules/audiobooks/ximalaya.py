@@ -120,17 +120,24 @@ class XimalayaMusicClient(BaseMusicClient):
             if song_info.with_valid_download_url: break
         # return
         return song_info
+    '''_parsesearchresult'''
+    def _parsesearchresult(self, search_result: dict, request_overrides: dict = None):
+        return self._hedgedparse([self._parsewithcggapi, self._parsewithofficialapiv1], search_result, request_overrides)
+    '''_buildlazysonginfo'''
+    def _buildlazysonginfo(self, search_result: dict):
+        return SongInfo(
+            raw_data={'search': search_result, 'download': {}, 'lyric': {}}, source=self.source, song_name=legalizestring(search_result.get('title')), singers=legalizestring(search_result.get('nickname')),
+            album=legalizestring(search_result.get('album_title') or search_result.get('albumTitle')), file_size='NULL', identifier=search_result.get('id') or search_result.get('trackId'), 
+            duration_s=int(float(search_result.get('duration', 0) or 0)), duration=seconds2hms(search_result.get('duration', 0) or 0), cover_url=safeextractfromdict(search_result, ['cover_path'], None), resolver='_parsesearchresult',
+        )
     '''_parsebytrack'''
     def _parsebytrack(self, search_results, song_infos: list = [], request_overrides: dict = None, progress: Progress = None):
         request_overrides = request_overrides or {}
         for search_result in search_results['response']['docs']:
             if (not isinstance(search_result, dict)) or ('id' not in search_result): continue
-            song_info = SongInfo(source=self.source)
-            for parser in [self._parsewithcggapi, self._parsewithofficialapiv1]:
-                try: song_info = parser(search_result=search_result, request_overrides=request_overrides)
-                except: continue
-                if song_info.with_valid_download_url: break
-            if not song_info.with_valid_download_url: continue
+            if self.lazy_resolve: song_info = self._buildlazysonginfo(search_result=search_result)
+            else: song_info = self._parsesearchresult(search_result=search_result, request_overrides=request_overrides)
+            if not song_info.with_valid_download_url and not song_info.resolver: continue
             song_infos.append(song_info)
             if self.strict_limit_search_size_per_page and len(song_infos) >= self.search_size_per_page: break
         return song_infos
@@ -167,11 +174,7 @@ class XimalayaMusicClient(BaseMusicClient):
                 if track_idx > 0:
                     progress.advance(download_album_pid, 1)
                     progress.update(download_album_pid, description=f"{self.source}._parsebyalbum >>> ({track_idx}/{len(tracks)}) episodes completed in album {search_result['id']}")
-                eps_info = SongInfo(source=self.source)
-                for parser in [self._parsewithcggapi, self._parsewithofficialapiv1]:
-                    try: eps_info = parser(search_result=track, request_overrides=request_overrides)
-                    except: continue
-                    if eps_info.with_valid_download_url: break
+                eps_info = self._parsesearchresult(search_result=track, request_overrides=request_overrides)
                 if not eps_info.with_valid_download_url: continue
                 song_info.episodes.append(eps_info)
             progress.advance(download_album_pid, 1)
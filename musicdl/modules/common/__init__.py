@@ -1,6 +1,10 @@
 '''initialize'''
-from .jbsou import JBSouMusicClient
-from .tunehub import TuneHubMusicClient
-from .mp3juice import MP3JuiceMusicClient
-from .gdstudio import GDStudioMusicClient
-from .myfreemp3 import MyFreeMP3MusicClient
\ No newline at end of file
+from ..utils.importutils import lazyregistry
+
+
+'''LAZY_MODULES'''
+LAZY_MODULES = {'JBSouMusicClient': '.jbsou', 'TuneHubMusicClient': '.tunehub', 'MP3JuiceMusicClient': '.mp3juice', 'GDStudioMusicClient': '.gdstudio', 'MyFreeMP3MusicClient': '.myfreemp3'}
+
+
+'''__getattr__'''
+__getattr__ = lazyregistry(__name__, LAZY_MODULES)
@@ -12,10 +12,12 @@ import random
 import hashlib
 import requests
 import json_repair
+from collections import deque
 from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
 from rich.progress import Progress
 from ..sources import BaseMusicClient
-from ..utils import legalizestring, resp2json, usesearchheaderscookies, byte2mb, estimatedurationwithfilesizebr, estimatedurationwithfilelink, seconds2hms, safeextractfromdict, cleanlrc, SongInfo
+from ..utils import legalizestring, resp2json, usesearchheaderscookies, byte2mb, estimatedurationwithfilesizebr, estimatedurationwithfilelink, seconds2hms, safeextractfromdict, cleanlrc, SongInfo, ServerClock
 
 
 '''GDStudioMusicClient'''
@@ -42,6 +44,13 @@ class GDStudioMusicClient(BaseMusicClient):
         }
         self.default_headers = self.default_search_headers
         self._initsession()
+        self.server_clock = ServerClock(self._fetchservertime)
+        self._api_executor = None
+    '''_fetchservertime'''
+    def _fetchservertime(self):
+        resp = self.get('https://www.ximalaya.com/revision/time', timeout=10)
+        resp.raise_for_status()
+        return int(resp.text.strip())
     '''_yieldcallback'''
     def _yieldcallback(self):
         random_num = ''.join([str(random.randint(0, 9)) for _ in range(21)])
@@ -49,14 +58,8 @@ class GDStudioMusicClient(BaseMusicClient):
         return f"jQuery{random_num}_{timestamp}"
     '''_yieldcrc32'''
     def _yieldcrc32(self, id_value: str, hostname: str = 'music.gdstudio.xyz', version: str = "2025.11.4"):
-        # timestamp
-        try:
-            resp = self.get('https://www.ximalaya.com/revision/time')
-            resp.raise_for_status()
-            ts_ms = resp.text.strip()
-        except:
-            ts_ms = int(time.time() * 1000)
-        ts9 = str(ts_ms)[:9]
+        # timestamp, the server clock offset is measured once and refreshed in the background, so signing sends no request
+        ts9 = str(self.server_clock.now())[:9]
         # version
         parts = version.split(".")
         padded = [p if len(p) != 1 else "0" + p for p in parts]
@@ -99,6 +102,145 @@ class GDStudioMusicClient(BaseMusicClient):
                 count += page_size
         # return
         return search_urls
+    '''_callapi'''
+    def _callapi(self, search_result: dict, data_json: dict, request_overrides: dict = None):
+        request_overrides, api_url, params = request_overrides or {}, GDStudioMusicClient.SITE_TO_API_MAPPER[search_result['source']], {'callback': self._yieldcallback()}
+        if api_url in {'https://music.gdstudio.xyz/api.php'}: resp = self.post(api_url, params=params, data=data_json, **request_overrides)
+        else: resp = self.get(api_url, params={**params, **data_json, '_': str(int(time.time() * 1000))}, **request_overrides)
+        resp.raise_for_status()
+        json_str = resp.text[resp.text.index('(')+1: resp.text.rindex(')')]
+        return json_repair.loads(json_str)
+    '''_parsewithbitrate'''
+    def _parsewithbitrate(self, search_result: dict, br: int, request_overrides: dict = None):
+        song_info = SongInfo(source=self.source, root_source=search_result['source'])
+        download_result = self._callapi(search_result, {'types': 'url', 'id': search_result['id'], 'source': search_result['source'], 'br': br, 's': self._yieldcrc32(search_result['id'])}, request_overrides)
+        if not download_result.get('url'): return song_info
+        download_url = download_result['url']
+        if not download_url.startswith('http'): download_url = f'https://music.gdstudio.xyz/' + download_url
+        if search_result['source'] in {'bilibili'}: download_url = f'https://music-proxy.gdstudio.org/{download_url}'
+        download_url_status = self.audio_link_tester.test(download_url, request_overrides); download_url = download_url_status['final_url']
+        song_info = SongInfo(
+            raw_data={'search': search_result, 'download': download_result, 'lyric': {}}, source=self.source, song_name=legalizestring(safeextractfromdict(search_result, ['name'], None)),
+            singers=legalizestring(', '.join(safeextractfromdict(search_result, ['artist'], []) or [])), album=legalizestring(safeextractfromdict(search_result, ['album'], None)),
+            ext=download_url.split('?')[0].split('.')[-1], file_size_bytes=download_result.get('size', 0), file_size=byte2mb(download_result.get('size', 0)), 
+            identifier=search_result['id'], duration_s=estimatedurationwithfilesizebr(download_result.get('size', 0), download_result.get('br', br), return_seconds=True), 
+            duration=estimatedurationwithfilesizebr(download_result.get('size', 0), download_result.get('br', br)), lyric=None, cover_url=None, download_url=download_url, 
+            download_url_status=download_url_status, root_source=search_result['source'],
+        )
+        if search_result['source'] in {'bilibili'}: song_info.download_url_status['ok'] = True if song_info.download_url_status['clen'] > 0 else False # use proxy url, general test method will fail
+        return song_info
+    '''_parselyric'''
+    def _parselyric(self, search_result: dict, request_overrides: dict = None):
+        try:
+            lyric_result = self._callapi(search_result, {'types': 'lyric', 'id': search_result['lyric_id'], 'source': search_result['source'], 's': self._yieldcrc32(search_result['lyric_id'])}, request_overrides)
+            lyric = cleanlrc(lyric_result.get('lyric') or "") or cleanlrc(lyric_result.get('tlyric') or "") or 'NULL'
+        except:
+            lyric_result, lyric = dict(), 'NULL'
+        return lyric_result, lyric
+    '''_parsecover'''
+    def _parsecover(self, search_result: dict, request_overrides: dict = None):
+        cover_url = None
+        if search_result['source'] in {'kuwo'}:
+            cdn_hosts = ["http://img1.kwcdn.kuwo.cn/star/albumcover/", "http://img2.kwcdn.kuwo.cn/star/albumcover/", "http://img3.kwcdn.kuwo.cn/star/albumcover/"]
+            try:
+                if search_result['pic_id'].startswith('120/'): search_result['pic_id'] = '300/' + search_result['pic_id'][4:]
+                cover_url = cdn_hosts[0] + search_result['pic_id']
+            except:
+                pass
+        elif search_result['source'] in {'apple'}:
+            try:
+                cover_url = search_result['pic_id'].format(w=300, h=300)
+            except:
+                pass
+        elif search_result['source'] in {'bilibili'}:
+            try:
+                cover_url = search_result['pic_id']
+                if not cover_url.startswith('http'): cover_url = f'https:{cover_url}'
+            except:
+                pass
+        else:
+            try:
+                cover_result = self._callapi(search_result, {'types': 'pic', 'id': search_result['pic_id'], 'source': search_result['source'], 'size': 300, 's': self._yieldcrc32(search_result['pic_id'])}, request_overrides)
+                cover_url = cover_result['url']
+            except:
+                pass
+        return cover_url
+    '''_apiexecutor'''
+    def _apiexecutor(self):
+        # one pool per client for the api calls of all search results, as large as the concurrency the rate limiter allows on the api hosts
+        with self._session_lock:
+            if self._api_executor is None:
+                max_workers = max([self.rate_limiter.getconfig(self.rate_limiter.hostof(GDStudioMusicClient.SITE_TO_API_MAPPER[site]))['max_concurrency'] for site in self.allowed_music_sources] + [1])
+                self._api_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{self.source}.api')
+            return self._api_executor
+    '''_submitsearchresult'''
+    def _submitsearchresult(self, search_result: dict, request_overrides: dict = None):
+        # the whole bitrate ladder, lyric and cover are requested at the same time, the highest bitrate with a valid download url wins
+        pool, brs = self._apiexecutor(), [999, 740, 320, 192, 128] # 999 and 740 mean lossless
+        ladder_futures = [pool.submit(self._parsewithbitrate, search_result, br, request_overrides) for br in brs]
+        return ladder_futures, pool.submit(self._parselyric, search_result, request_overrides), pool.submit(self._parsecover, search_result, request_overrides)
+    '''_parsesearchresult'''
+    def _parsesearchresult(self, search_result: dict, request_overrides: dict = None, futures: tuple = None):
+        # init
+        request_overrides = copy.deepcopy(request_overrides or {})
+        song_info = SongInfo(source=self.source, root_source=search_result['source'])
+        ladder_futures, lyric_future, cover_future = futures or self._submitsearchresult(search_result, request_overrides)
+        try:
+            # --download results
+            for future in ladder_futures:
+                try: song_info = future.result()
+                except: continue
+                if song_info.with_valid_download_url: break
+            if not song_info.with_valid_download_url: return song_info
+            song_info.download_url_status['probe_status'] = self.audio_link_tester.probe(song_info.download_url, request_overrides)
+            song_info.file_size = song_info.download_url_status['probe_status']['file_size']
+            if song_info.ext == 'm4s': song_info.ext = 'm4a'
+            # --lyric results
+            lyric_result, lyric = lyric_future.result()
+            if not lyric or lyric == 'NULL':
+                try:
+                    params = {'artist_name': song_info.singers, 'track_name': song_info.song_name, 'album_name': song_info.album, 'duration': estimatedurationwithfilelink(song_info.download_url, headers=self.default_download_headers, request_overrides=request_overrides)}
+                    resp = self.get(f'https://lrclib.net/api/get?', params=params, **request_overrides)
+                    resp.raise_for_status()
+                    lyric_result = resp2json(resp=resp)
+                    lyric = cleanlrc(lyric_result.get('syncedLyrics') or "") or 'NULL'
+                    song_info.duration_s, song_info.duration = params['duration'], seconds2hms(params['duration'])
+                except:
+                    lyric_result, lyric = dict(), 'NULL'
+            song_info.lyric = lyric
+            song_info.raw_data['lyric'] = lyric_result
+            # --cover results
+            song_info.cover_url = cover_future.result()
+        finally:
+            # lower bitrates still waiting for a worker are cancelled, the requests already sent are left to finish in the background
+            for future in (*ladder_futures, lyric_future, cover_future): future.cancel()
+        # return
+        return song_info
+    '''_buildlazysonginfo'''
+    def _buildlazysonginfo(self, search_result: dict):
+        return SongInfo(
+            raw_data={'search': search_result, 'download': {}, 'lyric': {}}, source=self.source, song_name=legalizestring(safeextractfromdict(search_result, ['name'], None)),
+            singers=legalizestring(', '.join(safeextractfromdict(search_result, ['artist'], []) or [])), album=legalizestring(safeextractfromdict(search_result, ['album'], None)),
+            file_size='NULL', identifier=search_result['id'], duration='-:-:-', root_source=search_result['source'], resolver='_parsesearchresult',
+        )
+    '''_iterparsedsearchresults'''
+    def _iterparsedsearchresults(self, search_results: list, song_infos: list, request_overrides: dict = None, max_pending: int = 8):
+        # the api calls of up to max_pending hits are queued on the shared pool at once, hits are yielded in page order as soon as the head one is ready,
+        # with strict_limit_search_size_per_page no more hits are in flight than the page still needs
+        search_results, pending = iter(search_results), deque()
+        try:
+            while True:
+                while len(pending) < max_pending and (not self.strict_limit_search_size_per_page or len(song_infos) + len(pending) < self.search_size_per_page):
+                    search_result = next(search_results, None)
+                    if search_result is None: break
+                    pending.append((search_result, self._submitsearchresult(search_result, request_overrides)))
+                if not pending: return
+                search_result, futures = pending.popleft()
+                yield self._parsesearchresult(search_result, request_overrides, futures=futures)
+        finally:
+            # api calls of hits the caller did not consume are cancelled if they are still waiting for a worker
+            for _, (ladder_futures, lyric_future, cover_future) in pending:
+                for future in (*ladder_futures, lyric_future, cover_future): future.cancel()
     '''_search'''
     @usesearchheaderscookies
     def _search(self, keyword: str = '', search_url: dict = None, request_overrides: dict = None, song_infos: list = [], progress: Progress = None, progress_id: int = 0):
@@ -114,93 +256,14 @@ class GDStudioMusicClient(BaseMusicClient):
             resp.raise_for_status()
             json_str = resp.text[resp.text.index('(')+1: resp.text.rindex(')')]
             search_results = json_repair.loads(json_str)
-            for search_result in search_results:
-                # --download results
-                if (not isinstance(search_result, dict)) or ('id' not in search_result) or ('url_id' not in search_result) or ('source' not in search_result): continue
-                song_info = SongInfo(source=self.source, root_source=search_result['source'])
-                for br in [999, 740, 320, 192, 128]: # 999 and 740 mean lossless
-                    params = {'callback': self._yieldcallback()}
-                    data_json = {'types': 'url', 'id': search_result['id'], 'source': search_result['source'], 'br': br, 's': self._yieldcrc32(search_result['id'])}
-                    try:
-                        if method == 'post': resp = self.post(GDStudioMusicClient.SITE_TO_API_MAPPER[search_result['source']], params=params, data=data_json, **request_overrides)
-                        else: resp = self.get(GDStudioMusicClient.SITE_TO_API_MAPPER[search_result['source']], params={**params, **data_json, '_': str(int(time.time() * 1000))}, **request_overrides)
-                        resp.raise_for_status()
-                        json_str = resp.text[resp.text.index('(')+1: resp.text.rindex(')')]
-                        download_result = json_repair.loads(json_str)
-                    except:
-                        continue
-                    if not download_result.get('url'): continue
-                    download_url = download_result['url']
-                    if not download_url.startswith('http'): download_url = f'https://music.gdstudio.xyz/' + download_url
-                    if search_result['source'] in {'bilibili'}: download_url = f'https://music-proxy.gdstudio.org/{download_url}'
-                    download_url_status = self.audio_link_tester.test(download_url, request_overrides); download_url = download_url_status['final_url']
-                    song_info = SongInfo(
-                        raw_data={'search': search_result, 'download': download_result, 'lyric': {}}, source=self.source, song_name=legalizestring(safeextractfromdict(search_result, ['name'], None)),
-                        singers=legalizestring(', '.join(safeextractfromdict(search_result, ['artist'], []) or [])), album=legalizestring(safeextractfromdict(search_result, ['album'], None)),
-                        ext=download_url.split('?')[0].split('.')[-1], file_size_bytes=download_result.get('size', 0), file_size=byte2mb(download_result.get('size', 0)), 
-                        identifier=search_result['id'], duration_s=estimatedurationwithfilesizebr(download_result.get('size', 0), download_result.get('br', br), return_seconds=True), 
-                        duration=estimatedurationwithfilesizebr(download_result.get('size', 0), download_result.get('br', br)), lyric=None, cover_url=None, download_url=download_url, 
-                        download_url_status=download_url_status, root_source=search_result['source'],
-                    )
-                    if search_result['source'] in {'bilibili'}: song_info.download_url_status['ok'] = True if song_info.download_url_status['clen'] > 0 else False # use proxy url, general test method will fail
-                    if song_info.with_valid_download_url: break
-                if not song_info.with_valid_download_url: continue
-                song_info.download_url_status['probe_status'] = self.audio_link_tester.probe(song_info.download_url, request_overrides)
-                song_info.file_size = song_info.download_url_status['probe_status']['file_size']
-                if song_info.ext == 'm4s': song_info.ext = 'm4a'
-                # --lyric results
-                try:
-                    data_json = {'types': 'lyric', 'id': search_result['lyric_id'], 'source': search_result['source'], 's': self._yieldcrc32(search_result['lyric_id'])}
-                    if method == 'post': resp = self.post(GDStudioMusicClient.SITE_TO_API_MAPPER[search_result['source']], data=data_json, params={'callback': self._yieldcallback()}, **request_overrides)
-                    else: resp = self.get(GDStudioMusicClient.SITE_TO_API_MAPPER[search_result['source']], params={**{'callback': self._yieldcallback()}, **data_json, '_': str(int(time.time() * 1000))}, **request_overrides)
-                    resp.raise_for_status()
-                    json_str = resp.text[resp.text.index('(')+1: resp.text.rindex(')')]
-                    lyric_result = json_repair.loads(json_str)
-                    lyric = cleanlrc(lyric_result.get('lyric') or "") or cleanlrc(lyric_result.get('tlyric') or "") or 'NULL'
-                except:
-                    lyric_result, lyric = dict(), 'NULL'
-                if not lyric or lyric == 'NULL':
-                    try:
-                        params = {'artist_name': song_info.singers, 'track_name': song_info.song_name, 'album_name': song_info.album, 'duration': estimatedurationwithfilelink(song_info.download_url, headers=self.default_download_headers, request_overrides=request_overrides)}
-                        resp = self.get(f'https://lrclib.net/api/get?', params=params, **request_overrides)
-                        resp.raise_for_status()
-                        lyric_result = resp2json(resp=resp)
-                        lyric = cleanlrc(lyric_result.get('syncedLyrics') or "") or 'NULL'
-                        song_info.duration_s, song_info.duration = params['duration'], seconds2hms(params['duration'])
-                    except:
-                        lyric_result, lyric = dict(), 'NULL'
-                song_info.lyric = lyric
-                song_info.raw_data['lyric'] = lyric_result
-                # --cover results
-                if search_result['source'] in {'kuwo'}:
-                    cdn_hosts = ["http://img1.kwcdn.kuwo.cn/star/albumcover/", "http://img2.kwcdn.kuwo.cn/star/albumcover/", "http://img3.kwcdn.kuwo.cn/star/albumcover/"]
-                    try:
-                        if search_result['pic_id'].startswith('120/'): search_result['pic_id'] = '300/' + search_result['pic_id'][4:]
-                        song_info.cover_url = cdn_hosts[0] + search_result['pic_id']
-                    except:
-                        pass
-                elif search_result['source'] in {'apple'}:
-                    try:
-                        song_info.cover_url = search_result['pic_id'].format(w=300, h=300)
-                    except:
-                        pass
-                elif search_result['source'] in {'bilibili'}:
-                    try:
-                        song_info.cover_url = search_result['pic_id']
-                        if not song_info.cover_url.startswith('http'): song_info.cover_url = f'https:{song_info.cover_url}'
-                    except:
-                        pass
-                else:
-                    try:
-                        data_json = {'types': 'pic', 'id': search_result['pic_id'], 'source': search_result['source'], 'size': 300, 's': self._yieldcrc32(search_result['pic_id'])}
-                        if method == 'post': resp = self.post(GDStudioMusicClient.SITE_TO_API_MAPPER[search_result['source']], data=data_json, params={'callback': self._yieldcallback()}, **request_overrides)
-                        else: resp = self.get(GDStudioMusicClient.SITE_TO_API_MAPPER[search_result['source']], params={**{'callback': self._yieldcallback()}, **data_json, '_': str(int(time.time() * 1000))}, **request_overrides)
-                        resp.raise_for_status()
-                        json_str = resp.text[resp.text.index('(')+1: resp.text.rindex(')')]
-                        cover_result = json_repair.loads(json_str)
-                        song_info.cover_url = cover_result['url']
-                    except:
-                        pass
+            search_results = [s for s in search_results if isinstance(s, dict) and ('id' in s) and ('url_id' in s) and ('source' in s)]
+            # --download results
+            if self.lazy_resolve:
+                parsed_song_infos = (self._buildlazysonginfo(search_result=search_result) for search_result in search_results)
+            else:
+                parsed_song_infos = self._iterparsedsearchresults(search_results, song_infos, request_overrides)
+            for song_info in parsed_song_infos:
+                if not song_info.with_valid_download_url and not song_info.resolver: continue
                 # --append to song_infos
                 song_infos.append(song_info)
                 # --judgement for search_size
@@ -68,10 +68,10 @@ class JBSouMusicClient(BaseMusicClient):
                 search_result['source'] = source
                 song_info = SongInfo(source=self.source, root_source=search_result['source'])
                 download_url = urljoin(base_url, search_result['url'])
-                try: (resp := self.session.head(download_url, allow_redirects=True, **request_overrides)).raise_for_status(); download_url = resp.url
+                try: (resp := self.session.head(download_url, allow_redirects=True, **{**request_overrides, 'headers': self._requestheaders(request_overrides.get('headers'))})).raise_for_status(); download_url = resp.url
                 except Exception: continue
                 cover_url = urljoin(base_url, search_result.get('cover', "") or "")
-                try: (resp := self.session.head(cover_url, timeout=10, allow_redirects=True, **request_overrides)).raise_for_status(); cover_url = resp.url
+                try: (resp := self.session.head(cover_url, timeout=10, allow_redirects=True, **{**request_overrides, 'headers': self._requestheaders(request_overrides.get('headers'))})).raise_for_status(); cover_url = resp.url
                 except Exception: cover_url = cover_url
                 song_info = SongInfo(
                     raw_data={'search': search_result, 'download': {}, 'lyric': {}}, source=self.source, song_name=legalizestring(safeextractfromdict(search_result, ['name'], None)),
@@ -59,7 +59,7 @@ class MyFreeMP3MusicClient(BaseMusicClient):
     def _parseneteasesearchresult(self, search_result: dict, request_overrides: dict = None):
         request_overrides = request_overrides or {}
         if (not isinstance(search_result, dict)) or ('id' not in search_result): return SongInfo(source=self.source)
-        download_url = self.session.head(f'http://music.163.com/song/media/outer/url?id={search_result["id"]}.mp3', timeout=10, allow_redirects=True, **request_overrides).url
+        download_url = self.session.head(f'http://music.163.com/song/media/outer/url?id={search_result["id"]}.mp3', timeout=10, allow_redirects=True, **{**request_overrides, 'headers': self._requestheaders(request_overrides.get('headers'))}).url
         lyric: str = cleanlrc((search_result.get('lrc', '') or '').removeprefix('data:text/plain,'))
         duration_s = extractdurationsecondsfromlrc(lyric)
         song_info = SongInfo(
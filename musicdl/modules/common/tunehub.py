@@ -98,9 +98,9 @@ class TuneHubMusicClient(BaseMusicClient):
                 if search_result['source'] in {'netease', 'qq'}:
                     for br in (TuneHubMusicClient.BAKA_MUSIC_QUALITIES if search_result['source'] in {'netease'} else TuneHubMusicClient.BAKA_MUSIC_QUALITIES[:1]):
                         params = {'br': br, 'id': search_result['id'], 'server': {'netease': 'netease', 'qq': 'tencent', 'kuwo': 'kuwo'}[search_result['source']], 'type': 'url'}
-                        try: (resp := self.session.head('https://api.baka.plus/meting?', timeout=10, params=params, allow_redirects=True, **request_overrides)).raise_for_status(); download_url = resp.url
+                        try: (resp := self.session.head('https://api.baka.plus/meting?', timeout=10, params=params, allow_redirects=True, **{**request_overrides, 'headers': self._requestheaders(request_overrides.get('headers'))})).raise_for_status(); download_url = resp.url
                         except Exception: continue
-                        try: (resp := self.session.head(safeextractfromdict(search_result, ['pic'], None), timeout=10, allow_redirects=True, **request_overrides)).raise_for_status(); cover_url = resp.url
+                        try: (resp := self.session.head(safeextractfromdict(search_result, ['pic'], None), timeout=10, allow_redirects=True, **{**request_overrides, 'headers': self._requestheaders(request_overrides.get('headers'))})).raise_for_status(); cover_url = resp.url
                         except Exception: cover_url = safeextractfromdict(search_result, ['pic'], None) or ""
                         song_info = SongInfo(
                             raw_data={'search': search_result, 'download': {}, 'lyric': {}}, source=self.source, song_name=legalizestring(safeextractfromdict(search_result, ['name'], None)),
@@ -1,58 +1,36 @@
 '''initialize'''
-from .qq import QQMusicClient
-from .mitu import MituMusicClient
-from .joox import JooxMusicClient
-from .base import BaseMusicClient
-from .kuwo import KuwoMusicClient
-from .migu import MiguMusicClient
-from .kkws import KKWSMusicClient
-from .soda import SodaMusicClient
-from .jcpoo import JCPOOMusicClient
-from .flmp3 import FLMP3MusicClient
-from .htqyy import HTQYYMusicClient
-from .tidal import TIDALMusicClient
-from .apple import AppleMusicClient
-from .kugou import KugouMusicClient
-from .twot58 import TwoT58MusicClient
-from .fangpi import FangpiMusicClient
-from .buguyy import BuguyyMusicClient
 from ..utils import BaseModuleBuilder
-from .netease import NeteaseMusicClient
-from .youtube import YouTubeMusicClient
-from .gequbao import GequbaoMusicClient
-from .jamendo import JamendoMusicClient
-from .gequhai import GequhaiMusicClient
-from .livepoo import LivePOOMusicClient
-from .zhuolin import ZhuolinMusicClient
-from .fivesong import FiveSongMusicClient
-from .fivesing import FiveSingMusicClient
-from .qianqian import QianqianMusicClient
-from .bilibili import BilibiliMusicClient
-from .yinyuedao import YinyuedaoMusicClient
-from .soundclound import SoundCloudMusicClient
-from ..audiobooks import XimalayaMusicClient, LizhiMusicClient, QingtingMusicClient
-from ..common import GDStudioMusicClient, TuneHubMusicClient, MP3JuiceMusicClient, MyFreeMP3MusicClient, JBSouMusicClient
+from .base import BaseMusicClient, DownloadScheduler
 
 
 '''MusicClientBuilder'''
 class MusicClientBuilder(BaseModuleBuilder):
+    # clients are registered as 'module:ClassName' and only imported when they are built, which keeps the CLI cold start cheap
+    MODULES_PACKAGE = __name__
     REGISTERED_MODULES = {
         # Mainland Platforms
-        'NeteaseMusicClient': NeteaseMusicClient, 'QianqianMusicClient': QianqianMusicClient, 'KuwoMusicClient': KuwoMusicClient, 'KugouMusicClient': KugouMusicClient, 'MiguMusicClient': MiguMusicClient,
-        'QQMusicClient': QQMusicClient, 'BilibiliMusicClient': BilibiliMusicClient, 'FiveSingMusicClient': FiveSingMusicClient, 'SodaMusicClient': SodaMusicClient,
+        'NeteaseMusicClient': '.netease:NeteaseMusicClient', 'QianqianMusicClient': '.qianqian:QianqianMusicClient', 'KuwoMusicClient': '.kuwo:KuwoMusicClient', 'KugouMusicClient': '.kugou:KugouMusicClient', 'MiguMusicClient': '.migu:MiguMusicClient',
+        'QQMusicClient': '.qq:QQMusicClient', 'BilibiliMusicClient': '.bilibili:BilibiliMusicClient', 'FiveSingMusicClient': '.fivesing:FiveSingMusicClient', 'SodaMusicClient': '.soda:SodaMusicClient',
         # Global Streaming / Indie
-        'YouTubeMusicClient': YouTubeMusicClient, 'JooxMusicClient': JooxMusicClient, 'AppleMusicClient': AppleMusicClient, 'JamendoMusicClient': JamendoMusicClient, 'TIDALMusicClient': TIDALMusicClient,
-        'SoundCloudMusicClient': SoundCloudMusicClient,
+        'YouTubeMusicClient': '.youtube:YouTubeMusicClient', 'JooxMusicClient': '.joox:JooxMusicClient', 'AppleMusicClient': '.apple:AppleMusicClient', 'JamendoMusicClient': '.jamendo:JamendoMusicClient', 'TIDALMusicClient': '.tidal:TIDALMusicClient',
+        'SoundCloudMusicClient': '.soundclound:SoundCloudMusicClient',
         # Audio / Radio
-        'XimalayaMusicClient': XimalayaMusicClient, 'LizhiMusicClient': LizhiMusicClient, 'QingtingMusicClient': QingtingMusicClient,
+        'XimalayaMusicClient': '..audiobooks.ximalaya:XimalayaMusicClient', 'LizhiMusicClient': '..audiobooks.lizhi:LizhiMusicClient', 'QingtingMusicClient': '..audiobooks.qingting:QingtingMusicClient',
         # Aggregators / Multi-Source Gateways
-        'MP3JuiceMusicClient': MP3JuiceMusicClient, 'TuneHubMusicClient': TuneHubMusicClient, 'GDStudioMusicClient': GDStudioMusicClient, 'MyFreeMP3MusicClient': MyFreeMP3MusicClient, 'JBSouMusicClient': JBSouMusicClient,
+        'MP3JuiceMusicClient': '..common.mp3juice:MP3JuiceMusicClient', 'TuneHubMusicClient': '..common.tunehub:TuneHubMusicClient', 'GDStudioMusicClient': '..common.gdstudio:GDStudioMusicClient', 'MyFreeMP3MusicClient': '..common.myfreemp3:MyFreeMP3MusicClient', 'JBSouMusicClient': '..common.jbsou:JBSouMusicClient',
         # Unofficial Download Sites / Scrapers
-        'MituMusicClient': MituMusicClient, 'BuguyyMusicClient': BuguyyMusicClient, 'GequbaoMusicClient': GequbaoMusicClient, 'YinyuedaoMusicClient': YinyuedaoMusicClient, 'FLMP3MusicClient': FLMP3MusicClient,
-        'FangpiMusicClient': FangpiMusicClient, 'FiveSongMusicClient': FiveSongMusicClient, 'KKWSMusicClient': KKWSMusicClient, 'GequhaiMusicClient': GequhaiMusicClient, 'LivePOOMusicClient': LivePOOMusicClient,
-        'HTQYYMusicClient': HTQYYMusicClient, 'JCPOOMusicClient': JCPOOMusicClient, 'TwoT58MusicClient': TwoT58MusicClient, 'ZhuolinMusicClient': ZhuolinMusicClient,
+        'MituMusicClient': '.mitu:MituMusicClient', 'BuguyyMusicClient': '.buguyy:BuguyyMusicClient', 'GequbaoMusicClient': '.gequbao:GequbaoMusicClient', 'YinyuedaoMusicClient': '.yinyuedao:YinyuedaoMusicClient', 'FLMP3MusicClient': '.flmp3:FLMP3MusicClient',
+        'FangpiMusicClient': '.fangpi:FangpiMusicClient', 'FiveSongMusicClient': '.fivesong:FiveSongMusicClient', 'KKWSMusicClient': '.kkws:KKWSMusicClient', 'GequhaiMusicClient': '.gequhai:GequhaiMusicClient', 'LivePOOMusicClient': '.livepoo:LivePOOMusicClient',
+        'HTQYYMusicClient': '.htqyy:HTQYYMusicClient', 'JCPOOMusicClient': '.jcpoo:JCPOOMusicClient', 'TwoT58MusicClient': '.twot58:TwoT58MusicClient', 'ZhuolinMusicClient': '.zhuolin:ZhuolinMusicClient',
     }
 
 
 '''BuildMusicClient'''
-BuildMusicClient = MusicClientBuilder().build
\ No newline at end of file
+BuildMusicClient = MusicClientBuilder().build
+
+
+'''__getattr__'''
+def __getattr__(name):
+    # keep `from musicdl.modules.sources import NeteaseMusicClient` working without eagerly importing every client
+    if name in MusicClientBuilder.REGISTERED_MODULES: return MusicClientBuilder().get(name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
\ No newline at end of file
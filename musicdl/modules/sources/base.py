@@ -8,21 +8,23 @@ WeChat Official Account (微信公众号):
 """
 
 import os
-import re
 import copy
+import json
+import hashlib
+import time
 import random
-import pickle
-import requests
-from pathlib import Path
-from threading import Lock
+import asyncio
+import functools
+from urllib.parse import urlparse
+from queue import Queue
+from threading import Event, Lock, local
 from rich.text import Text
 from itertools import chain
 from datetime import datetime
 from rich.progress import Task
 from collections import defaultdict
-from fake_useragent import UserAgent
 from pathvalidate import sanitize_filepath
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from rich.progress import (
     Progress,
     SpinnerColumn,
@@ -47,6 +49,14 @@ from ..utils import (
     cookies2string,
     shortenpathsinsonginfos,
     optionalimport,
+    buildrequestssession,
+    HostRateLimiter,
+    SQLiteCache,
+    JSONLResultsStore,
+    LibraryIndex,
+    hashfile,
+    listcurlcffiimpersonates,
+    randomuseragent,
 )
 
 
@@ -70,11 +80,278 @@ class AudioAwareColumn(ProgressColumn):
             return self._download_col.render(task)
 
 
+"""StreamingSongInfoList"""
+
+
+class StreamingSongInfoList(list):
+    def __init__(self, callback):
+        super(StreamingSongInfoList, self).__init__()
+        self.callback = callback
+
+    """append"""
+
+    def append(self, song_info: SongInfo):
+        super(StreamingSongInfoList, self).append(song_info)
+        self.callback(song_info)
+
+
+"""DownloadScheduler"""
+
+
+class DownloadScheduler:
+    def __init__(
+        self,
+        max_workers: int = 16,
+        max_workers_per_host: int = 4,
+        dedup_mode: str = None,
+    ):
+        assert dedup_mode in {None, "hardlink", "drop"}
+        self.max_workers = max(1, max_workers)
+        self.max_workers_per_host = max(1, max_workers_per_host)
+        self.dedup_mode = dedup_mode
+        self.content_hashes, self.dedup_lock = {}, Lock()
+
+    """_deduplicate"""
+
+    def _deduplicate(self, music_client: "BaseMusicClient", song_info: SongInfo):
+        # the first file with a given content hash is kept, identical files downloaded later (usually from other sources) are linked to it or dropped
+        if not self.dedup_mode or song_info.episodes:
+            return song_info
+        save_path = song_info.save_path
+        if not os.path.isfile(save_path):
+            return song_info
+        if not song_info.content_hash:
+            song_info.content_hash = hashfile(save_path).hexdigest()
+        with self.dedup_lock:
+            kept_path = self.content_hashes.setdefault(song_info.content_hash, save_path)
+        if kept_path == save_path or not os.path.isfile(kept_path) or os.path.samefile(kept_path, save_path):
+            return song_info
+        try:
+            if self.dedup_mode == "hardlink":
+                os.link(kept_path, f"{save_path}.dedup")
+                os.replace(f"{save_path}.dedup", save_path)
+            else:
+                os.remove(save_path)
+                song_info._save_path = kept_path
+        except OSError as err:
+            # e.g., hard links across file systems, the duplicate is kept as it is
+            if os.path.exists(f"{save_path}.dedup"):
+                os.remove(f"{save_path}.dedup")
+            music_client.logger_handle.warning(
+                f"{music_client.source}.download >>> {song_info.song_name} (Error while deduplicating: {err})",
+                disable_print=music_client.disable_print,
+            )
+            return song_info
+        music_client.logger_handle.info(
+            f"{music_client.source}.download >>> {song_info.song_name} (Duplicate of {kept_path}, {'hard-linked' if self.dedup_mode == 'hardlink' else 'dropped'})",
+            disable_print=music_client.disable_print,
+        )
+        return song_info
+
+    """_recorddownloadresult"""
+
+    def _recorddownloadresult(
+        self,
+        music_client: "BaseMusicClient",
+        results_store: JSONLResultsStore,
+        song_info: SongInfo,
+    ):
+        music_client._recorddownloadresult(
+            self._deduplicate(music_client, song_info), results_store=results_store
+        )
+
+    """_hostof"""
+
+    @staticmethod
+    def _hostof(music_client: "BaseMusicClient", song_info: SongInfo):
+        if isinstance(song_info.download_url, str) and song_info.download_url.startswith("http"):
+            return urlparse(song_info.download_url).netloc
+        return music_client.source
+
+    """_advanceoverall"""
+
+    @staticmethod
+    def _advanceoverall(progress: Progress, overall_progress_id: int, name: str, total: int):
+        progress.advance(overall_progress_id, 1)
+        progress.update(
+            overall_progress_id,
+            description=f"{name} >>> completed ({int(progress.tasks[overall_progress_id].completed)}/{total})",
+        )
+
+    """_downloadtask"""
+
+    @staticmethod
+    def _downloadtask(
+        music_client: "BaseMusicClient",
+        song_info: SongInfo,
+        request_overrides: dict,
+        downloaded_song_infos: list,
+        progress: Progress,
+        song_progress_id: int,
+    ):
+        # _download reports failures on the progress bar only, a private list tells whether this task produced anything
+        task_song_infos = []
+        music_client._download(
+            song_info, request_overrides, task_song_infos, progress, song_progress_id
+        )
+        for downloaded_song_info in task_song_infos:
+            downloaded_song_infos.append(downloaded_song_info)
+        return len(task_song_infos) > 0
+
+    """_runround"""
+
+    def _runround(
+        self,
+        pending: list[tuple],
+        downloaded_song_infos: dict,
+        progress: Progress,
+        overall_progress_id: int,
+        name: str,
+        total: int,
+        final: bool = True,
+    ):
+        # each item in pending is (music_client, song_info, num_threadings, request_overrides, song_progress_id)
+        pending, failed = list(pending), []
+        running, client_loads, host_loads = {}, defaultdict(int), defaultdict(int)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                # --submit every pending task whose client and host still have free slots
+                for task in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+                    music_client, song_info, num_threadings, request_overrides, song_progress_id = task
+                    host = self._hostof(music_client, song_info)
+                    if client_loads[music_client.source] >= num_threadings or host_loads[host] >= self.max_workers_per_host:
+                        continue
+                    pending.remove(task)
+                    client_loads[music_client.source] += 1
+                    host_loads[host] += 1
+                    future = pool.submit(
+                        self._downloadtask,
+                        music_client,
+                        song_info,
+                        copy.deepcopy(request_overrides),
+                        downloaded_song_infos[music_client.source],
+                        progress,
+                        song_progress_id,
+                    )
+                    running[future] = (task, host)
+                # --wait for any running task to free its slots
+                done, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, host = running.pop(future)
+                    client_loads[task[0].source] -= 1
+                    host_loads[host] -= 1
+                    succeeded = future.exception() is None and future.result()
+                    if not succeeded and not final:
+                        failed.append(task)
+                        continue
+                    self._advanceoverall(progress, overall_progress_id, name, total)
+        return failed
+
+    """run"""
+
+    def run(self, jobs: list[tuple]):
+        # init, each item in jobs is (music_client, song_infos, num_threadings, request_overrides)
+        jobs = [
+            (music_client, song_infos, max(1, num_threadings or 1), request_overrides or {})
+            for music_client, song_infos, num_threadings, request_overrides in jobs
+        ]
+        # every finished download is deduplicated (optional) and appended to its client's results store right away
+        results_stores = {
+            music_client.source: music_client._createresultsstore("download_results.jsonl")
+            for music_client, *_ in jobs
+        }
+        downloaded_song_infos = {
+            music_client.source: StreamingSongInfoList(
+                functools.partial(
+                    self._recorddownloadresult,
+                    music_client,
+                    results_stores[music_client.source],
+                )
+            )
+            for music_client, *_ in jobs
+        }
+        # resolve lazy song infos and shorten save paths for all clients at once
+        with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as pool:
+            prepared_song_infos = list(
+                pool.map(
+                    lambda job: job[0]._preparedownload(job[1], job[2], job[3]), jobs
+                )
+            )
+        pending = [
+            (music_client, song_info, num_threadings, request_overrides)
+            for (music_client, _, num_threadings, request_overrides), song_infos in zip(jobs, prepared_song_infos)
+            for song_info in song_infos
+        ]
+        sources = list(downloaded_song_infos.keys())
+        name = f"{sources[0]}.download" if len(sources) == 1 else "MusicClient.download"
+        # schedule the downloads of all clients in one pool, bounded by global, per client and per host limits
+        with BaseMusicClient._createdownloadprogress() as progress:
+            total = len(pending)
+            overall_progress_id = progress.add_task(
+                f"{name} >>> completed (0/{total})", total=total, kind="overall"
+            )
+            pending = [
+                (
+                    *task,
+                    progress.add_task(
+                        f"{task[0].source}.download >>> {task[1].song_name[:10] + '...' if len(task[1].song_name) > 13 else task[1].song_name[:13]} (Preparing)",
+                        total=None,
+                        kind="download",
+                    ),
+                )
+                for task in pending
+            ]
+            failed = self._runround(pending, downloaded_song_infos, progress, overall_progress_id, name, total, final=False)
+            # failed download urls are resolved again once, only after the round so that no running download of the same client
+            # sees the shared headers / cookies switched to the search context, the retries switch back in _download
+            retries, failed_by_client = [], defaultdict(list)
+            for task in failed:
+                failed_by_client[task[0]].append(task)
+            for music_client, tasks in failed_by_client.items():
+                refreshed_song_infos = music_client.refreshdownloadurls([task[1] for task in tasks], tasks[0][2], tasks[0][3])
+                for task, refreshed_song_info in zip(tasks, refreshed_song_infos):
+                    if refreshed_song_info is None:
+                        self._advanceoverall(progress, overall_progress_id, name, total)
+                        continue
+                    progress.update(
+                        task[4],
+                        description=f"{music_client.source}.download >>> {task[1].song_name[:10] + '...' if len(task[1].song_name) > 13 else task[1].song_name[:13]} (Retrying with a new download url)",
+                    )
+                    retries.append((music_client, refreshed_song_info, *task[2:]))
+            self._runround(retries, downloaded_song_infos, progress, overall_progress_id, name, total, final=True)
+        # log results per client
+        downloaded_song_infos = {source: list(items) for source, items in downloaded_song_infos.items()}
+        for music_client, *_ in jobs:
+            music_client._postprocessdownloadresults(
+                downloaded_song_infos[music_client.source], results_stores[music_client.source]
+            )
+        # return
+        return downloaded_song_infos
+
+
 """BaseMusicClient"""
 
 
 class BaseMusicClient:
     source = "BaseMusicClient"
+    # client methods which turn raw_data['search'] into a downloadable SongInfo, tried in order to refresh download urls that fail
+    download_url_resolvers = ()
+    session_pool_maxsize = 32
+    min_download_segment_size = 4 * 1024 * 1024
+    # upper bound of the threads running hedged parser requests, see _hedgedparse
+    hedge_max_workers = 16
+    # client settings which change the content of the search pages, *i.e.*, part of the search cache keys
+    search_cache_scope_attributes = (
+        "search_size_per_source",
+        "search_size_per_page",
+        "strict_limit_search_size_per_page",
+        "lazy_resolve",
+        "allowed_music_sources",
+        "allowed_search_types",
+        "use_encrypted_endpoint",
+    )
 
     def __init__(
         self,
@@ -94,6 +371,13 @@ class BaseMusicClient:
         search_size_per_page: int = 10,
         strict_limit_search_size_per_page: bool = True,
         quark_parser_config: dict = None,
+        lazy_resolve: bool = False,
+        max_download_segments: int = 1,
+        rate_limit_cfg: dict = None,
+        search_cache_cfg: dict = None,
+        results_store_cfg: dict = None,
+        library_index_cfg: dict = None,
+        hedge_delay: float = None,
     ):
         # set up work dir
         touchdir(work_dir)
@@ -113,6 +397,31 @@ class BaseMusicClient:
         self.search_size_per_page = min(search_size_per_source, search_size_per_page)
         self.strict_limit_search_size_per_page = strict_limit_search_size_per_page
         self.quark_parser_config = quark_parser_config or {}
+        self.lazy_resolve = lazy_resolve
+        self.max_download_segments = max(1, int(max_download_segments))
+        self.hedge_delay = hedge_delay
+        self._hedge_executor = None
+        self.rate_limit_cfg = rate_limit_cfg or {}
+        self.rate_limiter = HostRateLimiter(**self.rate_limit_cfg)
+        self.search_cache_cfg = search_cache_cfg or {}
+        self.search_cache = None
+        if self.search_cache_cfg.get("ttl"):
+            self.search_cache = SQLiteCache(
+                self.search_cache_cfg.get("path")
+                or os.path.join(work_dir, "search_cache.sqlite"),
+                table="search_results",
+            )
+            self.search_cache.purge()
+        self.results_store_cfg = results_store_cfg or {}
+        self.library_index_cfg = library_index_cfg or {}
+        self.library_index = None
+        if self.library_index_cfg.get("enable"):
+            self.library_index = LibraryIndex(
+                self.library_index_cfg.get("path")
+                or os.path.join(work_dir, "library_index.sqlite"),
+                duration_tolerance=self.library_index_cfg.get("duration_tolerance", 2),
+                match_metadata=self.library_index_cfg.get("match_metadata", True),
+            )
         self.enable_search_curl_cffi = enable_search_curl_cffi
         self.enable_download_curl_cffi = enable_download_curl_cffi
         self.enable_curl_cffi = self.enable_search_curl_cffi
@@ -122,8 +431,8 @@ class BaseMusicClient:
             else None
         )
         # init requests.Session
-        self.default_search_headers = {"User-Agent": UserAgent().random}
-        self.default_download_headers = {"User-Agent": UserAgent().random}
+        self.default_search_headers = {"User-Agent": randomuseragent()}
+        self.default_download_headers = {"User-Agent": randomuseragent()}
         self.quark_default_download_headers = {
             "user-agent": "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.71 Safari/537.36 Core/1.94.225.400 QQBrowser/12.2.5544.400",
             "origin": "https://pan.quark.cn",
@@ -133,6 +442,12 @@ class BaseMusicClient:
         }
         self.quark_default_download_cookies = {}  # placeholder, useless now
         self.default_headers = self.default_search_headers
+        self._requests_session, self._session_lock, self._thread_local = (
+            None,
+            Lock(),
+            local(),
+        )
+        self.audio_link_tester, self.quark_audio_link_tester = None, None
         self._initsession()
         # proxied_session_client
         self.proxied_session_client = None
@@ -153,39 +468,59 @@ class BaseMusicClient:
     """_listccimpersonates"""
 
     def _listccimpersonates(self):
-        curl_cffi = optionalimport("curl_cffi")
-        root = Path(curl_cffi.__file__).resolve().parent
-        exts = {".py", ".so", ".pyd", ".dll", ".dylib"}
-        pat = re.compile(
-            rb"\b(?:chrome|edge|safari|firefox|tor)(?:\d+[a-z_]*|_android|_ios)?\b"
-        )
-        return sorted(
-            {
-                m.decode("utf-8", "ignore")
-                for p in root.rglob("*")
-                if p.suffix in exts
-                for m in pat.findall(p.read_bytes())
-            }
-        )
+        # computed once per process and cached on disk per curl_cffi version, see listcurlcffiimpersonates
+        return list(listcurlcffiimpersonates())
+
+    """session"""
+
+    @property
+    def session(self):
+        # requests.Session is shared by all threads (urllib3 keeps one keep-alive pool per host),
+        # curl_cffi.requests.Session is not thread-safe, so each worker thread gets its own,
+        # headers are never bound to the session since searching, resolving and downloading share it, see _requestheaders
+        if self.enable_curl_cffi:
+            session = getattr(self._thread_local, "curl_cffi_session", None)
+            if session is None:
+                curl_cffi = optionalimport("curl_cffi")
+                session = curl_cffi.requests.Session()
+                self._thread_local.curl_cffi_session = session
+        else:
+            session = self._requests_session
+            if session is None:
+                with self._session_lock:
+                    if self._requests_session is None:
+                        self._requests_session = buildrequestssession(
+                            pool_connections=self.session_pool_maxsize,
+                            pool_maxsize=self.session_pool_maxsize,
+                            persist_cookies=self.maintain_session,
+                        )
+                    session = self._requests_session
+        return session
 
     """_initsession"""
 
     def _initsession(self):
-        curl_cffi = optionalimport("curl_cffi")
-        self.session = (
-            requests.Session()
-            if not self.enable_curl_cffi
-            else curl_cffi.requests.Session()
-        )
-        self.session.headers = self.default_headers
-        self.audio_link_tester = AudioLinkTester(
-            headers=copy.deepcopy(self.default_download_headers),
-            cookies=copy.deepcopy(self.default_download_cookies),
-        )
-        self.quark_audio_link_tester = AudioLinkTester(
-            headers=copy.deepcopy(self.quark_default_download_headers),
-            cookies=copy.deepcopy(self.quark_default_download_cookies),
-        )
+        # sessions are pooled and reused, only refresh the link testers bound to the current phase
+        if self.audio_link_tester is None:
+            self.audio_link_tester = AudioLinkTester(
+                headers=self.default_download_headers,
+                cookies=self.default_download_cookies,
+            )
+        else:
+            self.audio_link_tester.reset(
+                headers=self.default_download_headers,
+                cookies=self.default_download_cookies,
+            )
+        if self.quark_audio_link_tester is None:
+            self.quark_audio_link_tester = AudioLinkTester(
+                headers=self.quark_default_download_headers,
+                cookies=self.quark_default_download_cookies,
+            )
+        else:
+            self.quark_audio_link_tester.reset(
+                headers=self.quark_default_download_headers,
+                cookies=self.quark_default_download_cookies,
+            )
 
     """_constructsearchurls"""
 
@@ -229,6 +564,243 @@ class BaseMusicClient:
     ):
         raise NotImplementedError("not be implemented")
 
+    """_searchcachescope"""
+
+    def _searchcachescope(self):
+        scope = {}
+        for name in self.search_cache_scope_attributes:
+            value = getattr(self, name, None)
+            scope[name] = sorted(value) if isinstance(value, (list, set, tuple)) else value
+        return scope
+
+    """_searchcachekey"""
+
+    def _searchcachekey(self, keyword: str, rule: dict, page: int):
+        if self.search_cache is None:
+            return None
+        payload = json.dumps(
+            [self.source, keyword, rule or {}, page, self._searchcachescope()],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    """_loadsearchpage"""
+
+    def _loadsearchpage(
+        self,
+        page_key: str,
+        song_infos: list,
+        progress: Progress = None,
+        progress_id: int = 0,
+    ):
+        if not page_key:
+            return False
+        cached_song_infos = self.search_cache.get(page_key)
+        if not cached_song_infos:
+            return False
+        for song_info in cached_song_infos:
+            song_infos.append(song_info)
+        progress.update(
+            progress_id,
+            description=f"{self.source}.search >>> search cache {page_key[:8]} (Success)",
+        )
+        return True
+
+    """_savesearchpage"""
+
+    def _savesearchpage(self, page_key: str, song_infos: list):
+        # empty pages are usually failed requests, they are not cached
+        if not page_key or not song_infos:
+            return
+        ttl = self.search_cache_cfg["ttl"]
+        if all(song_info.resolver for song_info in song_infos):
+            ttl = self.search_cache_cfg.get("metadata_ttl", ttl)
+        self.search_cache.set(page_key, list(song_infos), ttl=ttl, tag=self.source)
+
+    """_cachedsearch"""
+
+    def _cachedsearch(
+        self,
+        keyword: str = "",
+        search_url: str = "",
+        request_overrides: dict = None,
+        song_infos: list = [],
+        progress: Progress = None,
+        progress_id: int = 0,
+        page_key: str = None,
+    ):
+        if not page_key:
+            return self._search(
+                keyword, search_url, request_overrides, song_infos, progress, progress_id
+            )
+        if self._loadsearchpage(page_key, song_infos, progress, progress_id):
+            return song_infos
+        page_song_infos = StreamingSongInfoList(song_infos.append)
+        self._search(
+            keyword, search_url, request_overrides, page_song_infos, progress, progress_id
+        )
+        self._savesearchpage(page_key, page_song_infos)
+        return song_infos
+
+    """_asearch"""
+
+    async def _asearch(
+        self,
+        keyword: str = "",
+        search_url: str = "",
+        request_overrides: dict = None,
+        song_infos: list = [],
+        progress: Progress = None,
+        progress_id: int = 0,
+        executor: Executor = None,
+    ):
+        # clients without a native coroutine implementation run their blocking _search on the shared executor
+        return await asyncio.get_running_loop().run_in_executor(
+            executor,
+            functools.partial(
+                self._search,
+                keyword,
+                search_url,
+                request_overrides,
+                song_infos,
+                progress,
+                progress_id,
+            ),
+        )
+
+    """_addsearchprogress"""
+
+    def _addsearchprogress(
+        self,
+        num_search_urls: int,
+        main_process_context: Progress,
+        main_progress_id: int = None,
+        main_progress_lock: Lock = None,
+    ):
+        with main_progress_lock:
+            progress_id = main_process_context.add_task(
+                f"{self.source}.search >>> completed (0/{num_search_urls})",
+                total=num_search_urls,
+            )
+            if main_progress_id is not None:
+                cur_total = main_process_context.tasks[main_progress_id].total or 0
+                main_process_context.update(
+                    main_progress_id, total=cur_total + num_search_urls
+                )
+                main_process_context.update(
+                    main_progress_id,
+                    description=f"ALL sources >>> completed ({int(main_process_context.tasks[main_progress_id].completed)}/{cur_total + num_search_urls})",
+                )
+        return progress_id
+
+    """_advancesearchprogress"""
+
+    def _advancesearchprogress(
+        self,
+        num_search_urls: int,
+        main_process_context: Progress,
+        progress_id: int,
+        main_progress_id: int = None,
+        main_progress_lock: Lock = None,
+    ):
+        with main_progress_lock:
+            main_process_context.advance(progress_id, 1)
+            num_searched_urls = int(main_process_context.tasks[progress_id].completed)
+            main_process_context.update(
+                progress_id,
+                description=f"{self.source}.search >>> completed ({num_searched_urls}/{num_search_urls})",
+            )
+            if main_progress_id is None:
+                return
+            main_process_context.advance(main_progress_id, 1)
+            main_process_context.update(
+                main_progress_id,
+                description=f"ALL sources >>> completed ({int(main_process_context.tasks[main_progress_id].completed)}/{int(main_process_context.tasks[main_progress_id].total or 0)})",
+            )
+
+    """_assignworkdir"""
+
+    def _assignworkdir(self, song_info: SongInfo, work_dir: str):
+        song_info.work_dir = work_dir
+        episodes = song_info.episodes if isinstance(song_info.episodes, list) else []
+        for eps_info in episodes:
+            eps_info.work_dir = sanitize_filepath(
+                os.path.join(work_dir, song_info.song_name)
+            )
+            touchdir(work_dir)
+        return song_info
+
+    """_createresultsstore"""
+
+    def _createresultsstore(self, file_name: str):
+        return JSONLResultsStore(
+            file_name,
+            exclude_raw_data=self.results_store_cfg.get("exclude_raw_data", False),
+        )
+
+    """_searchresultsrecorder"""
+
+    def _searchresultsrecorder(self, work_dir: str, results_store: JSONLResultsStore):
+        identifiers, lock = set(), Lock()
+
+        # each unique search result is written to the results store as soon as a page produces it
+        def _record(song_info: SongInfo):
+            with lock:
+                if song_info.identifier in identifiers:
+                    return
+                identifiers.add(song_info.identifier)
+            self._assignworkdir(song_info, work_dir)
+            song_info.work_dir = str(song_info.work_dir)
+            results_store.append(song_info)
+
+        return _record
+
+    """_postprocesssearchresults"""
+
+    def _postprocesssearchresults(
+        self,
+        keyword: str,
+        song_infos: list[SongInfo],
+        results_store: JSONLResultsStore = None,
+    ):
+        song_infos = self._removeduplicates(song_infos=song_infos)
+        work_dir = self._constructuniqueworkdir(keyword=keyword)
+        for song_info in song_infos:
+            self._assignworkdir(song_info, work_dir)
+        # results which were not recorded while searching are written now
+        if results_store is None:
+            with self._createresultsstore("search_results.jsonl") as results_store:
+                for song_info in song_infos:
+                    song_info.work_dir = str(song_info.work_dir)
+                    results_store.append(song_info)
+        else:
+            results_store.close()
+        # logging
+        if len(song_infos) > 0:
+            work_dir = ", ".join(list(set([str(s.work_dir) for s in song_infos])))
+        else:
+            work_dir = self.work_dir
+        self.logger_handle.info(
+            f"Finished searching music files using {self.source}. Search results have been saved to {work_dir}, valid items: {len(song_infos)}.",
+            disable_print=self.disable_print,
+        )
+        return song_infos
+
+    """_createsearchprogress"""
+
+    def _createsearchprogress(self):
+        main_process_context = Progress(
+            TextColumn("{task.description}"),
+            BarColumn(bar_width=None),
+            MofNCompleteColumn(),
+            TimeRemainingColumn(),
+            refresh_per_second=10,
+        )
+        main_process_context.__enter__()
+        return main_process_context
+
     """search"""
 
     @usesearchheaderscookies
@@ -254,198 +826,776 @@ class BaseMusicClient:
             keyword=keyword, rule=rule, request_overrides=request_overrides
         )
         # multi threadings for searching music files
-        if main_process_context is None:
-            owns_progress = True
-            main_process_context = Progress(
-                TextColumn("{task.description}"),
-                BarColumn(bar_width=None),
-                MofNCompleteColumn(),
-                TimeRemainingColumn(),
-                refresh_per_second=10,
-            )
-            main_process_context.__enter__()
-        else:
-            owns_progress = False
-        if main_progress_lock is None:
-            main_progress_lock = Lock()
-        with main_progress_lock:
-            progress_id = main_process_context.add_task(
-                f"{self.source}.search >>> completed (0/{len(search_urls)})",
-                total=len(search_urls),
-            )
-            if main_progress_id is not None:
-                cur_total = main_process_context.tasks[main_progress_id].total or 0
-                main_process_context.update(
-                    main_progress_id, total=cur_total + len(search_urls)
-                )
-                main_process_context.update(
-                    main_progress_id,
-                    description=f"ALL sources >>> completed ({int(main_process_context.tasks[main_progress_id].completed)}/{cur_total + len(search_urls)})",
-                )
+        owns_progress = main_process_context is None
+        if owns_progress:
+            main_process_context = self._createsearchprogress()
+        main_progress_lock = main_progress_lock or Lock()
+        progress_id = self._addsearchprogress(
+            len(search_urls), main_process_context, main_progress_id, main_progress_lock
+        )
         song_infos, submitted_tasks = {}, []
+        results_store = self._createresultsstore("search_results.jsonl")
+        recorder = self._searchresultsrecorder(
+            self._constructuniqueworkdir(keyword=keyword), results_store
+        )
         with ThreadPoolExecutor(max_workers=num_threadings) as pool:
             for search_url_idx, search_url in enumerate(search_urls):
-                song_infos[str(search_url_idx)] = []
+                song_infos[str(search_url_idx)] = StreamingSongInfoList(recorder)
                 submitted_tasks.append(
                     pool.submit(
-                        self._search,
+                        self._cachedsearch,
                         keyword,
                         search_url,
                         request_overrides,
                         song_infos[str(search_url_idx)],
                         main_process_context,
                         progress_id,
+                        self._searchcachekey(keyword, rule, search_url_idx),
                     )
                 )
             for future in as_completed(submitted_tasks):
                 future.result()
-                with main_progress_lock:
-                    main_process_context.advance(progress_id, 1)
-                    num_searched_urls = int(
-                        main_process_context.tasks[progress_id].completed
-                    )
-                    main_process_context.update(
+                self._advancesearchprogress(
+                    len(search_urls),
+                    main_process_context,
+                    progress_id,
+                    main_progress_id,
+                    main_progress_lock,
+                )
+        song_infos = list(chain.from_iterable(song_infos.values()))
+        song_infos = self._postprocesssearchresults(keyword, song_infos, results_store)
+        if owns_progress:
+            main_process_context.__exit__(None, None, None)
+        # return
+        return song_infos
+
+    """itersearch"""
+
+    @usesearchheaderscookies
+    def itersearch(
+        self,
+        keyword: str,
+        num_threadings: int = 5,
+        request_overrides: dict = None,
+        rule: dict = None,
+        main_process_context: Progress = None,
+        main_progress_id: int = None,
+        main_progress_lock: Lock = None,
+    ):
+        # init
+        rule, request_overrides = rule or {}, request_overrides or {}
+        # logging
+        self.logger_handle.info(
+            f"Start to search music files using {self.source}.",
+            disable_print=self.disable_print,
+        )
+        # construct search urls
+        search_urls = self._constructsearchurls(
+            keyword=keyword, rule=rule, request_overrides=request_overrides
+        )
+        # every song_infos.append in _search pushes the result to the queue, a finished page pushes its future
+        owns_progress = main_process_context is None
+        if owns_progress:
+            main_process_context = self._createsearchprogress()
+        main_progress_lock = main_progress_lock or Lock()
+        progress_id = self._addsearchprogress(
+            len(search_urls), main_process_context, main_progress_id, main_progress_lock
+        )
+        results_queue = Queue()
+        pool = ThreadPoolExecutor(max_workers=num_threadings)
+        for search_url_idx, search_url in enumerate(search_urls):
+            future = pool.submit(
+                self._cachedsearch,
+                keyword,
+                search_url,
+                request_overrides,
+                StreamingSongInfoList(results_queue.put),
+                main_process_context,
+                progress_id,
+                self._searchcachekey(keyword, rule, search_url_idx),
+            )
+            future.add_done_callback(results_queue.put)
+        work_dir, identifiers, song_infos = (
+            self._constructuniqueworkdir(keyword=keyword),
+            set(),
+            [],
+        )
+        results_store = self._createresultsstore("search_results.jsonl")
+        recorder = self._searchresultsrecorder(work_dir, results_store)
+        try:
+            num_pending_pages = len(search_urls)
+            while num_pending_pages > 0:
+                song_info = results_queue.get()
+                if isinstance(song_info, Future):
+                    num_pending_pages -= 1
+                    # a failed page must not end the stream of the other pages, but it is not swallowed silently either
+                    if not song_info.cancelled() and song_info.exception() is not None:
+                        self.logger_handle.error(
+                            f"{self.source}.search >>> {keyword} (Error: {song_info.exception()})",
+                            disable_print=self.disable_print,
+                        )
+                    self._advancesearchprogress(
+                        len(search_urls),
+                        main_process_context,
                         progress_id,
-                        description=f"{self.source}.search >>> completed ({num_searched_urls}/{len(search_urls)})",
-                    )
-                    if main_progress_id is None:
-                        continue
-                    main_process_context.advance(main_progress_id, 1)
-                    main_process_context.update(
                         main_progress_id,
-                        description=f"ALL sources >>> completed ({int(main_process_context.tasks[main_progress_id].completed)}/{int(main_process_context.tasks[main_progress_id].total or 0)})",
+                        main_progress_lock,
                     )
-        song_infos = list(chain.from_iterable(song_infos.values()))
-        song_infos = self._removeduplicates(song_infos=song_infos)
-        work_dir = self._constructuniqueworkdir(keyword=keyword)
-        for song_info in song_infos:
-            song_info.work_dir = work_dir
-            episodes = (
-                song_info.episodes if isinstance(song_info.episodes, list) else []
-            )
-            for eps_info in episodes:
-                eps_info.work_dir = sanitize_filepath(
-                    os.path.join(work_dir, song_info.song_name)
-                )
-                touchdir(work_dir)
+                    continue
+                if song_info.identifier in identifiers:
+                    continue
+                identifiers.add(song_info.identifier)
+                recorder(song_info)
+                song_infos.append(song_info)
+                yield song_info
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            if owns_progress:
+                main_process_context.__exit__(None, None, None)
+            self._postprocesssearchresults(keyword, song_infos, results_store)
+
+    """asearch"""
+
+    @usesearchheaderscookies
+    async def asearch(
+        self,
+        keyword: str,
+        num_threadings: int = 5,
+        request_overrides: dict = None,
+        rule: dict = None,
+        main_process_context: Progress = None,
+        main_progress_id: int = None,
+        main_progress_lock: Lock = None,
+        executor: Executor = None,
+    ):
+        # init
+        rule, request_overrides = rule or {}, request_overrides or {}
         # logging
-        if len(song_infos) > 0:
-            work_dir_to_song_info, work_dir = (
-                defaultdict(list),
-                ", ".join(list(set([str(s.work_dir) for s in song_infos]))),
-            )
-            for s in song_infos:
-                s.work_dir = str(s.work_dir)
-                work_dir_to_song_info[s.work_dir].append(s.todict())
-            for w, items in work_dir_to_song_info.items():
-                touchdir(w)
-                self._savetopkl(items, os.path.join(w, "search_results.pkl"))
-        else:
-            work_dir = self.work_dir
         self.logger_handle.info(
-            f"Finished searching music files using {self.source}. Search results have been saved to {work_dir}, valid items: {len(song_infos)}.",
+            f"Start to search music files using {self.source}.",
             disable_print=self.disable_print,
         )
+        # construct search urls
+        search_urls = await asyncio.get_running_loop().run_in_executor(
+            executor,
+            functools.partial(
+                self._constructsearchurls,
+                keyword=keyword,
+                rule=rule,
+                request_overrides=request_overrides,
+            ),
+        )
+        # one coroutine per search url, at most num_threadings of them in flight for this client
+        owns_progress = main_process_context is None
         if owns_progress:
-            main_process_context.__exit__(None, None, None)
+            main_process_context = self._createsearchprogress()
+        main_progress_lock = main_progress_lock or Lock()
+        progress_id = self._addsearchprogress(
+            len(search_urls), main_process_context, main_progress_id, main_progress_lock
+        )
+        semaphore = asyncio.Semaphore(max(1, num_threadings))
+        results_store, cancelled = self._createresultsstore("search_results.jsonl"), Event()
+        recorder = self._searchresultsrecorder(
+            self._constructuniqueworkdir(keyword=keyword), results_store
+        )
+
+        def _record(song_info: SongInfo):
+            # the caller has given up on this client, abort the blocking _search still running on the executor
+            if cancelled.is_set():
+                raise asyncio.CancelledError
+            recorder(song_info)
+
+        async def _searchpage(search_url_idx, search_url, page_song_infos):
+            async with semaphore:
+                page_key = self._searchcachekey(keyword, rule, search_url_idx)
+                if not self._loadsearchpage(
+                    page_key, page_song_infos, main_process_context, progress_id
+                ):
+                    await self._asearch(
+                        keyword,
+                        search_url,
+                        request_overrides,
+                        page_song_infos,
+                        main_process_context,
+                        progress_id,
+                        executor=executor,
+                    )
+                    self._savesearchpage(page_key, page_song_infos)
+            self._advancesearchprogress(
+                len(search_urls),
+                main_process_context,
+                progress_id,
+                main_progress_id,
+                main_progress_lock,
+            )
+            return page_song_infos
+
+        try:
+            song_infos = await asyncio.gather(
+                *[
+                    _searchpage(search_url_idx, search_url, StreamingSongInfoList(_record))
+                    for search_url_idx, search_url in enumerate(search_urls)
+                ]
+            )
+        except BaseException:
+            # timed out or failed, results recorded so far are already flushed line by line, only the store is left to close
+            cancelled.set()
+            results_store.close()
+            raise
+        finally:
+            if owns_progress:
+                main_process_context.__exit__(None, None, None)
+        song_infos = list(chain.from_iterable(song_infos))
         # return
-        return song_infos
+        return self._postprocesssearchresults(keyword, song_infos, results_store)
 
-    """_download"""
+    """_loadresumestate"""
 
-    @usedownloadheaderscookies
-    def _download(
+    @staticmethod
+    def _loadresumestate(part_path: str, state_path: str, download_url: str = None):
+        if not (os.path.exists(part_path) and os.path.exists(state_path)):
+            return {}
+        try:
+            with open(state_path, "r", encoding="utf-8") as fp:
+                state = json.load(fp)
+        except Exception:
+            return {}
+        # a .part of another file may share the save path and even the size, only resume one fetched from the same host and path,
+        # the query is ignored since signed download urls change it every time they are refreshed
+        if download_url is not None and state.get("download_url") is not None:
+            stored, current = urlparse(str(state["download_url"])), urlparse(str(download_url))
+            if (stored.netloc.lower(), stored.path) != (current.netloc.lower(), current.path):
+                return {}
+        return state
+
+    """_streamget"""
+
+    def _streamget(self, url: str, **kwargs):
+        # get returns None once every retry failed without a response, which would otherwise surface as a context manager error
+        resp = self.get(url, stream=True, **kwargs)
+        if resp is None:
+            raise ConnectionError(
+                f"no response from {url} after {self.max_retries} attempts"
+            )
+        return resp
+
+    """_resumabledownload"""
+
+    def _resumabledownload(
         self,
         song_info: SongInfo,
         request_overrides: dict = None,
-        downloaded_song_infos: list[SongInfo] = [],
         progress: Progress = None,
         song_progress_id: int = 0,
     ):
-        request_overrides = request_overrides or {}
-        if song_info.downloaded_contents:
-            try:
-                touchdir(song_info.work_dir)
-                total_size = song_info.downloaded_contents.__sizeof__()
-                progress.update(song_progress_id, total=total_size)
-                with open(song_info.save_path, "wb") as fp:
-                    fp.write(song_info.downloaded_contents)
-                progress.advance(song_progress_id, total_size)
-                progress.update(
-                    song_progress_id,
-                    description=f"{self.source}.download >>> {song_info.song_name[:10] + '...' if len(song_info.song_name) > 13 else song_info.song_name[:13]} (Success)",
-                )
-                downloaded_song_infos.append(
-                    SongInfoUtils.fillsongtechinfo(
-                        copy.deepcopy(song_info),
-                        logger_handle=self.logger_handle,
-                        disable_print=self.disable_print,
-                    )
-                )
-            except Exception as err:
-                progress.update(
-                    song_progress_id,
-                    description=f"{self.source}.download >>> {song_info.song_name[:10] + '...' if len(song_info.song_name) > 13 else song_info.song_name[:13]} (Error: {err})",
-                )
-        else:
+        # init
+        request_overrides = copy.deepcopy(request_overrides or {})
+        headers = request_overrides.pop("headers", None) or {}
+        part_path, state_path = (
+            f"{song_info.save_path}.part",
+            f"{song_info.save_path}.part.json",
+        )
+        chunk_size, state, finished, hasher = (
+            song_info.get("chunk_size", 1024),
+            self._loadresumestate(part_path, state_path, song_info.download_url),
+            False,
+            None,
+        )
+        song_name = (
+            song_info.song_name[:10] + "..."
+            if len(song_info.song_name) > 13
+            else song_info.song_name[:13]
+        )
+        # fetch large files with several range requests at once if the server supports it
+        download_url_status = song_info.download_url_status or {}
+        if state.get("segments") or (
+            self.max_download_segments > 1
+            and download_url_status.get("range")
+            and (download_url_status.get("clen") or 0)
+            >= 2 * self.min_download_segment_size
+        ):
+            if self._segmenteddownload(
+                song_info=song_info,
+                headers=headers,
+                request_overrides=request_overrides,
+                progress=progress,
+                song_progress_id=song_progress_id,
+                state=state,
+            ):
+                return song_info
+            state = {}
+        # stream into the .part file, resuming with a range request after every interruption
+        for attempt in range(self.max_retries + 1):
+            downloaded_size = os.path.getsize(part_path) if state else 0
+            range_headers = {}
+            if downloaded_size > 0:
+                range_headers = {
+                    "Range": f"bytes={downloaded_size}-",
+                    "Accept-Encoding": "identity",
+                }
+                if state.get("etag") and not state["etag"].startswith("W/"):
+                    range_headers["If-Range"] = state["etag"]
             try:
-                touchdir(song_info.work_dir)
-                if song_info.default_download_headers:
-                    request_overrides["headers"] = song_info.default_download_headers
-                with self.get(
-                    song_info.download_url, stream=True, **request_overrides
+                with self._streamget(
+                    song_info.download_url,
+                    headers={**headers, **range_headers},
+                    **request_overrides,
                 ) as resp:
+                    # --the whole file has already been fetched before
+                    if (
+                        resp.status_code == 416
+                        and downloaded_size > 0
+                        and downloaded_size == state.get("total_size")
+                    ):
+                        finished, hasher = True, None
+                        break
                     resp.raise_for_status()
-                    total_size, chunk_size, downloaded_size = (
-                        int(resp.headers.get("content-length", 0)),
-                        song_info.get("chunk_size", 1024),
-                        0,
+                    etag, total_size = (
+                        resp.headers.get("etag"),
+                        int(resp.headers.get("content-length", 0) or 0),
+                    )
+                    # --validate the partial file against the remote one before appending to it
+                    if resp.status_code == 206 and downloaded_size > 0:
+                        content_range = resp.headers.get("content-range", "")
+                        content_range_total = content_range.rsplit("/", 1)[-1]
+                        total_size = (
+                            int(content_range_total)
+                            if content_range_total.isdigit()
+                            else downloaded_size + total_size
+                        )
+                        if (state.get("total_size") and total_size != state["total_size"]) or (
+                            state.get("etag") and etag and etag != state["etag"]
+                        ):
+                            state = {}
+                            os.remove(part_path)
+                            continue
+                        mode = "ab"
+                    else:
+                        downloaded_size, mode = 0, "wb"
+                    state = {
+                        "download_url": song_info.download_url,
+                        "etag": etag,
+                        "last_modified": resp.headers.get("last-modified"),
+                        "total_size": total_size,
+                    }
+                    with open(state_path, "w", encoding="utf-8") as fp:
+                        json.dump(state, fp)
+                    progress.update(
+                        song_progress_id,
+                        total=total_size or downloaded_size,
+                        completed=downloaded_size,
+                    )
+                    # --stream response, hashing the audio while writing it (a resumed .part file is hashed first)
+                    hasher = (
+                        hashfile(part_path) if mode == "ab" else hashlib.sha256()
                     )
-                    progress.update(song_progress_id, total=total_size)
-                    with open(song_info.save_path, "wb") as fp:
+                    with open(part_path, mode) as fp:
                         for chunk in resp.iter_content(chunk_size=chunk_size):
                             if not chunk:
                                 continue
                             fp.write(chunk)
+                            hasher.update(chunk)
                             downloaded_size = downloaded_size + len(chunk)
-                            if total_size > 0:
-                                downloading_text = "%0.2fMB/%0.2fMB" % (
-                                    downloaded_size / 1024 / 1024,
-                                    total_size / 1024 / 1024,
-                                )
-                            else:
+                            if total_size <= 0:
                                 progress.update(song_progress_id, total=downloaded_size)
-                                downloading_text = "%0.2fMB/%0.2fMB" % (
-                                    downloaded_size / 1024 / 1024,
-                                    downloaded_size / 1024 / 1024,
-                                )
+                            downloading_text = "%0.2fMB/%0.2fMB" % (
+                                downloaded_size / 1024 / 1024,
+                                (total_size or downloaded_size) / 1024 / 1024,
+                            )
                             progress.advance(song_progress_id, len(chunk))
                             progress.update(
                                 song_progress_id,
-                                description=f"{self.source}.download >>> {song_info.song_name[:10] + '...' if len(song_info.song_name) > 13 else song_info.song_name[:13]} (Downloading: {downloading_text})",
+                                description=f"{self.source}.download >>> {song_name} (Downloading: {downloading_text})",
                             )
-                    progress.update(
-                        song_progress_id,
-                        description=f"{self.source}.download >>> {song_info.song_name[:10] + '...' if len(song_info.song_name) > 13 else song_info.song_name[:13]} (Success)",
-                    )
-                    downloaded_song_infos.append(
-                        SongInfoUtils.fillsongtechinfo(
-                            copy.deepcopy(song_info),
-                            logger_handle=self.logger_handle,
-                            disable_print=self.disable_print,
-                        )
+                if total_size > 0 and downloaded_size < total_size:
+                    raise IOError(
+                        f"connection closed at {downloaded_size}/{total_size} bytes"
                     )
+                finished = True
+                break
             except Exception as err:
+                if attempt >= self.max_retries:
+                    raise
                 progress.update(
                     song_progress_id,
-                    description=f"{self.source}.download >>> {song_info.song_name[:10] + '...' if len(song_info.song_name) > 13 else song_info.song_name[:13]} (Error: {err})",
+                    description=f"{self.source}.download >>> {song_name} (Resuming: {err})",
                 )
-        return downloaded_song_infos
+        if not finished:
+            raise IOError(f"fail to download {song_info.download_url}")
+        # move the completed .part file into place
+        song_info.content_hash = (hasher or hashfile(part_path)).hexdigest()
+        os.replace(part_path, song_info.save_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return song_info
 
-    """download"""
+    """_segmenteddownload"""
+
+    def _segmenteddownload(
+        self,
+        song_info: SongInfo,
+        headers: dict = None,
+        request_overrides: dict = None,
+        progress: Progress = None,
+        song_progress_id: int = 0,
+        state: dict = None,
+    ):
+        # init
+        headers, request_overrides, state = headers or {}, request_overrides or {}, state or {}
+        part_path, state_path = (
+            f"{song_info.save_path}.part",
+            f"{song_info.save_path}.part.json",
+        )
+        song_name = (
+            song_info.song_name[:10] + "..."
+            if len(song_info.song_name) > 13
+            else song_info.song_name[:13]
+        )
+        # split the file into byte ranges, each item in segments is [start, end, claimed, written] with inclusive end,
+        # claimed is where the next fetched byte goes (and where work stealing splits), written is what is flushed to the .part file
+        if state.get("segments"):
+            total_size, segments = state["total_size"], [[start, end, written, written] for start, end, written in state["segments"]]
+        else:
+            total_size = song_info.download_url_status["clen"]
+            num_segments = max(
+                1,
+                min(
+                    self.max_download_segments,
+                    total_size // self.min_download_segment_size,
+                ),
+            )
+            segment_size = -(-total_size // num_segments)
+            segments = [
+                [start, min(start + segment_size, total_size) - 1, start, start]
+                for start in range(0, total_size, segment_size)
+            ]
+            with open(part_path, "wb") as fp:
+                fp.truncate(total_size)
+            state = {
+                "download_url": song_info.download_url,
+                "etag": None,
+                "last_modified": None,
+                "total_size": total_size,
+            }
+        lock, range_unsupported, remote_changed, last_saved_time = Lock(), Event(), Event(), [0.0]
+        downloaded_size = [sum(seg[2] - seg[0] for seg in segments)]
+        progress.update(song_progress_id, total=total_size, completed=downloaded_size[0])
+        # save the segments so that the download can be resumed after a restart, only flushed bytes count as downloaded
+        def _savestate(force: bool = False):
+            if not force and time.time() - last_saved_time[0] < 1:
+                return
+            last_saved_time[0] = time.time()
+            with open(state_path, "w", encoding="utf-8") as fp:
+                json.dump({**state, "segments": [[seg[0], seg[1], seg[3]] for seg in segments]}, fp)
+        # steal the second half of the largest unfinished segment, *i.e.*, idle connections help the slow ones
+        def _nextsegment():
+            pending = [seg for seg in segments if seg[2] <= seg[1]]
+            if not pending:
+                return None
+            seg = max(pending, key=lambda seg: seg[1] - seg[2])
+            remaining = seg[1] - seg[2] + 1
+            if remaining < 2 * self.min_download_segment_size:
+                return None
+            new_seg = [seg[2] + remaining // 2, seg[1], seg[2] + remaining // 2, seg[2] + remaining // 2]
+            seg[1] = new_seg[0] - 1
+            segments.append(new_seg)
+            return new_seg
+        # fetch one segment, resuming from its offset after every interruption
+        def _fetchsegment(seg: list):
+            for attempt in range(self.max_retries + 1):
+                # bytes claimed by a failed attempt but never written are fetched again
+                with lock:
+                    downloaded_size[0] -= seg[2] - seg[3]
+                    seg[2] = seg[3]
+                if seg[2] > seg[1] or range_unsupported.is_set() or remote_changed.is_set():
+                    return
+                range_headers = {
+                    "Range": f"bytes={seg[2]}-{seg[1]}",
+                    "Accept-Encoding": "identity",
+                }
+                try:
+                    with self._streamget(
+                        song_info.download_url,
+                        headers={**headers, **range_headers},
+                        **request_overrides,
+                    ) as resp:
+                        resp.raise_for_status()
+                        if resp.status_code != 206:
+                            range_unsupported.set()
+                            return
+                        content_range_total = resp.headers.get("content-range", "").rsplit("/", 1)[-1]
+                        etag = resp.headers.get("etag")
+                        with lock:
+                            if (content_range_total.isdigit() and int(content_range_total) != total_size) or (
+                                state.get("etag") and etag and etag != state["etag"]
+                            ):
+                                remote_changed.set()
+                                raise IOError("remote file changed during segmented download")
+                            state["etag"] = state.get("etag") or etag
+                            state["last_modified"] = state.get("last_modified") or resp.headers.get("last-modified")
+                        with open(part_path, "r+b") as fp:
+                            for chunk in resp.iter_content(chunk_size=256 * 1024):
+                                if range_unsupported.is_set() or remote_changed.is_set():
+                                    return
+                                with lock:
+                                    chunk, offset = chunk[: seg[1] + 1 - seg[2]], seg[2]
+                                    seg[2] += len(chunk)
+                                    downloaded_size[0] += len(chunk)
+                                if chunk:
+                                    fp.seek(offset)
+                                    fp.write(chunk)
+                                    fp.flush()
+                                    with lock:
+                                        seg[3] = offset + len(chunk)
+                                    progress.advance(song_progress_id, len(chunk))
+                                    progress.update(
+                                        song_progress_id,
+                                        description=f"{self.source}.download >>> {song_name} (Downloading: %0.2fMB/%0.2fMB)"
+                                        % (downloaded_size[0] / 1024 / 1024, total_size / 1024 / 1024),
+                                    )
+                                with lock:
+                                    _savestate()
+                                if seg[2] > seg[1]:
+                                    break
+                    if seg[2] > seg[1]:
+                        return
+                except Exception:
+                    if remote_changed.is_set() or attempt >= self.max_retries:
+                        raise
+        # worker keeps taking segments until the whole file is fetched
+        def _worker(seg: list):
+            while seg is not None:
+                _fetchsegment(seg)
+                if range_unsupported.is_set() or remote_changed.is_set():
+                    return
+                with lock:
+                    seg = _nextsegment()
+        # run
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_download_segments) as pool:
+                for future in [pool.submit(_worker, seg) for seg in segments if seg[2] <= seg[1]]:
+                    future.result()
+        except Exception:
+            with lock:
+                _savestate(force=True)
+            if remote_changed.is_set():
+                os.remove(part_path)
+                os.remove(state_path)
+            raise
+        # ranges are not honoured, fall back to a single stream
+        if range_unsupported.is_set():
+            for path in (part_path, state_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return None
+        if any(seg[3] <= seg[1] for seg in segments):
+            with lock:
+                _savestate(force=True)
+            raise IOError(f"fail to download {song_info.download_url}")
+        # move the completed .part file into place, segments are written out of order so the file is hashed once at the end
+        song_info.content_hash = hashfile(part_path).hexdigest()
+        os.replace(part_path, song_info.save_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return song_info
+
+    """_download"""
 
     @usedownloadheaderscookies
-    def download(
+    def _download(
+        self,
+        song_info: SongInfo,
+        request_overrides: dict = None,
+        downloaded_song_infos: list[SongInfo] = [],
+        progress: Progress = None,
+        song_progress_id: int = 0,
+    ):
+        request_overrides = request_overrides or {}
+        song_name = (
+            song_info.song_name[:10] + "..."
+            if len(song_info.song_name) > 13
+            else song_info.song_name[:13]
+        )
+        try:
+            touchdir(song_info.work_dir)
+            if song_info.downloaded_contents:
+                total_size = song_info.downloaded_contents.__sizeof__()
+                progress.update(song_progress_id, total=total_size)
+                with open(song_info.save_path, "wb") as fp:
+                    fp.write(song_info.downloaded_contents)
+                song_info.content_hash = hashlib.sha256(
+                    song_info.downloaded_contents
+                ).hexdigest()
+                progress.advance(song_progress_id, total_size)
+            else:
+                download_request_overrides = copy.deepcopy(request_overrides)
+                if song_info.default_download_headers:
+                    download_request_overrides["headers"] = song_info.default_download_headers
+                self._resumabledownload(
+                    song_info=song_info,
+                    request_overrides=download_request_overrides,
+                    progress=progress,
+                    song_progress_id=song_progress_id,
+                )
+            progress.update(
+                song_progress_id,
+                description=f"{self.source}.download >>> {song_name} (Success)",
+            )
+            downloaded_song_infos.append(
+                SongInfoUtils.fillsongtechinfo(
+                    copy.deepcopy(song_info),
+                    logger_handle=self.logger_handle,
+                    disable_print=self.disable_print,
+                )
+            )
+            return downloaded_song_infos
+        except Exception as err:
+            progress.update(
+                song_progress_id,
+                description=f"{self.source}.download >>> {song_name} (Error: {err})",
+            )
+            return downloaded_song_infos
+
+    """_hedgedparse"""
+
+    def _hedgedparse(
+        self,
+        parsers: list,
+        search_result,
+        request_overrides: dict = None,
+        default: SongInfo = None,
+    ):
+        # parsers are listed by preference, the next one is started as soon as the previous ones failed or after hedge_delay seconds,
+        # hedge_delay=None tries them strictly in sequence and hedge_delay=0 races all of them at once
+        request_overrides = request_overrides or {}
+        default = default if default is not None else SongInfo(source=self.source)
+        if self.hedge_delay is None or len(parsers) < 2:
+            for parser in parsers:
+                try:
+                    song_info = parser(search_result, request_overrides)
+                except Exception:
+                    continue
+                if song_info.with_valid_download_url:
+                    return song_info
+            return default
+        pool = self._hedgeexecutor()
+        running, num_started = {}, 0
+        try:
+            while True:
+                if num_started < len(parsers):
+                    running[pool.submit(parsers[num_started], search_result, request_overrides)] = num_started
+                    num_started += 1
+                if not running:
+                    return default
+                done, _ = wait(
+                    list(running.keys()),
+                    timeout=self.hedge_delay if num_started < len(parsers) else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                # if several parsers finished at the same time, the preferred one wins
+                for future in sorted(done, key=running.get):
+                    running.pop(future)
+                    try:
+                        song_info = future.result()
+                    except Exception:
+                        continue
+                    if song_info.with_valid_download_url:
+                        return song_info
+        finally:
+            # parsers still queued in the shared pool are cancelled, the requests of running ones are left to finish in the background
+            for future in running:
+                future.cancel()
+
+    """_hedgeexecutor"""
+
+    def _hedgeexecutor(self):
+        # one pool per client shared by all search threads, threads are only spawned when the hedged requests actually overlap
+        with self._session_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.hedge_max_workers,
+                    thread_name_prefix=f"{self.source}.hedge",
+                )
+            return self._hedge_executor
+
+    """_refreshdownloadurl"""
+
+    def _refreshdownloadurl(self, song_info: SongInfo, request_overrides: dict = None):
+        search_result = (song_info.raw_data or {}).get("search")
+        if song_info.episodes or search_result is None:
+            return None
+        for resolver in self.download_url_resolvers:
+            try:
+                refreshed_song_info: SongInfo = getattr(self, resolver)(
+                    search_result, request_overrides or {}
+                )
+            except Exception as err:
+                self.logger_handle.warning(
+                    f"{self.source}.resolve >>> {song_info.song_name} (Error: {err})",
+                    disable_print=self.disable_print,
+                )
+                continue
+            if not refreshed_song_info or not refreshed_song_info.with_valid_download_url:
+                continue
+            # resolvers may return less metadata (lyrics, covers, alternates, ...) than searching did, keep the original values
+            for name in SongInfo.FIELD_ORDER:
+                if name in ("downloaded_contents", "_save_path"):
+                    continue
+                if refreshed_song_info[name] in (None, "", "NULL") and song_info[name] not in (None, "", "NULL"):
+                    refreshed_song_info[name] = song_info[name]
+            # keep the save path, so the .part file of the failed attempt is resumed if the new url serves the same file
+            refreshed_song_info.work_dir = song_info.work_dir
+            if refreshed_song_info.ext == song_info.ext:
+                refreshed_song_info._save_path = song_info.save_path
+            else:
+                shortenpathsinsonginfos(song_infos=[refreshed_song_info])
+            return refreshed_song_info
+        return None
+
+    """refreshdownloadurls"""
+
+    @usesearchheaderscookies
+    def refreshdownloadurls(
+        self,
+        song_infos: list[SongInfo],
+        num_threadings: int = 5,
+        request_overrides: dict = None,
+    ):
+        # resolvers parse search results, so they run under the search headers / cookies like resolve, never inside _download
+        if not self.download_url_resolvers:
+            return [None] * len(song_infos)
+        with ThreadPoolExecutor(max_workers=max(1, num_threadings)) as pool:
+            return list(
+                pool.map(
+                    lambda song_info: self._refreshdownloadurl(song_info, request_overrides),
+                    song_infos,
+                )
+            )
+
+    """_resolve"""
+
+    def _resolve(self, song_info: SongInfo, request_overrides: dict = None):
+        if not song_info.resolver:
+            return song_info
+        try:
+            resolved_song_info: SongInfo = getattr(self, song_info.resolver)(
+                song_info.raw_data["search"], request_overrides or {}
+            )
+        except Exception as err:
+            self.logger_handle.warning(
+                f"{self.source}.resolve >>> {song_info.song_name} (Error: {err})",
+                disable_print=self.disable_print,
+            )
+            return song_info
+        if not resolved_song_info or not resolved_song_info.with_valid_download_url:
+            return song_info
+        resolved_song_info.work_dir = song_info.work_dir
+        return resolved_song_info
+
+    """resolve"""
+
+    @usesearchheaderscookies
+    def resolve(
         self,
         song_infos: list[SongInfo],
         num_threadings: int = 5,
@@ -453,13 +1603,30 @@ class BaseMusicClient:
     ):
         # init
         request_overrides = request_overrides or {}
-        shortenpathsinsonginfos(song_infos=song_infos)
-        # logging
-        self.logger_handle.info(
-            f"Start to download music files using {self.source}.",
-            disable_print=self.disable_print,
-        )
-        # multi threadings for downloading music files
+        if not any(song_info.resolver for song_info in song_infos):
+            return song_infos
+        # resolve download urls of the lazy song infos
+        with ThreadPoolExecutor(max_workers=num_threadings) as pool:
+            resolved_song_infos = list(
+                pool.map(
+                    lambda song_info: self._resolve(song_info, request_overrides),
+                    song_infos,
+                )
+            )
+        # drop song infos which still can not be resolved
+        for song_info in resolved_song_infos:
+            if not song_info.resolver:
+                continue
+            self.logger_handle.warning(
+                f"{self.source}.resolve >>> {song_info.song_name} (Error: no valid download url)",
+                disable_print=self.disable_print,
+            )
+        return [song_info for song_info in resolved_song_infos if not song_info.resolver]
+
+    """_createdownloadprogress"""
+
+    @staticmethod
+    def _createdownloadprogress():
         columns = [
             SpinnerColumn(),
             TextColumn("{task.description}"),
@@ -469,138 +1636,192 @@ class BaseMusicClient:
             TransferSpeedColumn(),
             TimeRemainingColumn(),
         ]
-        with Progress(*columns, refresh_per_second=20, expand=True) as progress:
-            songs_progress_id = progress.add_task(
-                f"{self.source}.download >>> completed (0/{len(song_infos)})",
-                total=len(song_infos),
-                kind="overall",
-            )
-            song_progress_ids, downloaded_song_infos, submitted_tasks = [], [], []
-            for _, song_info in enumerate(song_infos):
-                desc = f"{self.source}.download >>> {song_info.song_name[:10] + '...' if len(song_info.song_name) > 13 else song_info.song_name[:13]} (Preparing)"
-                song_progress_ids.append(
-                    progress.add_task(desc, total=None, kind="download")
+        return Progress(*columns, refresh_per_second=20, expand=True)
+
+    """_preparedownload"""
+
+    def _preparedownload(
+        self,
+        song_infos: list[SongInfo],
+        num_threadings: int = 5,
+        request_overrides: dict = None,
+    ):
+        # tracks already in the library index are skipped before their download urls are even resolved
+        song_infos = self._skipindexedsongs(song_infos)
+        song_infos = self.resolve(
+            song_infos=song_infos,
+            num_threadings=num_threadings,
+            request_overrides=request_overrides or {},
+        )
+        shortenpathsinsonginfos(song_infos=song_infos)
+        self.logger_handle.info(
+            f"Start to download music files using {self.source}.",
+            disable_print=self.disable_print,
+        )
+        return song_infos
+
+    """_skipindexedsongs"""
+
+    def _skipindexedsongs(self, song_infos: list[SongInfo]):
+        if self.library_index is None:
+            return song_infos
+        remaining_song_infos = []
+        for song_info in song_infos:
+            save_path = None if song_info.episodes else self.library_index.lookup(song_info)
+            if save_path is None:
+                remaining_song_infos.append(song_info)
+                continue
+            self.logger_handle.info(
+                f"{self.source}.download >>> {song_info.song_name} (Skipped: already downloaded to {save_path})",
+                disable_print=self.disable_print,
+            )
+        return remaining_song_infos
+
+    """_recorddownloadresult"""
+
+    def _recorddownloadresult(
+        self, song_info: SongInfo, results_store: JSONLResultsStore = None
+    ):
+        if results_store is not None:
+            results_store.append(song_info)
+        if self.library_index is not None and not song_info.episodes:
+            try:
+                self.library_index.add(song_info)
+            except Exception as err:
+                self.logger_handle.warning(
+                    f"{self.source}.download >>> {song_info.song_name} (Error while updating the library index: {err})",
+                    disable_print=self.disable_print,
                 )
-            with ThreadPoolExecutor(max_workers=num_threadings) as pool:
-                for song_progress_id, song_info in zip(song_progress_ids, song_infos):
-                    submitted_tasks.append(
-                        pool.submit(
-                            self._download,
-                            song_info,
-                            request_overrides,
-                            downloaded_song_infos,
-                            progress,
-                            song_progress_id,
-                        )
-                    )
-                for _ in as_completed(submitted_tasks):
-                    progress.advance(songs_progress_id, 1)
-                    num_downloaded_songs = int(
-                        progress.tasks[songs_progress_id].completed
-                    )
-                    progress.update(
-                        songs_progress_id,
-                        description=f"{self.source}.download >>> completed ({num_downloaded_songs}/{len(song_infos)})",
-                    )
-        # logging
+
+    """_postprocessdownloadresults"""
+
+    def _postprocessdownloadresults(
+        self,
+        downloaded_song_infos: list[SongInfo],
+        results_store: JSONLResultsStore = None,
+    ):
+        # results which were not recorded while downloading are written now
+        if results_store is None:
+            with self._createresultsstore("download_results.jsonl") as results_store:
+                for song_info in downloaded_song_infos:
+                    self._recorddownloadresult(song_info, results_store)
+        else:
+            results_store.close()
         if len(downloaded_song_infos) > 0:
-            work_dir_to_song_info, work_dir = (
-                defaultdict(list),
-                ", ".join(list(set([str(s.work_dir) for s in downloaded_song_infos]))),
-            )
-            for s in downloaded_song_infos:
-                s.work_dir = str(s.work_dir)
-                work_dir_to_song_info[s.work_dir].append(s.todict())
-            for w, items in work_dir_to_song_info.items():
-                touchdir(w)
-                self._savetopkl(items, os.path.join(w, "download_results.pkl"))
+            work_dir = ", ".join(list(set([str(s.work_dir) for s in downloaded_song_infos])))
         else:
             work_dir = self.work_dir
         self.logger_handle.info(
             f"Finished downloading music files using {self.source}. Download results have been saved to {work_dir}, valid downloads: {len(downloaded_song_infos)}.",
             disable_print=self.disable_print,
         )
-        # return
         return downloaded_song_infos
 
-    """get"""
+    """download"""
 
-    def get(self, url, **kwargs):
+    @usedownloadheaderscookies
+    def download(
+        self,
+        song_infos: list[SongInfo],
+        num_threadings: int = 5,
+        request_overrides: dict = None,
+    ):
+        scheduler = DownloadScheduler(
+            max_workers=num_threadings, max_workers_per_host=num_threadings
+        )
+        downloaded_song_infos = scheduler.run(
+            [(self, song_infos, num_threadings, request_overrides or {})]
+        )
+        return downloaded_song_infos[self.source]
+
+    """_randomproxies"""
+
+    def _randomproxies(self, method: str, url: str):
+        if not self.auto_set_proxies:
+            return {}
+        try:
+            return self.proxied_session_client.getrandomproxy()
+        except Exception as err:
+            self.logger_handle.error(
+                f"{self.source}.{method} >>> {url} (Error: {err})",
+                disable_print=self.disable_print,
+            )
+            return {}
+
+    """_request"""
+
+    def _request(self, method: str, url, **kwargs):
         if "cookies" not in kwargs:
             kwargs["cookies"] = self.default_cookies
         if "impersonate" not in kwargs and self.enable_curl_cffi:
             kwargs["impersonate"] = random.choice(self.cc_impersonates)
-        resp = None
-        for _ in range(self.max_retries):
-            if not self.maintain_session:
-                self._initsession()
-                if self.random_update_ua:
-                    self.session.headers.update({"User-Agent": UserAgent().random})
-            if self.auto_set_proxies:
-                try:
-                    self.session.proxies = self.proxied_session_client.getrandomproxy()
-                except Exception as err:
-                    self.logger_handle.error(
-                        f"{self.source}.get >>> {url} (Error: {err})",
-                        disable_print=self.disable_print,
-                    )
-                    self.session.proxies = {}
-            else:
-                self.session.proxies = {}
-            proxies = kwargs.pop("proxies", None) or self.session.proxies
+        proxies, resp = kwargs.pop("proxies", None), None
+        for attempt in range(self.max_retries):
+            session, request_kwargs = self.session, dict(kwargs)
+            # headers, user-agent and proxy rotation are applied per request so the pooled connections survive
+            if not self.maintain_session and self.enable_curl_cffi:
+                session.cookies.clear()
+            request_kwargs["headers"] = self._requestheaders(kwargs.get("headers"))
+            request_kwargs["proxies"] = proxies or self._randomproxies(method, url)
+            # a host saturated by other requests (of any client in the process) counts as a failed attempt
             try:
-                resp = self.session.get(url, proxies=proxies, **kwargs)
-                resp.raise_for_status()
-            except Exception as err:
+                ticket, attempt_resp = self.rate_limiter.acquire(url), None
+            except TimeoutError as err:
                 self.logger_handle.error(
-                    f"{self.source}.get >>> {url} (Error: {err})",
+                    f"{self.source}.{method} >>> {url} (Error: {err})",
                     disable_print=self.disable_print,
                 )
                 continue
-            return resp
-        return resp
-
-    """post"""
-
-    def post(self, url, **kwargs):
-        if "cookies" not in kwargs:
-            kwargs["cookies"] = self.default_cookies
-        if "impersonate" not in kwargs and self.enable_curl_cffi:
-            kwargs["impersonate"] = random.choice(self.cc_impersonates)
-        resp = None
-        for _ in range(self.max_retries):
-            if not self.maintain_session:
-                self._initsession()
-                if self.random_update_ua:
-                    self.session.headers.update({"User-Agent": UserAgent().random})
-            if self.auto_set_proxies:
-                try:
-                    self.session.proxies = self.proxied_session_client.getrandomproxy()
-                except Exception as err:
-                    self.logger_handle.error(
-                        f"{self.source}.post >>> {url} (Error: {err})",
-                        disable_print=self.disable_print,
-                    )
-                    self.session.proxies = {}
-            else:
-                self.session.proxies = {}
-            proxies = kwargs.pop("proxies", None) or self.session.proxies
             try:
-                resp = self.session.post(url, proxies=proxies, **kwargs)
+                attempt_resp = resp = getattr(session, method)(url, **request_kwargs)
                 resp.raise_for_status()
             except Exception as err:
+                self.rate_limiter.release(ticket, throttled=self._isthrottled(attempt_resp))
                 self.logger_handle.error(
-                    f"{self.source}.post >>> {url} (Error: {err})",
+                    f"{self.source}.{method} >>> {url} (Error: {err})",
                     disable_print=self.disable_print,
                 )
+                if attempt < self.max_retries - 1:
+                    time.sleep(self._backoff(ticket, attempt, attempt_resp))
                 continue
+            self.rate_limiter.release(ticket, throttled=False)
             return resp
         return resp
 
-    """_savetopkl"""
+    """_requestheaders"""
+
+    def _requestheaders(self, headers: dict = None):
+        # the headers of the current phase are sent with every request instead of being set on the shared session
+        request_headers = dict(self.default_headers or {})
+        if self.random_update_ua:
+            request_headers["User-Agent"] = randomuseragent()
+        request_headers.update(headers or {})
+        return request_headers
+
+    """_isthrottled"""
+
+    @staticmethod
+    def _isthrottled(resp=None):
+        # connection errors, 429 and 5xx are congestion signals, other 4xx say nothing about the load of the host
+        if resp is None:
+            return True
+        if resp.status_code == 429 or resp.status_code >= 500:
+            return True
+        return None
+
+    """_backoff"""
+
+    def _backoff(self, ticket: tuple, attempt: int, resp=None):
+        retry_after = resp.headers.get("retry-after") if resp is not None else None
+        return self.rate_limiter.backoff(ticket, attempt, retry_after)
+
+    """get"""
+
+    def get(self, url, **kwargs):
+        return self._request("get", url, **kwargs)
+
+    """post"""
+
+    def post(self, url, **kwargs):
+        return self._request("post", url, **kwargs)
 
-    def _savetopkl(self, data, file_path, auto_sanitize=True):
-        if auto_sanitize:
-            file_path = sanitize_filepath(file_path)
-        with open(file_path, "wb") as fp:
-            pickle.dump(data, fp)
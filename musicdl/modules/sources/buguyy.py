@@ -18,6 +18,7 @@ from ..utils import legalizestring, usesearchheaderscookies, resp2json, safeextr
 '''BuguyyMusicClient'''
 class BuguyyMusicClient(BaseMusicClient):
     source = 'BuguyyMusicClient'
+    download_url_resolvers = ('_parsesearchresultfromweb',)
     def __init__(self, **kwargs):
         super(BuguyyMusicClient, self).__init__(**kwargs)
         if not self.quark_parser_config.get('cookies'): self.logger_handle.warning(f'{self.source}.__init__ >>> "quark_parser_config" is not configured, so song downloads are restricted and only mp3 files can be downloaded.')
@@ -20,6 +20,7 @@ from ..utils import legalizestring, usesearchheaderscookies, seconds2hms, search
 '''LivePOOMusicClient'''
 class LivePOOMusicClient(BaseMusicClient):
     source = 'LivePOOMusicClient'
+    download_url_resolvers = ('_parsesearchresultfromweb',)
     MUSIC_QUALITY_RANK = {"DSD": 100, "DSF": 100, "DFF": 100, "WAV": 95, "AIFF": 95, "FLAC": 90, "ALAC": 90, "APE": 88, "WV": 88, "OPUS": 70, "AAC": 65, "M4A": 65, "OGG": 60, "VORBIS": 60, "MP3": 50, "WMA": 45}
     def __init__(self, **kwargs):
         super(LivePOOMusicClient, self).__init__(**kwargs)
@@ -22,6 +22,7 @@ warnings.filterwarnings('ignore')
 '''NeteaseMusicClient'''
 class NeteaseMusicClient(BaseMusicClient):
     source = 'NeteaseMusicClient'
+    download_url_resolvers = ('_parsewiththirdpartapis',)
     def __init__(self, **kwargs):
         super(NeteaseMusicClient, self).__init__(**kwargs)
         self.default_search_headers = {
@@ -150,13 +151,9 @@ class NeteaseMusicClient(BaseMusicClient):
     def _parsewiththirdpartapis(self, search_result: dict, request_overrides: dict = None):
         cookies = self.default_cookies or request_overrides.get('cookies')
         if cookies and (cookies != DEFAULT_COOKIES): return SongInfo(source=self.source, raw_data={'quality': MUSIC_QUALITIES[-1]})
-        for imp_func in [self._parsewithcggapi, self._parsewithxiaoqinapi, self._parsewithxianyuwapi, self._parsewithbugpkapi]:
-            try:
-                song_info_flac = imp_func(search_result, request_overrides)
-                if song_info_flac.with_valid_download_url: break
-            except:
-                song_info_flac = SongInfo(source=self.source, raw_data={'quality': MUSIC_QUALITIES[-1]})
-        return song_info_flac
+        return self._hedgedparse(
+            [self._parsewithcggapi, self._parsewithxiaoqinapi, self._parsewithxianyuwapi, self._parsewithbugpkapi], search_result, request_overrides, default=SongInfo(source=self.source, raw_data={'quality': MUSIC_QUALITIES[-1]}),
+        )
     '''_constructsearchurls'''
     def _constructsearchurls(self, keyword: str, rule: dict = None, request_overrides: dict = None):
         # init
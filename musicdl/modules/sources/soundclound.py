@@ -35,11 +35,11 @@ class SoundCloudMusicClient(BaseMusicClient):
     def _updateclientid(self, request_overrides: dict = None):
         if self.client_id: return
         request_overrides = request_overrides or {}
-        try: resp = self.session.get('https://soundcloud.com/', **request_overrides); resp.raise_for_status()
+        try: resp = self.session.get('https://soundcloud.com/', **{**request_overrides, 'headers': self._requestheaders(request_overrides.get('headers'))}); resp.raise_for_status()
         except: self.client_id = '9jZvetLfDs6An08euQgJ0lYlHkKdGFzV'; return
         script_urls = re.findall(r'<script[^>]+src="([^"]+)"', resp.text)
         for url in reversed(script_urls):
-            try: resp = self.session.get(url, **request_overrides); m = re.search(r'client_id\s*:\s*"([0-9a-zA-Z]{32})"', resp.text) if resp.status_code == 200 else None
+            try: resp = self.session.get(url, **{**request_overrides, 'headers': self._requestheaders(request_overrides.get('headers'))}); m = re.search(r'client_id\s*:\s*"([0-9a-zA-Z]{32})"', resp.text) if resp.status_code == 200 else None
             except Exception: continue
             if m: self.client_id = m.group(1); return
         self.client_id = '9jZvetLfDs6An08euQgJ0lYlHkKdGFzV'; return
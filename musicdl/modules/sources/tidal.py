@@ -9,26 +9,35 @@ WeChat Official Account (微信公众号):
 import os
 import re
 import copy
+import time
 import aigpy
 import base64
+import random
 import tempfile
 import json_repair
+from threading import Lock
 from xml.etree import ElementTree
+from concurrent.futures import ThreadPoolExecutor
 from .base import BaseMusicClient
 from rich.progress import Progress
 from urllib.parse import urlencode, urljoin
-from ..utils import legalizestring, resp2json, seconds2hms, touchdir, replacefile, usesearchheaderscookies, usedownloadheaderscookies, SongInfo, SongInfoUtils
+from ..utils import legalizestring, resp2json, buildrequestssession, seconds2hms, touchdir, replacefile, usesearchheaderscookies, usedownloadheaderscookies, SongInfo, SongInfoUtils
 from ..utils.tidalutils import (
     TIDALTvSession, SearchResult, StreamRespond, StreamUrl, Manifest, Period, AdaptationSet, Representation, SegmentTemplate, SegmentList, SegmentTimelineEntry, Track,
-    decryptfile, decryptsecuritytoken, pyavready, ffmpegready, remuxflacstream, setmetadata
+    CTRDecryptor, decryptsecuritytoken, pyavready, ffmpegready, remuxflacstream, setmetadata
 )
 
 
 '''TIDALMusicClient'''
 class TIDALMusicClient(BaseMusicClient):
     source = 'TIDALMusicClient'
+    download_url_resolvers = ('_parsesearchresult',)
+    # dash segments of one track fetched at the same time, also the number of pooled cdn connections
+    max_segment_workers = 8
     def __init__(self, **kwargs):
         super(TIDALMusicClient, self).__init__(**kwargs)
+        # cdn segments must not carry the TIDAL auth headers which self.get sends with every request, so they get a pool of their own
+        self.segment_session = buildrequestssession(pool_connections=self.max_segment_workers, pool_maxsize=self.max_segment_workers)
         self.tidal_session = TIDALTvSession(headers={}, cookies=self.default_cookies)
         try:
             self.tidal_session.loadfromcache()
@@ -214,6 +223,57 @@ class TIDALMusicClient(BaseMusicClient):
             count += page_size
         # return
         return search_urls
+    '''_fetchsegment'''
+    def _fetchsegment(self, url: str, request_overrides: dict = None, onchunk=None, fp=None, decryptor: CTRDecryptor = None):
+        request_overrides = {'timeout': 30, **(request_overrides or {})}
+        for attempt in range(self.max_retries + 1):
+            chunks, received, start = [], 0, fp.tell() if fp is not None else 0
+            try:
+                with self.segment_session.get(url, stream=True, **request_overrides) as resp:
+                    resp.raise_for_status()
+                    for chunk in resp.iter_content(chunk_size=65536):
+                        if fp is not None: fp.write(decryptor.decrypt(chunk) if decryptor is not None else chunk)
+                        else: chunks.append(chunk)
+                        received += len(chunk)
+                        if onchunk is not None: onchunk(len(chunk), resp)
+                return b''.join(chunks)
+            except Exception:
+                # only this segment starts over, bytes of the failed attempt are taken back from the progress bar
+                if onchunk is not None and received: onchunk(-received, None)
+                if fp is not None: fp.seek(start); fp.truncate()
+                if decryptor is not None and fp is not None: decryptor.seek(start)
+                if attempt >= self.max_retries: raise
+                time.sleep(min(2 ** attempt, 8) * random.uniform(0.5, 1.0))
+    '''_downloadsegments'''
+    def _downloadsegments(self, urls: list, part_path: str, request_overrides: dict = None, progress: Progress = None, song_progress_id: int = 0, song_name: str = '', decryptor: CTRDecryptor = None):
+        song_name = song_name[:10] + "..." if len(song_name) > 13 else song_name[:13]
+        lock, stats = Lock(), {'received': 0, 'total': 0}
+        # progress advances per chunk, the total is the content-length of a single file or extrapolated from the finished segments
+        def _onchunk(num_bytes: int, resp):
+            with lock:
+                stats['received'] += num_bytes
+                if len(urls) == 1 and resp is not None and not stats['total']: stats['total'] = int(resp.headers.get('content-length') or 0)
+                received, total = stats['received'], max(stats['total'], stats['received'], 1)
+            progress.update(song_progress_id, total=total, advance=num_bytes, description=f"{self.source}.download >>> {song_name} (Downloading: %0.2fMB/%0.2fMB)" % (received / 1024 / 1024, total / 1024 / 1024))
+        with open(part_path, 'wb') as fp:
+            if len(urls) == 1: return self._fetchsegment(urls[0], request_overrides, _onchunk, fp, decryptor)
+            # segments are fetched concurrently but written strictly in order, at most a window of them is held in memory,
+            # writing in order is also what lets the ctr decryption run on the fly instead of as a second pass over the file
+            num_workers = max(1, min(self.max_segment_workers, len(urls)))
+            pool, futures, num_submitted, written = ThreadPoolExecutor(max_workers=num_workers), {}, 0, 0
+            try:
+                for idx in range(len(urls)):
+                    while num_submitted < len(urls) and num_submitted < idx + num_workers * 4:
+                        futures[num_submitted] = pool.submit(self._fetchsegment, urls[num_submitted], request_overrides, _onchunk)
+                        num_submitted += 1
+                    content = futures.pop(idx).result()
+                    fp.write(decryptor.decrypt(content) if decryptor is not None else content)
+                    written += len(content)
+                    with lock: stats['total'] = int(written / (idx + 1) * len(urls)) if idx + 1 < len(urls) else written
+                # the last chunk may have been reported before the final segment was written, so the exact total is set here
+                progress.update(song_progress_id, total=written)
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
     '''_download'''
     @usedownloadheaderscookies
     def _download(self, song_info: SongInfo, request_overrides: dict = None, downloaded_song_infos: list = [], progress: Progress = None, song_progress_id: int = 0):
@@ -231,30 +291,15 @@ class TIDALMusicClient(BaseMusicClient):
                 remux_required = "flac" in (stream_url.codec or "").lower()
             if remux_required and (not ffmpegready() and not pyavready()):
                 final_ext, remux_required = download_ext, False
-            chunk_size = 1048576
             progress.update(song_progress_id, total=1)
             progress.update(song_progress_id, description=f"{self.source}.download >>> {song_info.song_name} (Downloading)")
-            # download music file
-            with tempfile.TemporaryDirectory(prefix="musicdl-TIDALMusicClient-track-") as tmpdir:
-                download_part = os.path.join(
-                    tmpdir, f"download{download_ext}.part" if download_ext else "download.part"
-                )
-                tool = aigpy.download.DownloadTool(download_part, stream_url.urls)
-                tool.setUserProgress(None)
-                tool.setPartSize(chunk_size)
-                check, err = tool.start(showProgress=False)
-                assert check
-                decrypted_target = os.path.join(
+            # download and decrypt music file, the temporary directory sits in work_dir so that moving the result into place is a rename
+            with tempfile.TemporaryDirectory(prefix="musicdl-TIDALMusicClient-track-", dir=song_info.work_dir) as tmpdir:
+                decrypted_path = os.path.join(
                     tmpdir, f"decrypted{download_ext}" if download_ext else "decrypted"
                 )
-                if aigpy.string.isNull(stream_url.encryptionKey):
-                    replacefile(download_part, decrypted_target)
-                    decrypted_path = decrypted_target
-                else:
-                    key, nonce = decryptsecuritytoken(stream_url.encryptionKey)
-                    decryptfile(download_part, decrypted_target, key, nonce)
-                    os.remove(download_part)
-                    decrypted_path = decrypted_target
+                decryptor = None if aigpy.string.isNull(stream_url.encryptionKey) else CTRDecryptor(*decryptsecuritytoken(stream_url.encryptionKey))
+                self._downloadsegments(stream_url.urls, decrypted_path, request_overrides=request_overrides, progress=progress, song_progress_id=song_progress_id, song_name=song_info.song_name, decryptor=decryptor)
                 if remux_required:
                     remux_target = os.path.join(tmpdir, "remux.flac")
                     processed_path, backend_used = remuxflacstream(decrypted_path, remux_target)
@@ -268,8 +313,7 @@ class TIDALMusicClient(BaseMusicClient):
                 replacefile(decrypted_path, save_path)
                 setmetadata(track=song_info.raw_data['search'], filepath=save_path, stream=stream_url)
             # update progress
-            progress.update(song_progress_id, total=os.path.getsize(save_path))
-            progress.advance(song_progress_id, os.path.getsize(save_path))
+            progress.update(song_progress_id, total=os.path.getsize(save_path), completed=os.path.getsize(save_path))
             progress.update(song_progress_id, description=f"{self.source}.download >>> {song_info.song_name} (Success)")
             downloaded_song_info = copy.deepcopy(song_info)
             downloaded_song_info.ext = final_ext
@@ -279,6 +323,56 @@ class TIDALMusicClient(BaseMusicClient):
             progress.update(song_progress_id, description=f"{self.source}.download >>> {song_info.song_name} (Error: {err})")
         # return
         return downloaded_song_infos
+    '''_parsesearchresult'''
+    def _parsesearchresult(self, search_result: Track, request_overrides: dict = None):
+        # init
+        request_overrides = request_overrides or {}
+        # --download results
+        song_info = SongInfo(source=self.source)
+        qualities = [('hi_res_lossless', 'HI_RES_LOSSLESS'), ('high_lossless', 'LOSSLESS'), ('low_320k', 'HIGH'), ('low_96k', 'LOW')]
+        for quality in qualities:
+            params = {"playbackmode": "STREAM", "audioquality": quality[1], "assetpresentation": "FULL",}
+            try:
+                resp = self._saferequestget(f'https://tidal.com/v1/tracks/{search_result.id}/playbackinfo', params=params, **request_overrides)
+                resp.raise_for_status()
+                download_result = aigpy.model.dictToModel(resp2json(resp), StreamRespond())
+            except:
+                continue
+            if ("vnd.tidal.bt" not in download_result.manifestMimeType) and ("dash+xml" not in download_result.manifestMimeType): continue
+            try: download_url = self._parsemanifest(stream_resp=download_result)
+            except: continue
+            if not download_url: continue
+            song_info = SongInfo(
+                source=self.source, download_url=download_url, download_url_status=self.audio_link_tester.test(download_url.urls[0], request_overrides),
+                ext=self._guessextension(stream_url=download_url), duration=seconds2hms(search_result.duration),
+                raw_data={'search': search_result, 'download': download_result}, file_size='NULL',
+                song_name=legalizestring(search_result.title, replace_null_string='NULL'), 
+                singers=legalizestring(', '.join([singer.name for singer in search_result.artists]), replace_null_string='NULL'), 
+                album=legalizestring(search_result.album.title, replace_null_string='NULL'),
+                identifier=search_result.id,
+            )
+            if song_info.with_valid_download_url: break
+        if not song_info.with_valid_download_url: return song_info
+        # --lyric results
+        params = {'countryCode': self.tidal_session.storage.country_code, 'include': 'lyrics'}
+        try:
+            resp = self._saferequestget(f'https://openapi.tidal.com/v2/tracks/{search_result.id}', params=params, **request_overrides)
+            resp.raise_for_status()
+            lyric_result = resp2json(resp)
+            lyric = lyric_result.get('included', [{}])[0].get('attributes', {}).get('lrcText', 'NULL')
+        except:
+            lyric_result, lyric = {}, 'NULL'
+        song_info.raw_data['lyric'] = lyric_result
+        song_info.lyric = lyric
+        # return
+        return song_info
+    '''_buildlazysonginfo'''
+    def _buildlazysonginfo(self, search_result: Track):
+        return SongInfo(
+            source=self.source, duration_s=search_result.duration, duration=seconds2hms(search_result.duration), raw_data={'search': search_result, 'download': {}}, file_size='NULL',
+            song_name=legalizestring(search_result.title, replace_null_string='NULL'), singers=legalizestring(', '.join([singer.name for singer in search_result.artists]), replace_null_string='NULL'), 
+            album=legalizestring(search_result.album.title, replace_null_string='NULL'), identifier=search_result.id, resolver='_parsesearchresult',
+        )
     '''_search'''
     @usesearchheaderscookies
     def _search(self, keyword: str = '', search_url: str = '', request_overrides: dict = None, song_infos: list = [], progress: Progress = None, progress_id: int = 0):
@@ -292,43 +386,9 @@ class TIDALMusicClient(BaseMusicClient):
             search_results: list[Track] = aigpy.model.dictToModel(resp2json(resp=resp), SearchResult()).tracks.items
             for search_result in search_results:
                 if search_result.id is None: continue
-                song_info = SongInfo(source=self.source)
-                # --download results
-                qualities = [('hi_res_lossless', 'HI_RES_LOSSLESS'), ('high_lossless', 'LOSSLESS'), ('low_320k', 'HIGH'), ('low_96k', 'LOW')]
-                for quality in qualities:
-                    params = {"playbackmode": "STREAM", "audioquality": quality[1], "assetpresentation": "FULL",}
-                    try:
-                        resp = self._saferequestget(f'https://tidal.com/v1/tracks/{search_result.id}/playbackinfo', params=params, **request_overrides)
-                        resp.raise_for_status()
-                        download_result = aigpy.model.dictToModel(resp2json(resp), StreamRespond())
-                    except:
-                        continue
-                    if ("vnd.tidal.bt" not in download_result.manifestMimeType) and ("dash+xml" not in download_result.manifestMimeType): continue
-                    try: download_url = self._parsemanifest(stream_resp=download_result)
-                    except: continue
-                    if not download_url: continue
-                    song_info = SongInfo(
-                        source=self.source, download_url=download_url, download_url_status=self.audio_link_tester.test(download_url.urls[0], request_overrides),
-                        ext=self._guessextension(stream_url=download_url), duration=seconds2hms(search_result.duration),
-                        raw_data={'search': search_result, 'download': download_result}, file_size='NULL',
-                        song_name=legalizestring(search_result.title, replace_null_string='NULL'), 
-                        singers=legalizestring(', '.join([singer.name for singer in search_result.artists]), replace_null_string='NULL'), 
-                        album=legalizestring(search_result.album.title, replace_null_string='NULL'),
-                        identifier=search_result.id,
-                    )
-                    if song_info.with_valid_download_url: break
-                if not song_info.with_valid_download_url: continue
-                # --lyric results
-                params = {'countryCode': self.tidal_session.storage.country_code, 'include': 'lyrics'}
-                try:
-                    resp = self._saferequestget(f'https://openapi.tidal.com/v2/tracks/{search_result.id}', params=params, **request_overrides)
-                    resp.raise_for_status()
-                    lyric_result = resp2json(resp)
-                    lyric = lyric_result.get('included', [{}])[0].get('attributes', {}).get('lrcText', 'NULL')
-                except:
-                    lyric_result, lyric = {}, 'NULL'
-                song_info.raw_data['lyric'] = lyric_result
-                song_info.lyric = lyric
+                if self.lazy_resolve: song_info = self._buildlazysonginfo(search_result=search_result)
+                else: song_info = self._parsesearchresult(search_result=search_result, request_overrides=request_overrides)
+                if not song_info.with_valid_download_url and not song_info.resolver: continue
                 # --append to song_infos
                 song_infos.append(song_info)
                 # --judgement for search_size
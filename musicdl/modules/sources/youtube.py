@@ -19,6 +19,7 @@ from ..utils import legalizestring, resp2json, usesearchheaderscookies, byte2mb,
 '''YouTubeMusicClient'''
 class YouTubeMusicClient(BaseMusicClient):
     source = 'YouTubeMusicClient'
+    download_url_resolvers = ('_parsvidewithmp3youtube', '_parsewithacethinker', '_parsewithclipto', '_parsewithofficialapi')
     def __init__(self, **kwargs):
         super(YouTubeMusicClient, self).__init__(**kwargs)
         self.default_search_headers = {"user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36"}
@@ -1,15 +1,22 @@
 '''initialize'''
 from .data import SongInfo
+from .cache import TTLCache, SQLiteCache
+from .clock import ServerClock
+from .resultsstore import JSONLResultsStore
+from .libraryindex import LibraryIndex
+from .merger import SearchResultsMerger
 from .ip import RandomIPGenerator
 from .quarkparser import QuarkParser
 from .lanzouyparser import LanZouYParser
 from .songinfoutils import SongInfoUtils
 from .modulebuilder import BaseModuleBuilder
-from .importutils import optionalimport, optionalimportfrom
+from .ratelimiter import TokenBucket, AIMDLimiter, HostRateLimiter
+from .importutils import optionalimport, optionalimportfrom, lazyregistry
 from .logger import LoggerHandle, colorize, printtable, printfullline, smarttrunctable, cursorpickintable
 from .lyric import WhisperLRC, SodaTimedLyricsParser, extractdurationsecondsfromlrc, kuwolyricslisttolrc, cleanlrc
 from .misc import (
     AudioLinkTester, legalizestring, touchdir, seconds2hms, byte2mb, cachecookies, resp2json, isvalidresp, safeextractfromdict, replacefile,
     usedownloadheaderscookies, useparseheaderscookies, usesearchheaderscookies, cookies2dict, cookies2string, estimatedurationwithfilesizebr,
-    estimatedurationwithfilelink, searchdictbykey, shortenpathsinsonginfos
+    estimatedurationwithfilelink, RangedHTTPFile, searchdictbykey, shortenpathsinsonginfos, buildrequestssession, listcurlcffiimpersonates, randomuseragent, musicdlcachedir, hashfile,
+    normalizesongtext
 )
\ No newline at end of file
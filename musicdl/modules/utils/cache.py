@@ -0,0 +1,82 @@
+'''
+Function:
+    Implementation of caches
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import os
+import time
+import pickle
+import sqlite3
+from threading import Lock
+from collections import OrderedDict
+
+
+'''TTLCache'''
+class TTLCache():
+    def __init__(self, maxsize: int = 2048, ttl: float = 300):
+        self.maxsize, self.ttl = maxsize, ttl
+        self.data, self.lock = OrderedDict(), Lock()
+    '''get'''
+    def get(self, key, default=None):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None: return default
+            if item[0] < time.monotonic(): self.data.pop(key, None); return default
+            self.data.move_to_end(key)
+            return item[1]
+    '''set'''
+    def set(self, key, value, ttl: float = None):
+        with self.lock:
+            self.data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize: self.data.popitem(last=False)
+        return value
+    '''pop'''
+    def pop(self, key, default=None):
+        with self.lock:
+            item = self.data.pop(key, None)
+        return default if item is None else item[1]
+    '''clear'''
+    def clear(self):
+        with self.lock: self.data.clear()
+    '''len'''
+    def __len__(self):
+        with self.lock: return len(self.data)
+
+
+'''SQLiteCache'''
+class SQLiteCache():
+    def __init__(self, db_path: str, table: str = 'cache'):
+        self.db_path, self.table, self.lock = db_path, table, Lock()
+        if os.path.dirname(db_path): os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, tag TEXT, created_at REAL, expires_at REAL, value BLOB)')
+    '''get'''
+    def get(self, key: str, default=None):
+        with self.lock:
+            row = self.conn.execute(f'SELECT expires_at, value FROM {self.table} WHERE key = ?', (key,)).fetchone()
+        if row is None or row[0] < time.time(): return default
+        try: return pickle.loads(row[1])
+        except Exception: return default
+    '''set'''
+    def set(self, key: str, value, ttl: float, tag: str = None):
+        now, blob = time.time(), pickle.dumps(value)
+        with self.lock, self.conn:
+            self.conn.execute(f'INSERT OR REPLACE INTO {self.table} (key, tag, created_at, expires_at, value) VALUES (?, ?, ?, ?, ?)', (key, tag, now, now + ttl, blob))
+        return value
+    '''purge'''
+    def purge(self, tag: str = None, expired_only: bool = True):
+        conditions, params = [], []
+        if expired_only: conditions.append('expires_at < ?'); params.append(time.time())
+        if tag is not None: conditions.append('tag = ?'); params.append(tag)
+        with self.lock, self.conn:
+            cursor = self.conn.execute(f'DELETE FROM {self.table}' + (f' WHERE {" AND ".join(conditions)}' if conditions else ''), params)
+        return cursor.rowcount
+    '''close'''
+    def close(self):
+        with self.lock: self.conn.close()
@@ -0,0 +1,45 @@
+'''
+Function:
+    Implementation of ServerClock, a local estimate of a remote server's clock
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import time
+from threading import Lock, Thread
+
+
+'''ServerClock'''
+class ServerClock():
+    def __init__(self, fetchservertime, refresh_interval: float = 600, retry_interval: float = 30):
+        # fetchservertime is a callable returning the server time in milliseconds
+        self.fetchservertime, self.refresh_interval, self.retry_interval = fetchservertime, refresh_interval, retry_interval
+        self.offset_ms, self.next_sync_at, self.refreshing = None, 0.0, False
+        self.lock, self.sync_lock = Lock(), Lock()
+    '''sync'''
+    def sync(self):
+        try:
+            start = time.time()
+            server_ms = float(self.fetchservertime())
+            end = time.time()
+        except Exception:
+            with self.lock: self.next_sync_at, self.refreshing = time.monotonic() + self.retry_interval, False
+            return None
+        # ntp style, the server time is assumed to be sampled halfway through the round trip
+        with self.lock: self.offset_ms, self.next_sync_at, self.refreshing = server_ms - (start + end) * 500, time.monotonic() + self.refresh_interval, False
+        return self.offset_ms
+    '''now'''
+    def now(self) -> int:
+        if self.offset_ms is None:
+            # the first sync blocks, concurrent callers wait for it instead of sending their own requests
+            with self.sync_lock:
+                if self.offset_ms is None and time.monotonic() >= self.next_sync_at: self.sync()
+        elif time.monotonic() >= self.next_sync_at:
+            # later refreshes run in the background, callers keep using the previous offset meanwhile
+            with self.lock:
+                start_refresh = not self.refreshing and time.monotonic() >= self.next_sync_at
+                if start_refresh: self.refreshing = True
+            if start_refresh: Thread(target=self.sync, daemon=True).start()
+        # local clock if the server could not be reached yet
+        return int(time.time() * 1000 + (self.offset_ms or 0))
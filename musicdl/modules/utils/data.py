@@ -8,14 +8,19 @@ WeChat Official Account (微信公众号):
 '''
 from __future__ import annotations
 import os
+import sys
 from .misc import sanitize_filepath
-from typing import Any, Dict, Optional
-from dataclasses import dataclass, field, fields
+from typing import Any, ClassVar, Dict, FrozenSet, Optional, Tuple
+from dataclasses import MISSING, dataclass, field, fields
 
 
 '''SongInfo'''
-@dataclass
+# dataclass only takes slots from Python 3.10 on, older interpreters keep the per-instance __dict__
+@dataclass(**({'slots': True} if sys.version_info >= (3, 10) else {}))
 class SongInfo:
+    # field metadata computed once after the class is created, search results can hold ~100k SongInfo objects which are indexed by key in loops
+    FIELD_NAMES: ClassVar[FrozenSet[str]] = frozenset()
+    FIELD_ORDER: ClassVar[Tuple[str, ...]] = ()
     # raw data replied by requested APIs
     raw_data: Dict[str, Any] = field(default_factory=dict)
     # from which music client
@@ -46,6 +51,12 @@ class SongInfo:
     default_download_headers: Dict[str, Any] = field(default_factory=dict)
     downloaded_contents: Optional[Any] = None
     chunk_size: Optional[int] = 1024 * 1024
+    # sha256 of the downloaded audio, computed while writing, used to find identical files downloaded from different sources
+    content_hash: Optional[str] = None
+    # lazy resolving, name of the music client method which turns raw_data['search'] into a downloadable SongInfo
+    resolver: Optional[str] = None
+    # equivalent songs from other sources (best first), filled when search results are merged, used as download fallbacks
+    alternates: Optional[list[SongInfo]] = None
     @property
     def with_valid_download_url(self) -> bool:
         if self.episodes: return all([eps.with_valid_download_url for eps in self.episodes])
@@ -70,44 +81,60 @@ class SongInfo:
     identifier: Optional[str] = None
     '''fieldnames'''
     @classmethod
-    def fieldnames(cls) -> set[str]:
-        return {f.name for f in fields(cls)}
+    def fieldnames(cls) -> FrozenSet[str]:
+        return cls.FIELD_NAMES
     '''fromdict'''
     @classmethod
     def fromdict(cls, data: Dict[str, Any]) -> "SongInfo":
-        field_names = cls.fieldnames()
+        field_names = cls.FIELD_NAMES
         filtered = {k: v for k, v in data.items() if k in field_names}
-        if "episodes" in filtered and filtered["episodes"] and isinstance(filtered["episodes"], list):
-            episodes = [cls.fromdict(e) if isinstance(e, dict) else e for e in filtered["episodes"]]
-            filtered["episodes"] = episodes
+        for key in ("episodes", "alternates"):
+            if key in filtered and filtered[key] and isinstance(filtered[key], list):
+                filtered[key] = [cls.fromdict(e) if isinstance(e, dict) else e for e in filtered[key]]
         return cls(**filtered)
     '''todict'''
     def todict(self) -> Dict[str, Any]:
-        converted_dict = {f.name: getattr(self, f.name) for f in fields(self)}
+        converted_dict = {name: getattr(self, name) for name in self.FIELD_ORDER}
         if self.episodes and isinstance(self.episodes, list): converted_dict['episodes'] = [e.todict() for e in self.episodes]
+        if self.alternates and isinstance(self.alternates, list): converted_dict['alternates'] = [e.todict() for e in self.alternates]
         return converted_dict
     '''update'''
     def update(self, data: Dict[str, Any] = None, **kwargs: Any) -> "SongInfo":
         if data is None: data = {}
         merged: Dict[str, Any] = {**data, **kwargs}
-        field_names = self.fieldnames()
+        field_names = self.FIELD_NAMES
         for k, v in merged.items():
             if k in field_names: setattr(self, k, v)
         return self
     '''getitem'''
     def __getitem__(self, key: str) -> Any:
-        field_names = self.fieldnames()
-        if key not in field_names: raise KeyError(key)
+        if key not in self.FIELD_NAMES: raise KeyError(key)
         return getattr(self, key)
     '''setitem'''
     def __setitem__(self, key: str, value: Any) -> None:
-        field_names = self.fieldnames()
-        if key not in field_names: raise KeyError(key)
+        if key not in self.FIELD_NAMES: raise KeyError(key)
         setattr(self, key, value)
     '''contains'''
     def __contains__(self, key: object) -> bool:
-        return isinstance(key, str) and key in self.fieldnames()
+        return isinstance(key, str) and key in self.FIELD_NAMES
     '''get'''
     def get(self, key: str, default: Any = None) -> Any:
-        if key in self.fieldnames(): return getattr(self, key)
-        return default
\ No newline at end of file
+        if key in self.FIELD_NAMES: return getattr(self, key)
+        return default
+    '''getstate'''
+    def __getstate__(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELD_ORDER}
+    '''setstate'''
+    def __setstate__(self, state: Any) -> None:
+        # state is a plain field dict, which is also what pickles written before SongInfo had __slots__ contain
+        if isinstance(state, tuple): state = {**(state[0] or {}), **(state[1] or {})}
+        for f in fields(self):
+            if f.name in state: value = state[f.name]
+            elif f.default_factory is not MISSING: value = f.default_factory()
+            else: value = f.default
+            setattr(self, f.name, value)
+
+
+'''SongInfo field metadata'''
+SongInfo.FIELD_ORDER = tuple(f.name for f in fields(SongInfo))
+SongInfo.FIELD_NAMES = frozenset(SongInfo.FIELD_ORDER)
\ No newline at end of file
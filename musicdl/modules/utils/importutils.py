@@ -35,4 +35,14 @@ def optionalimportfrom(module: str, attr: str, show_warning: bool = False):
         if (key not in missing) and show_warning: warnings.warn(f"Optional import failed: from {module} import {attr}", ImportWarning, stacklevel=2)
         missing.add(key)
         optionalimportfrom._missing = missing
-        return None
\ No newline at end of file
+        return None
+
+
+'''lazyregistry'''
+def lazyregistry(package: str, modules: dict):
+    # builds the module level __getattr__ of a package, each name in modules is imported from its submodule on first access,
+    # *e.g.*, __getattr__ = lazyregistry(__name__, {'LizhiMusicClient': '.lizhi'}), so importing one client does not import its siblings
+    def __getattr__(name):
+        if name in modules: return getattr(importlib.import_module(modules[name], package), name)
+        raise AttributeError(f'module {package!r} has no attribute {name!r}')
+    return __getattr__
@@ -0,0 +1,78 @@
+'''
+Function:
+    Implementation of LibraryIndex, a persistent index of downloaded tracks
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import os
+import time
+import sqlite3
+from threading import Lock
+from .data import SongInfo
+from .misc import normalizesongtext
+
+
+'''LibraryIndex'''
+class LibraryIndex():
+    def __init__(self, db_path: str, duration_tolerance: float = 2, match_metadata: bool = True):
+        self.db_path, self.duration_tolerance, self.match_metadata, self.lock = db_path, duration_tolerance, match_metadata, Lock()
+        if os.path.dirname(db_path): os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self.lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS tracks (source TEXT, identifier TEXT, artist_key TEXT, title_key TEXT, duration_s REAL, '
+                'save_path TEXT, file_size_bytes INTEGER, downloaded_at REAL, PRIMARY KEY (source, identifier))'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS tracks_metadata ON tracks (artist_key, title_key)')
+    '''metadatakeys'''
+    @staticmethod
+    def metadatakeys(song_info: SongInfo):
+        duration_s = song_info.duration_s if isinstance(song_info.duration_s, (int, float)) and song_info.duration_s > 0 else None
+        return normalizesongtext(song_info.singers), normalizesongtext(song_info.song_name), duration_s
+    '''lookup'''
+    def lookup(self, song_info: SongInfo):
+        candidates = []
+        with self.lock:
+            if song_info.source and song_info.identifier is not None:
+                candidates.extend(self.conn.execute('SELECT save_path FROM tracks WHERE source = ? AND identifier = ?', (song_info.source, str(song_info.identifier))).fetchall())
+            artist_key, title_key, duration_s = self.metadatakeys(song_info)
+            # metadata matches need artist, title and a known duration on both sides, otherwise different versions of a song could be skipped
+            if self.match_metadata and artist_key and title_key and duration_s is not None:
+                candidates.extend(self.conn.execute(
+                    'SELECT save_path FROM tracks WHERE artist_key = ? AND title_key = ? AND duration_s BETWEEN ? AND ?',
+                    (artist_key, title_key, duration_s - self.duration_tolerance, duration_s + self.duration_tolerance),
+                ).fetchall())
+        stale_paths = []
+        for (save_path,) in candidates:
+            if save_path and os.path.isfile(save_path): return save_path
+            stale_paths.append(save_path)
+        # files deleted or moved by the user are forgotten, so they are downloaded again
+        if stale_paths:
+            with self.lock, self.conn: self.conn.executemany('DELETE FROM tracks WHERE save_path = ?', [(p,) for p in stale_paths])
+        return None
+    '''add'''
+    def add(self, song_info: SongInfo):
+        save_path = os.path.abspath(song_info.save_path)
+        if not os.path.isfile(save_path): return False
+        artist_key, title_key, duration_s = self.metadatakeys(song_info)
+        identifier = str(song_info.identifier) if song_info.identifier is not None else save_path
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO tracks (source, identifier, artist_key, title_key, duration_s, save_path, file_size_bytes, downloaded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (song_info.source, identifier, artist_key, title_key, duration_s, save_path, os.path.getsize(save_path), time.time()),
+            )
+        return True
+    '''remove'''
+    def remove(self, save_path: str):
+        with self.lock, self.conn:
+            cursor = self.conn.execute('DELETE FROM tracks WHERE save_path = ?', (os.path.abspath(save_path),))
+        return cursor.rowcount
+    '''len'''
+    def __len__(self):
+        with self.lock: return self.conn.execute('SELECT COUNT(*) FROM tracks').fetchone()[0]
+    '''close'''
+    def close(self):
+        with self.lock: self.conn.close()
@@ -9,14 +9,18 @@ WeChat Official Account (微信公众号):
 from __future__ import annotations
 import re
 import os
+import queue
+import atexit
 import shutil
 import logging
+import threading
 import collections.abc
 import tabulate as tabmod
 from wcwidth import wcswidth
 from tabulate import tabulate
 from prettytable import PrettyTable
 from platformdirs import user_log_dir
+from logging.handlers import QueueHandler, QueueListener
 from prompt_toolkit.layout import Layout
 from prompt_toolkit.application import Application
 from prompt_toolkit.key_binding import KeyBindings
@@ -41,17 +45,91 @@ COLORS = {
 }
 
 
+'''BoundedQueueHandler'''
+class BoundedQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue, put_timeout: float = 1.0):
+        super(BoundedQueueHandler, self).__init__(log_queue)
+        self.put_timeout, self.dropped = put_timeout, 0
+    '''prepare'''
+    def prepare(self, record):
+        # LoggerHandle only logs pre-rendered strings, such records need no formatting or copying before they cross threads
+        if isinstance(record.msg, str) and not record.args and not record.exc_info and not record.stack_info: return record
+        return super(BoundedQueueHandler, self).prepare(record)
+    '''enqueue'''
+    def enqueue(self, record):
+        # callers only wait when the writer thread is far behind, and records are dropped rather than stalling workers indefinitely
+        try: self.queue.put(record, timeout=self.put_timeout)
+        except queue.Full: self.dropped += 1
+
+
+'''LogFileFormatter'''
+class LogFileFormatter(logging.Formatter):
+    def __init__(self, fmt: str, quiet_name: str):
+        super(LogFileFormatter, self).__init__(fmt)
+        self.quiet_name = quiet_name
+    '''format'''
+    def format(self, record):
+        if record.name == self.quiet_name: return record.getMessage()
+        return super(LogFileFormatter, self).format(record)
+
+
 '''LoggerHandle'''
 class LoggerHandle():
     appname, appauthor = 'musicdl', 'zcjin'
+    log_format, max_queue_size = "%(asctime)s - %(name)s - %(levelname)s - %(message)s", 10000
+    queue_handlers, listeners, stream_handler, lock = {}, {}, None, threading.Lock()
     def __init__(self):
         # set up log dir
         log_dir = user_log_dir(appname=self.appname, appauthor=self.appauthor)
         os.makedirs(log_dir, exist_ok=True)
         log_file_path = os.path.join(log_dir, "musicdl.log")
         self.log_file_path = log_file_path
-        # config logging
-        logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", handlers=[logging.FileHandler(log_file_path, encoding="utf-8"), logging.StreamHandler()])
+        # file writes happen on a single listener thread, so search / download workers never block on disk
+        queue_handler = LoggerHandle.getqueuehandler(log_file_path)
+        self.quiet_logger = logging.getLogger(f'{self.appname}.quiet')
+        self.quiet_logger.setLevel(logging.DEBUG)
+        self.quiet_logger.propagate = False
+        if queue_handler not in self.quiet_logger.handlers: self.quiet_logger.addHandler(queue_handler)
+        # config logging, handlers go on the package logger itself since basicConfig is a no-op once the root logger has handlers
+        package_logger = logging.getLogger(self.appname)
+        package_logger.setLevel(logging.INFO)
+        package_logger.propagate = False
+        with LoggerHandle.lock:
+            if queue_handler not in package_logger.handlers: package_logger.addHandler(queue_handler)
+            if LoggerHandle.stream_handler is None:
+                LoggerHandle.stream_handler = logging.StreamHandler()
+                LoggerHandle.stream_handler.setFormatter(logging.Formatter(self.log_format))
+            if LoggerHandle.stream_handler not in package_logger.handlers: package_logger.addHandler(LoggerHandle.stream_handler)
+    '''getqueuehandler'''
+    @staticmethod
+    def getqueuehandler(log_file_path: str):
+        with LoggerHandle.lock:
+            if log_file_path in LoggerHandle.queue_handlers: return LoggerHandle.queue_handlers[log_file_path]
+            # one file handler per log path, messages logged with disable_print=True are written verbatim, everything else with the usual format
+            file_handler = logging.FileHandler(log_file_path, encoding="utf-8")
+            file_handler.setFormatter(LogFileFormatter(LoggerHandle.log_format, quiet_name=f'{LoggerHandle.appname}.quiet'))
+            log_queue = queue.Queue(maxsize=LoggerHandle.max_queue_size)
+            listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+            listener.start()
+            if not LoggerHandle.listeners: atexit.register(LoggerHandle.shutdown)
+            LoggerHandle.listeners[log_file_path] = listener
+            # the records are formatted by the file handler on the listener thread
+            LoggerHandle.queue_handlers[log_file_path] = BoundedQueueHandler(log_queue)
+            LoggerHandle.queue_handlers[log_file_path].setFormatter(logging.Formatter("%(message)s"))
+            return LoggerHandle.queue_handlers[log_file_path]
+    '''shutdown'''
+    @staticmethod
+    def shutdown():
+        # drain the queues and flush the log files, registered with atexit so nothing buffered is lost on exit
+        with LoggerHandle.lock:
+            listeners, queue_handlers = list(LoggerHandle.listeners.values()), list(LoggerHandle.queue_handlers.values())
+            LoggerHandle.listeners.clear(); LoggerHandle.queue_handlers.clear()
+            # detach the queue handlers too, a LoggerHandle built afterwards must not feed a queue nobody drains
+            for name in (LoggerHandle.appname, f'{LoggerHandle.appname}.quiet'):
+                for queue_handler in queue_handlers: logging.getLogger(name).removeHandler(queue_handler)
+        for listener in listeners:
+            listener.stop()
+            for handler in listener.handlers: handler.flush(); handler.close()
     '''log'''
     @staticmethod
     def log(level, message):
@@ -62,24 +140,21 @@ class LoggerHandle():
     def debug(self, message, disable_print=False):
         message = str(message)
         if disable_print:
-            fp = open(self.log_file_path, 'a', encoding='utf-8')
-            fp.write(message + '\n')
+            self.quiet_logger.debug(message)
         else:
             LoggerHandle.log(logging.DEBUG, message)
     '''info'''
     def info(self, message, disable_print=False):
         message = str(message)
         if disable_print:
-            fp = open(self.log_file_path, 'a', encoding='utf-8')
-            fp.write(message + '\n')
+            self.quiet_logger.info(message)
         else:
             LoggerHandle.log(logging.INFO, message)
     '''warning'''
     def warning(self, message, disable_print=False):
         message = str(message)
         if disable_print:
-            fp = open(self.log_file_path, 'a', encoding='utf-8')
-            fp.write(message + '\n')
+            self.quiet_logger.warning(message)
         else:
             if '\033[31m' not in message: message = colorize(message, 'red')
             LoggerHandle.log(logging.WARNING, message)
@@ -87,8 +162,7 @@ class LoggerHandle():
     def error(self, message, disable_print=False):
         message = str(message)
         if disable_print:
-            fp = open(self.log_file_path, 'a', encoding='utf-8')
-            fp.write(message + '\n')
+            self.quiet_logger.error(message)
         else:
             if '\033[31m' not in message: message = colorize(message, 'red')
             LoggerHandle.log(logging.ERROR, message)
@@ -0,0 +1,95 @@
+'''
+Function:
+    Implementation of SearchResultsMerger, which clusters search results across sources and ranks each cluster
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import re
+import copy
+from .data import SongInfo
+from collections import defaultdict
+from .misc import normalizesongtext
+
+
+'''SearchResultsMerger'''
+class SearchResultsMerger():
+    LOSSLESS_EXTS = {'flac', 'wav', 'alac', 'ape', 'wv', 'tta', 'dsf', 'dff'}
+    FILE_SIZE_UNITS = {'b': 1, 'kb': 1024, 'k': 1024, 'mb': 1024 ** 2, 'm': 1024 ** 2, 'gb': 1024 ** 3, 'g': 1024 ** 3}
+    def __init__(self, duration_tolerance: float = 3):
+        self.duration_tolerance = duration_tolerance
+    '''durationof'''
+    @staticmethod
+    def durationof(song_info: SongInfo):
+        if isinstance(song_info.duration_s, (int, float)) and song_info.duration_s > 0: return float(song_info.duration_s)
+        # most clients only fill the "HH:MM:SS" / "MM:SS" string during searching
+        parts = str(song_info.duration or '').strip().split(':')
+        if len(parts) < 2 or not all(p.isdigit() for p in parts): return None
+        seconds = 0
+        for p in parts: seconds = seconds * 60 + int(p)
+        return float(seconds) if seconds > 0 else None
+    '''filesizeof'''
+    @staticmethod
+    def filesizeof(song_info: SongInfo):
+        if isinstance(song_info.file_size_bytes, (int, float)) and song_info.file_size_bytes > 0: return int(song_info.file_size_bytes)
+        matched = re.match(r'^\s*([\d.]+)\s*([a-zA-Z]*)\s*$', str(song_info.file_size or ''))
+        if not matched: return 0
+        try: return int(float(matched.group(1)) * SearchResultsMerger.FILE_SIZE_UNITS.get(matched.group(2).lower() or 'b', 0))
+        except ValueError: return 0
+    '''rankkey'''
+    @staticmethod
+    def rankkey(song_info: SongInfo):
+        # link health first (verified > not resolved yet > broken), then lossless, bitrate and file size
+        if song_info.with_valid_download_url: health = 2
+        elif song_info.resolver: health = 1
+        else: health = 0
+        ext = str(song_info.ext or '').lower().removeprefix('.')
+        bitrate = song_info.bitrate if isinstance(song_info.bitrate, (int, float)) else 0
+        return (health, int(ext in SearchResultsMerger.LOSSLESS_EXTS), bitrate, SearchResultsMerger.filesizeof(song_info))
+    '''cluster'''
+    def cluster(self, song_infos: list[SongInfo]) -> list[list[SongInfo]]:
+        groups = defaultdict(list)
+        for song_info in song_infos:
+            # albums / podcasts (episodes) and songs without a title are never merged
+            title_key = normalizesongtext(song_info.song_name)
+            if song_info.episodes or not title_key: groups[('', id(song_info))].append(song_info); continue
+            groups[(normalizesongtext(song_info.singers), title_key)].append(song_info)
+        clusters = []
+        for group in groups.values():
+            # songs with the same artist and title are split into versions whose durations differ by more than duration_tolerance
+            known = sorted([s for s in group if self.durationof(s) is not None], key=self.durationof)
+            unknown = [s for s in group if self.durationof(s) is None]
+            group_clusters = []
+            for song_info in known:
+                if group_clusters and self.durationof(song_info) - self.durationof(group_clusters[-1][0]) <= self.duration_tolerance: group_clusters[-1].append(song_info)
+                else: group_clusters.append([song_info])
+            # a song without duration most likely is the most common version
+            if unknown:
+                if group_clusters: max(group_clusters, key=len).extend(unknown)
+                else: group_clusters.append(unknown)
+            clusters.extend(group_clusters)
+        # clusters keep the order in which their first song was found
+        order = {id(s): idx for idx, s in enumerate(song_infos)}
+        return sorted(clusters, key=lambda c: min(order[id(s)] for s in c))
+    '''merge'''
+    def merge(self, search_results: dict | list) -> list[SongInfo]:
+        song_infos = list(search_results) if isinstance(search_results, list) else [s for items in search_results.values() for s in items]
+        merged_song_infos = []
+        for cluster in self.cluster(song_infos):
+            ranked = sorted(cluster, key=self.rankkey, reverse=True)
+            # the best pick is a shallow copy so the original search results are left untouched
+            best = copy.copy(ranked[0])
+            best.alternates = ranked[1:] or None
+            merged_song_infos.append(best)
+        return merged_song_infos
+    '''alternatesof'''
+    def alternatesof(self, song_info: SongInfo, candidates: list[SongInfo]) -> list[SongInfo]:
+        key, seen_keys, unique_candidates = (song_info.source, str(song_info.identifier)), set(), []
+        for candidate in candidates:
+            candidate_key = (candidate.source, str(candidate.identifier))
+            if candidate_key == key or candidate_key in seen_keys: continue
+            seen_keys.add(candidate_key); unique_candidates.append(candidate)
+        for cluster in self.cluster([song_info] + unique_candidates):
+            if any(s is song_info for s in cluster): return sorted([s for s in cluster if s is not song_info], key=self.rankkey, reverse=True)
+        return []
@@ -14,16 +14,27 @@ import errno
 import pickle
 import shutil
 import bleach
+import json
+import random
 import hashlib
+import inspect
 import requests
 import functools
+import contextlib
+import threading
 import json_repair
 import unicodedata
-from io import BytesIO
 from pathlib import Path
 from bs4 import BeautifulSoup
+from http.cookiejar import DefaultCookiePolicy
+from .cache import TTLCache
 from .importutils import optionalimport
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 from mutagen import File as MutagenFile
+from mutagen.mp3 import MPEGInfo
+from mutagen.flac import StreamInfo as FLACStreamInfo
 from pathvalidate import sanitize_filepath, sanitize_filename
 
 
@@ -39,20 +50,148 @@ def estimatedurationwithfilesizebr(file_size_bytes: int, br_kbps: float, return_
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
+'''RangedHTTPFile'''
+class RangedHTTPFile():
+    def __init__(self, url: str, headers: dict = None, request_overrides: dict = None, block_size: int = 16 * 1024, timeout: float = 10):
+        self.url, self.headers, self.request_overrides, self.block_size, self.timeout = url, headers or {}, request_overrides or {}, block_size, timeout
+        self.name = urlsplit(url).path.rsplit('/', 1)[-1]
+        self.session, self.blocks, self.position, self.size, self.bytes_fetched = requests.Session(), {}, 0, None, 0
+        # the first block also tells the file size (Content-Range) and whether the server honours range requests at all
+        self.fetch(0, 0)
+    '''fetch'''
+    def fetch(self, first_block: int, last_block: int):
+        start, end = first_block * self.block_size, (last_block + 1) * self.block_size - 1
+        resp = self.session.get(self.url, headers={**self.headers, 'Range': f'bytes={start}-{end}', 'Accept-Encoding': 'identity'}, timeout=self.timeout, **self.request_overrides)
+        if resp.status_code == 416: self.size = start if self.size is None else self.size; return
+        resp.raise_for_status()
+        data = resp.content; self.bytes_fetched += len(data)
+        # range requests ignored, the whole file has been fetched anyway
+        if resp.status_code != 206: start, self.size = 0, len(data)
+        elif self.size is None:
+            total = resp.headers.get('content-range', '').rsplit('/', 1)[-1]
+            self.size = int(total) if total.isdigit() else start + len(data)
+        for offset in range(0, len(data), self.block_size): self.blocks[(start + offset) // self.block_size] = data[offset: offset + self.block_size]
+    '''read'''
+    def read(self, size: int = -1) -> bytes:
+        end = self.size if (size is None or size < 0) else min(self.size, self.position + size)
+        if end <= self.position: return b''
+        first_block, last_block = self.position // self.block_size, (end - 1) // self.block_size
+        missing = [idx for idx in range(first_block, last_block + 1) if idx not in self.blocks]
+        # one request for all missing blocks, e.g., a whole moov atom or the tail of the file
+        if missing: self.fetch(missing[0], missing[-1])
+        data = b''.join(self.blocks.get(idx, b'') for idx in range(first_block, last_block + 1))
+        data = data[self.position - first_block * self.block_size: end - first_block * self.block_size]
+        self.position += len(data)
+        return data
+    '''seek'''
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self.position = max(0, {0: 0, 1: self.position, 2: self.size}[whence] + offset)
+        return self.position
+    '''tell'''
+    def tell(self) -> int:
+        return self.position
+    '''readable'''
+    def readable(self): return True
+    '''seekable'''
+    def seekable(self): return True
+    '''close'''
+    def close(self):
+        self.session.close()
+    '''enter'''
+    def __enter__(self):
+        return self
+    '''exit'''
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
 '''estimatedurationwithfilelink'''
 def estimatedurationwithfilelink(filelink: str = '', headers: dict = None, request_overrides: dict = None):
     headers, request_overrides = headers or {}, request_overrides or {}
     try:
-        resp = requests.get(filelink, headers=headers, timeout=10, **request_overrides)
-        resp.raise_for_status()
-        f = BytesIO(resp.content)
-        audio = MutagenFile(f)
-        length = getattr(audio.info, "length", 0)
+        # only the bytes the parsers read (ID3 header / Xing / FLAC STREAMINFO / moov, ...) are fetched, lazily with range requests
+        with RangedHTTPFile(filelink, headers=headers, request_overrides=request_overrides) as fp:
+            head = fp.read(42); fp.seek(0)
+            # embedded covers (ID3 APIC / FLAC PICTURE) can be hundreds of KB, so mp3 and flac skip tag parsing and read the stream info only
+            if head.startswith(b'fLaC') and (head[4] & 0x7F) == 0: return int(FLACStreamInfo(head[8:42]).length)
+            if head.startswith(b'ID3') or (len(head) > 1 and head[0] == 0xFF and (head[1] & 0xE0) == 0xE0):
+                try: return int(MPEGInfo(fp).length)
+                except Exception: fp.seek(0)
+            length = getattr(MutagenFile(fp).info, "length", 0)
         return int(length)
     except:
         return 0
 
 
+'''buildrequestssession'''
+def buildrequestssession(pool_connections: int = 32, pool_maxsize: int = 32, persist_cookies: bool = True):
+    session = requests.Session()
+    for prefix in ('http://', 'https://'): session.mount(prefix, HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize))
+    # per-request cookies and redirect cookies still work, only the session-level cookie jar refuses to keep server cookies
+    if not persist_cookies: session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+'''hashfile'''
+def hashfile(file_path: str, algorithm: str = 'sha256', chunk_size: int = 1024 * 1024, hasher=None):
+    hasher = hasher or hashlib.new(algorithm)
+    with open(file_path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b''): hasher.update(chunk)
+    return hasher
+
+
+'''normalizesongtext'''
+def normalizesongtext(text: str) -> str:
+    # case, width, punctuation and separators are ignored, e.g., "Jay Chou / 周杰伦" and "jay chou, 周杰伦" share a key
+    return re.sub(r'[\W_]+', '', unicodedata.normalize('NFKC', str(text or '')).casefold())
+
+
+'''musicdlcachedir'''
+def musicdlcachedir():
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'musicdl')
+
+
+'''listcurlcffiimpersonates'''
+@functools.lru_cache(maxsize=None)
+def listcurlcffiimpersonates(cache_path: str = None):
+    curl_cffi = optionalimport('curl_cffi')
+    root, cache_path = Path(curl_cffi.__file__).resolve().parent, cache_path or os.path.join(musicdlcachedir(), 'curl_cffi_impersonates.json')
+    cache_key = f'{getattr(curl_cffi, "__version__", "")}@{root}'
+    # scanning the installed package takes about a second, so the result is kept per process (lru_cache) and on disk per curl_cffi version
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as fp: impersonates = json.load(fp).get(cache_key)
+        if impersonates: return tuple(impersonates)
+    except (OSError, ValueError, AttributeError):
+        pass
+    exts, pat = {'.py', '.so', '.pyd', '.dll', '.dylib'}, re.compile(rb"\b(?:chrome|edge|safari|firefox|tor)(?:\d+[a-z_]*|_android|_ios)?\b")
+    impersonates = tuple(sorted({m.decode('utf-8', 'ignore') for p in root.rglob('*') if p.suffix in exts for m in pat.findall(p.read_bytes())}))
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fp: json.dump({cache_key: list(impersonates)}, fp)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return impersonates
+
+
+'''loaduseragents'''
+@functools.lru_cache(maxsize=1)
+def loaduseragents():
+    from fake_useragent import UserAgent
+    user_agent = UserAgent()
+    # UserAgent().random re-reads / re-filters the bundled dataset on every call, so the filtered pool is materialized once per process
+    try: pool = tuple(item['useragent'] for item in user_agent._filter_useragents())
+    except Exception: pool = ()
+    return user_agent, pool
+
+
+'''randomuseragent'''
+def randomuseragent():
+    user_agent, pool = loaduseragents()
+    return random.choice(pool) if pool else user_agent.random
+
+
 '''cookies2dict'''
 def cookies2dict(cookies: str | dict = None):
     if not cookies: cookies = {}
@@ -208,40 +347,51 @@ def cachecookies(client_name: str = '', cache_cookie_path: str = '', client_cook
         pickle.dump(cookies, fp)
 
 
+'''switchheaderscookies'''
+def switchheaderscookies(client, phase: str):
+    client.default_headers = getattr(client, f'default_{phase}_headers')
+    if hasattr(client, f'default_{phase}_cookies'): client.default_cookies = getattr(client, f'default_{phase}_cookies')
+    if hasattr(client, f'enable_{phase}_curl_cffi'): client.enable_curl_cffi = getattr(client, f'enable_{phase}_curl_cffi')
+    if hasattr(client, '_initsession'): client._initsession()
+
+
+'''useheaderscookies'''
+def useheaderscookies(phase: str):
+    def decorator(func):
+        # coroutines and generators run long after they are called, so the phase is applied once their bodies actually run
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(self, *args, **kwargs):
+                switchheaderscookies(self, phase)
+                return await func(self, *args, **kwargs)
+        elif inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def wrapper(self, *args, **kwargs):
+                switchheaderscookies(self, phase)
+                with contextlib.closing(func(self, *args, **kwargs)) as generator:
+                    for item in generator:
+                        yield item
+                        # the consumer may have run another phase of the same client before pulling the next item
+                        switchheaderscookies(self, phase)
+        else:
+            @functools.wraps(func)
+            def wrapper(self, *args, **kwargs):
+                switchheaderscookies(self, phase)
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 '''usedownloadheaderscookies'''
-def usedownloadheaderscookies(func):
-    @functools.wraps(func)
-    def wrapper(self, *args, **kwargs):
-        self.default_headers = self.default_download_headers
-        if hasattr(self, 'default_download_cookies'): self.default_cookies = self.default_download_cookies
-        if hasattr(self, 'enable_download_curl_cffi'): self.enable_curl_cffi = self.enable_download_curl_cffi
-        if hasattr(self, '_initsession'): self._initsession()
-        return func(self, *args, **kwargs)
-    return wrapper
+usedownloadheaderscookies = useheaderscookies('download')
 
 
 '''useparseheaderscookies'''
-def useparseheaderscookies(func):
-    @functools.wraps(func)
-    def wrapper(self, *args, **kwargs):
-        self.default_headers = self.default_parse_headers
-        if hasattr(self, 'default_parse_cookies'): self.default_cookies = self.default_parse_cookies
-        if hasattr(self, 'enable_parse_curl_cffi'): self.enable_curl_cffi = self.enable_parse_curl_cffi
-        if hasattr(self, '_initsession'): self._initsession()
-        return func(self, *args, **kwargs)
-    return wrapper
+useparseheaderscookies = useheaderscookies('parse')
 
 
 '''usesearchheaderscookies'''
-def usesearchheaderscookies(func):
-    @functools.wraps(func)
-    def wrapper(self, *args, **kwargs):
-        self.default_headers = self.default_search_headers
-        if hasattr(self, 'default_search_cookies'): self.default_cookies = self.default_search_cookies
-        if hasattr(self, 'enable_search_curl_cffi'): self.enable_curl_cffi = self.enable_search_curl_cffi
-        if hasattr(self, '_initsession'): self._initsession()
-        return func(self, *args, **kwargs)
-    return wrapper
+usesearchheaderscookies = useheaderscookies('search')
 
 
 '''searchdictbykey'''
@@ -269,12 +419,45 @@ class AudioLinkTester(object):
         "audio/mpeg": "mp3", "audio/mp3": "mp3", "audio/mp4": "m4a", "audio/x-m4a": "m4a", "audio/aac": "aac", "audio/wav": "wav", "video/mp4": "mp4",
         "audio/x-wav": "wav", "audio/flac": "flac", "audio/x-flac": "flac", "audio/ogg": "ogg", "audio/opus": "opus", "audio/x-aac": "ogg",
     }
-    def __init__(self, timeout=(5, 15), headers: dict = None, cookies: dict = None):
-        self.session = requests.Session()
+    CACHE = TTLCache(maxsize=4096, ttl=300)
+    def __init__(self, timeout=(5, 15), headers: dict = None, cookies: dict = None, session: requests.Session = None, cache: TTLCache = None, cache_ttl: float = 300, negative_cache_ttl: float = 30):
+        self.session = session if session is not None else buildrequestssession(persist_cookies=False)
         self.timeout = timeout
-        self.headers = {'Accept': '*/*', 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36'}
-        self.headers.update(headers or {})
-        self.cookies = cookies or {}
+        self.cache = cache if cache is not None else AudioLinkTester.CACHE
+        self.cache_ttl, self.negative_cache_ttl = cache_ttl, negative_cache_ttl
+        self.reset(headers=headers, cookies=cookies)
+    '''reset'''
+    def reset(self, headers: dict = None, cookies: dict = None):
+        default_headers = {'Accept': '*/*', 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36'}
+        default_headers.update(headers or {})
+        self.headers, self.cookies = default_headers, dict(cookies or {})
+        return self
+    '''normalizeurl'''
+    @staticmethod
+    def normalizeurl(url: str):
+        parsed = urlsplit(str(url).strip())
+        scheme, netloc = parsed.scheme.lower(), parsed.netloc.lower()
+        if (scheme, parsed.port) in {('http', 80), ('https', 443)}: netloc = netloc.rsplit(':', 1)[0]
+        query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+        return urlunsplit((scheme, netloc, parsed.path or '/', query, ''))
+    '''_snapshot'''
+    def _snapshot(self, method: str, url: str, request_overrides: dict):
+        # one HEAD / GET per (url, request settings) within the ttl, test() and probe() derive their outputs from the same snapshot
+        key = (method, self.normalizeurl(url), hashlib.md5(json.dumps(request_overrides, sort_keys=True, default=str).encode('utf-8')).hexdigest())
+        snapshot = self.cache.get(key)
+        if snapshot is not None: return snapshot
+        try:
+            if method == 'HEAD':
+                resp, head_bytes = self.session.head(url, allow_redirects=True, **request_overrides), b""
+            else:
+                resp, head_bytes = self.session.get(url, stream=True, allow_redirects=True, **request_overrides), b""
+                if resp.status_code in (200, 206):
+                    for b in resp.iter_content(chunk_size=16): head_bytes = b; break
+            resp.close()
+            snapshot = dict(status=resp.status_code, headers=CaseInsensitiveDict(resp.headers), final_url=str(resp.url), head_bytes=head_bytes, error=None)
+        except Exception as err:
+            snapshot = dict(status=0, headers=CaseInsensitiveDict(), final_url=None, head_bytes=b"", error=err)
+        return self.cache.set(key, snapshot, ttl=self.cache_ttl if 200 <= snapshot['status'] < 300 else self.negative_cache_ttl)
     '''isaudioct'''
     @staticmethod
     def isaudioct(ct: str):
@@ -288,77 +471,62 @@ class AudioLinkTester(object):
             if b.startswith(sig): return fmt
         if len(b) >= 2 and b[0] == 0xFF and (b[1] & 0xF0) == 0xF0: return "aac/adts"
         return None
-    '''probe'''
-    def probe(self, url: str, request_overrides: dict = None):
-        request_overrides, naive_guess_ext = request_overrides or {}, url.split('?')[0].split('.')[-1]
+    '''_setdefaultrequestoverrides'''
+    def _setdefaultrequestoverrides(self, request_overrides: dict):
         if 'headers' not in request_overrides: request_overrides['headers'] = self.headers
         if 'timeout' not in request_overrides: request_overrides['timeout'] = self.timeout
         if 'cookies' not in request_overrides: request_overrides['cookies'] = self.cookies
-        outputs = dict(file_size='NULL', ctype='NULL', ext='NULL', download_url=url, final_url='NULL')
+        return request_overrides
+    '''_probeoutputs'''
+    def _probeoutputs(self, url: str, snapshot: dict, naive_guess_ext: str):
+        if snapshot['error'] is not None or not (200 <= snapshot['status'] < 400): return dict(file_size='NULL', ctype='NULL', ext='NULL', download_url=url, final_url='NULL')
+        resp_headers, final_url = snapshot['headers'], snapshot['final_url']
+        file_size, ctype = byte2mb(resp_headers.get('content-length')), resp_headers.get('content-type')
+        if ctype == 'image/jpg; charset=UTF-8' or ctype == 'image/jpg': ctype = 'audio/mpeg'
+        if ctype == 'text/plain' and naive_guess_ext == 'm4s': ctype = 'audio/mp4'
+        ext = self.CTYPE_TO_EXT.get(ctype, 'NULL')
+        return dict(file_size=file_size, ctype=ctype, ext=ext, download_url=url, final_url=final_url)
+    '''probe'''
+    def probe(self, url: str, request_overrides: dict = None):
+        request_overrides, naive_guess_ext = self._setdefaultrequestoverrides(request_overrides or {}), url.split('?')[0].split('.')[-1]
         # HEAD probe
-        try:
-            resp = self.session.head(url, allow_redirects=True, **request_overrides)
-            resp.raise_for_status()
-            resp_headers, final_url = resp.headers, resp.url
-            resp.close()
-            file_size, ctype = byte2mb(resp_headers.get('content-length')), resp_headers.get('content-type')
-            if ctype == 'image/jpg; charset=UTF-8' or ctype == 'image/jpg': ctype = 'audio/mpeg'
-            if ctype == 'text/plain' and naive_guess_ext == 'm4s': ctype = 'audio/mp4'
-            ext = self.CTYPE_TO_EXT.get(ctype, 'NULL')
-            outputs = dict(file_size=file_size, ctype=ctype, ext=ext, download_url=url, final_url=final_url)
-        except:
-            outputs = dict(file_size='NULL', ctype='NULL', ext='NULL', download_url=url, final_url='NULL')
+        outputs = self._probeoutputs(url, self._snapshot('HEAD', url, request_overrides), naive_guess_ext)
         if outputs['file_size'] and outputs['file_size'] not in ('NULL',): return outputs
         # GETSTREAM probe
-        try:
-            resp = self.session.get(url, allow_redirects=True, stream=True, **request_overrides)
-            resp.raise_for_status()
-            resp_headers, final_url = resp.headers, resp.url
-            resp.close()
-            file_size, ctype = byte2mb(resp_headers.get('content-length')), resp_headers.get('content-type')
-            if ctype == 'image/jpg; charset=UTF-8' or ctype == 'image/jpg': ctype = 'audio/mpeg'
-            if ctype == 'text/plain' and naive_guess_ext == 'm4s': ctype = 'audio/mp4'
-            ext = self.CTYPE_TO_EXT.get(ctype, 'NULL')
-            outputs = dict(file_size=file_size, ctype=ctype, ext=ext, download_url=url, final_url=final_url)
-        except:
-            outputs = dict(file_size='NULL', ctype='NULL', ext='NULL', download_url=url, final_url='NULL')
-        return outputs
+        return self._probeoutputs(url, self._snapshot('GET', url, request_overrides), naive_guess_ext)
     '''test'''
     def test(self, url: str, request_overrides: dict = None):
-        request_overrides, naive_guess_ext = request_overrides or {}, url.split('?')[0].split('.')[-1]
-        if 'headers' not in request_overrides: request_overrides['headers'] = self.headers
-        if 'timeout' not in request_overrides: request_overrides['timeout'] = self.timeout
-        if 'cookies' not in request_overrides: request_overrides['cookies'] = self.cookies
+        request_overrides, naive_guess_ext = self._setdefaultrequestoverrides(request_overrides or {}), url.split('?')[0].split('.')[-1]
         outputs = dict(ok=False, status=0, method="", final_url=None, ctype=None, clen=None, range=None, fmt=None, reason="")
         # HEAD test
-        try:
-            resp = self.session.head(url, allow_redirects=True, **request_overrides)
-            clen = resp.headers.get("Content-Length")
+        snapshot = self._snapshot('HEAD', url, request_overrides)
+        if snapshot['error'] is not None:
+            outputs["reason"] = f"HEAD error: {snapshot['error']}"
+        else:
+            clen = snapshot['headers'].get("Content-Length")
             clen = int(clen) if clen and clen.isdigit() else None
-            outputs.update(dict(status=resp.status_code, method="HEAD", final_url=str(resp.url), ctype=resp.headers.get("Content-Type"), clen=clen, range=(resp.headers.get("Accept-Ranges") or "").lower() == "bytes"))
+            outputs.update(dict(status=snapshot['status'], method="HEAD", final_url=snapshot['final_url'], ctype=snapshot['headers'].get("Content-Type"), clen=clen, range=(snapshot['headers'].get("Accept-Ranges") or "").lower() == "bytes"))
             if outputs["ctype"] == 'text/plain' and naive_guess_ext == 'm4s': outputs["ctype"] = 'audio/mp4'
-            if 200 <= resp.status_code < 300 and ((self.isaudioct(outputs["ctype"]) or (naive_guess_ext in ('m4s',))) and (outputs["clen"] or outputs["range"])):
+            if 200 <= snapshot['status'] < 300 and ((self.isaudioct(outputs["ctype"]) or (naive_guess_ext in ('m4s',))) and (outputs["clen"] or outputs["range"])):
                 outputs.update(dict(ok=True, reason="HEAD success"))
                 return outputs
-        except Exception as err:
-            outputs["reason"] = f"HEAD error: {err}"
         # RANGEGET test
-        try:
-            resp = self.session.get(url, stream=True, allow_redirects=True, **request_overrides)
-            outputs.update(dict(status=resp.status_code, method="RANGEGET", final_url=str(resp.url)))
-            if resp.status_code not in (200, 206): outputs["reason"] = f"RANGEGET error: response status {resp.status_code}"; return outputs
-            chunk = b""
-            for b in resp.iter_content(chunk_size=16): chunk = b; break
-            resp.close()
-            outputs["ctype"] = outputs["ctype"] or resp.headers.get("Content-Type")
-            if outputs["ctype"] == 'text/plain' and naive_guess_ext == 'm4s': outputs["ctype"] = 'audio/mp4'
-            outputs["range"] = outputs["range"] or (resp.status_code == 206) or (resp.headers.get("Content-Range") is not None)
-            clen = resp.headers.get("Content-Length") or (resp.headers.get("Content-Range") or "").split("/")[-1]
-            if clen and clen.isdigit(): outputs["clen"] = int(clen)
-            outputs["fmt"] = self.sniffmagic(chunk)
-            if self.isaudioct(outputs["ctype"]) or outputs["fmt"] or (naive_guess_ext in ('m4s',)): outputs.update(dict(ok=True, reason="RANGEGET success"))
-            else: outputs.update(dict(ok=False, reason="RANGEGET error: Not audio-like (CT/magic)"))
-        except Exception as err:
-            outputs["reason"] = f"RANGEGET error: {err}"
+        snapshot = self._snapshot('GET', url, request_overrides)
+        if snapshot['error'] is not None: outputs["reason"] = f"RANGEGET error: {snapshot['error']}"; return outputs
+        outputs.update(dict(status=snapshot['status'], method="RANGEGET", final_url=snapshot['final_url']))
+        if snapshot['status'] not in (200, 206): outputs["reason"] = f"RANGEGET error: response status {snapshot['status']}"; return outputs
+        resp_headers, chunk = snapshot['headers'], snapshot['head_bytes']
+        outputs["ctype"] = outputs["ctype"] or resp_headers.get("Content-Type")
+        if outputs["ctype"] == 'text/plain' and naive_guess_ext == 'm4s': outputs["ctype"] = 'audio/mp4'
+        outputs["range"] = outputs["range"] or (snapshot['status'] == 206) or (resp_headers.get("Content-Range") is not None)
+        clen = resp_headers.get("Content-Length") or (resp_headers.get("Content-Range") or "").split("/")[-1]
+        if clen and clen.isdigit(): outputs["clen"] = int(clen)
+        outputs["fmt"] = self.sniffmagic(chunk)
+        if self.isaudioct(outputs["ctype"]) or outputs["fmt"] or (naive_guess_ext in ('m4s',)): outputs.update(dict(ok=True, reason="RANGEGET success"))
+        else: outputs.update(dict(ok=False, reason="RANGEGET error: Not audio-like (CT/magic)"))
         # return
-        return outputs
\ No newline at end of file
+        return outputs
+    '''testandprobe'''
+    def testandprobe(self, url: str, request_overrides: dict = None):
+        request_overrides = self._setdefaultrequestoverrides(request_overrides or {})
+        return self.test(url, request_overrides), self.probe(url, request_overrides)
\ No newline at end of file
@@ -7,12 +7,14 @@ WeChat Official Account (微信公众号):
     Charles的皮卡丘
 '''
 import copy
+import importlib
 import collections
 
 
 '''BaseModuleBuilder'''
 class BaseModuleBuilder():
     REGISTERED_MODULES = collections.OrderedDict()
+    MODULES_PACKAGE = None
     def __init__(self, requires_register_modules=None, requires_renew_modules=None):
         if requires_register_modules is not None and isinstance(requires_register_modules, (dict, collections.OrderedDict)):
             for name, module in requires_register_modules.items():
@@ -25,22 +27,31 @@ class BaseModuleBuilder():
     def build(self, module_cfg):
         module_cfg = copy.deepcopy(module_cfg)
         module_type = module_cfg.pop('type')
-        module = self.REGISTERED_MODULES[module_type](**module_cfg)
+        module = self.loadmodule(module_type)(**module_cfg)
+        return module
+    '''loadmodule'''
+    def loadmodule(self, name):
+        module = self.REGISTERED_MODULES[name]
+        if not isinstance(module, str): return module
+        # lazily registered modules are given as 'module.path:ClassName', relative paths are resolved against MODULES_PACKAGE
+        module_path, _, attr_name = module.partition(':')
+        module = getattr(importlib.import_module(module_path, self.MODULES_PACKAGE), attr_name)
+        self.REGISTERED_MODULES[name] = module
         return module
     '''register'''
     def register(self, name, module):
-        assert callable(module)
+        assert callable(module) or isinstance(module, str)
         assert name not in self.REGISTERED_MODULES
         self.REGISTERED_MODULES[name] = module
     '''renew'''
     def renew(self, name, module):
-        assert callable(module)
+        assert callable(module) or isinstance(module, str)
         assert name in self.REGISTERED_MODULES
         self.REGISTERED_MODULES[name] = module
     '''validate'''
     def validate(self):
         for _, module in self.REGISTERED_MODULES.items():
-            assert callable(module)
+            assert callable(module) or isinstance(module, str)
     '''delete'''
     def delete(self, name):
         assert name in self.REGISTERED_MODULES
@@ -53,7 +64,7 @@ class BaseModuleBuilder():
     '''get'''
     def get(self, name):
         assert name in self.REGISTERED_MODULES
-        module = self.REGISTERED_MODULES.get(name)
+        module = self.loadmodule(name)
         return module
     '''items'''
     def items(self):
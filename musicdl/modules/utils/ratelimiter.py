@@ -0,0 +1,123 @@
+'''
+Function:
+    Implementation of per-host rate limiting and adaptive concurrency
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import time
+import random
+from urllib.parse import urlparse
+from threading import Condition, Lock
+
+
+'''TokenBucket'''
+class TokenBucket():
+    def __init__(self, rate: float = None, capacity: float = None):
+        self.rate = rate
+        self.capacity = max(1.0, float(capacity if capacity is not None else (rate or 1)))
+        self.tokens, self.timestamp, self.lock = self.capacity, time.monotonic(), Lock()
+    '''acquire'''
+    def acquire(self):
+        if not self.rate: return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.timestamp) * self.rate)
+            self.timestamp, self.tokens = now, self.tokens - 1
+            wait_seconds = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        # tokens are reserved under the lock, so concurrent callers sleep for consecutive slots
+        if wait_seconds > 0: time.sleep(wait_seconds)
+        return wait_seconds
+    '''tighten'''
+    def tighten(self, rate: float = None, capacity: float = None):
+        if not rate: return
+        with self.lock:
+            if self.rate and self.rate <= rate: return
+            self.rate, self.capacity = rate, max(1.0, float(capacity if capacity is not None else rate))
+            self.tokens = min(self.tokens, self.capacity)
+
+
+'''AIMDLimiter'''
+class AIMDLimiter():
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 32, decrease_factor: float = 0.5):
+        self.minimum, self.maximum = max(1, minimum), max(1, minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease_factor = decrease_factor
+        self.inflight, self.last_decrease_time, self.condition = 0, 0.0, Condition()
+    '''acquire'''
+    def acquire(self, timeout: float = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.inflight >= int(self.limit):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0: raise TimeoutError(f'no free request slot within {timeout} seconds')
+                self.condition.wait(remaining)
+            self.inflight += 1
+            return time.monotonic()
+    '''tighten'''
+    def tighten(self, maximum: int):
+        with self.condition:
+            self.maximum = max(self.minimum, min(self.maximum, maximum))
+            self.limit = min(self.limit, float(self.maximum))
+    '''release'''
+    def release(self, throttled: bool = None, started_at: float = None):
+        with self.condition:
+            self.inflight = max(0, self.inflight - 1)
+            # additive increase, roughly +1 per window of successful requests
+            if throttled is False: self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            # multiplicative decrease, requests sent before the last decrease belong to the same congestion event
+            elif throttled and (started_at is None or started_at >= self.last_decrease_time):
+                self.limit, self.last_decrease_time = max(self.minimum, self.limit * self.decrease_factor), time.monotonic()
+            self.condition.notify_all()
+
+
+'''HostRateLimiter'''
+class HostRateLimiter():
+    DEFAULT_CONFIG = {
+        'requests_per_second': None, 'burst': None, 'initial_concurrency': 8, 'min_concurrency': 1, 'max_concurrency': 32, 'backoff_base': 0.5, 'backoff_max': 8.0, 'acquire_timeout': 60.0,
+    }
+    # one token bucket and one aimd limiter per host for the whole process, e.g., every client calling the gdstudio api shares its budget
+    shared_buckets, shared_limiters, shared_lock = {}, {}, Lock()
+    def __init__(self, hosts: dict = None, **kwargs):
+        self.config = {**self.DEFAULT_CONFIG, **{k: v for k, v in kwargs.items() if k in self.DEFAULT_CONFIG}}
+        self.hosts_config = {host: {**self.config, **cfg} for host, cfg in (hosts or {}).items()}
+        self.applied_hosts = set()
+    '''hostof'''
+    @staticmethod
+    def hostof(url: str):
+        try: return urlparse(str(url)).netloc.lower()
+        except Exception: return ''
+    '''getconfig'''
+    def getconfig(self, host: str):
+        return self.hosts_config.get(host, self.config)
+    '''_getlimiters'''
+    def _getlimiters(self, host: str):
+        with HostRateLimiter.shared_lock:
+            cfg = self.getconfig(host)
+            if host not in HostRateLimiter.shared_limiters:
+                HostRateLimiter.shared_buckets[host] = TokenBucket(rate=cfg['requests_per_second'], capacity=cfg['burst'])
+                HostRateLimiter.shared_limiters[host] = AIMDLimiter(initial=cfg['initial_concurrency'], minimum=cfg['min_concurrency'], maximum=cfg['max_concurrency'])
+            elif host not in self.applied_hosts:
+                # clients configured differently for the same host share the strictest limits
+                HostRateLimiter.shared_buckets[host].tighten(rate=cfg['requests_per_second'], capacity=cfg['burst'])
+                HostRateLimiter.shared_limiters[host].tighten(maximum=cfg['max_concurrency'])
+            self.applied_hosts.add(host)
+            return HostRateLimiter.shared_buckets[host], HostRateLimiter.shared_limiters[host]
+    '''acquire'''
+    def acquire(self, url: str):
+        host = self.hostof(url)
+        bucket, limiter = self._getlimiters(host)
+        started_at = limiter.acquire(timeout=self.getconfig(host)['acquire_timeout'])
+        bucket.acquire()
+        return host, started_at
+    '''release'''
+    def release(self, ticket: tuple, throttled: bool = None):
+        host, started_at = ticket
+        self._getlimiters(host)[1].release(throttled=throttled, started_at=started_at)
+    '''backoff'''
+    def backoff(self, ticket: tuple, attempt: int, retry_after: str = None):
+        cfg = self.getconfig(ticket[0])
+        # honour Retry-After (in seconds) sent with 429 / 503, otherwise exponential backoff with full jitter
+        if retry_after and str(retry_after).strip().isdigit(): return min(cfg['backoff_max'], float(retry_after))
+        return random.uniform(0, min(cfg['backoff_max'], cfg['backoff_base'] * (2 ** attempt)))
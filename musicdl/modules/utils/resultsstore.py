@@ -0,0 +1,70 @@
+'''
+Function:
+    Implementation of append-only search / download results stores
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import os
+import json
+import time
+import uuid
+from threading import Lock
+from .data import SongInfo
+from .misc import sanitize_filepath
+
+
+'''JSONLResultsStore'''
+class JSONLResultsStore():
+    # downloaded_contents holds raw audio bytes for some clients and is never worth persisting, alternates are stored as results of their own sources
+    excluded_fields = ('downloaded_contents', 'alternates')
+    def __init__(self, file_name: str, exclude_raw_data: bool = False, run_id: str = None):
+        self.file_name, self.exclude_raw_data = file_name, exclude_raw_data
+        self.run_id = run_id or f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.files, self.lock = {}, Lock()
+    '''serialize'''
+    def serialize(self, song_info: SongInfo) -> dict:
+        song_info_dict = song_info.todict()
+        for key in self.excluded_fields: song_info_dict.pop(key, None)
+        if self.exclude_raw_data: song_info_dict.pop('raw_data', None)
+        for eps_info_dict in (song_info_dict.get('episodes') or []):
+            if not isinstance(eps_info_dict, dict): continue
+            for key in self.excluded_fields: eps_info_dict.pop(key, None)
+            if self.exclude_raw_data: eps_info_dict.pop('raw_data', None)
+        return song_info_dict
+    '''append'''
+    def append(self, song_info: SongInfo, work_dir: str = None):
+        file_path = sanitize_filepath(os.path.join(str(work_dir or song_info.work_dir), self.file_name))
+        record = {'run_id': self.run_id, 'recorded_at': time.time(), 'song_info': self.serialize(song_info)}
+        # anything json cannot encode natively (e.g., bytes or custom objects inside raw_data) is stored as its string form
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self.lock:
+            fp = self.files.get(file_path)
+            if fp is None:
+                if os.path.dirname(file_path): os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                fp = self.files[file_path] = open(file_path, 'a', encoding='utf-8')
+            # one line per result, flushed immediately, so everything recorded so far survives a crash mid-run
+            fp.write(line + '\n'); fp.flush()
+        return file_path
+    '''close'''
+    def close(self):
+        with self.lock:
+            for fp in self.files.values(): fp.close()
+            self.files.clear()
+    '''enter'''
+    def __enter__(self):
+        return self
+    '''exit'''
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    '''load'''
+    @staticmethod
+    def load(file_path: str, run_id: str = None, as_song_info: bool = True):
+        with open(file_path, 'r', encoding='utf-8') as fp:
+            for line in fp:
+                # the last line may be truncated if the process was killed while writing it
+                try: record = json.loads(line)
+                except json.JSONDecodeError: continue
+                if run_id is not None and record.get('run_id') != run_id: continue
+                yield SongInfo.fromdict(record['song_info']) if as_song_info else record
@@ -586,14 +586,26 @@ def decryptsecuritytoken(security_token):
     return key, nonce
 
 
+'''CTRDecryptor'''
+class CTRDecryptor():
+    def __init__(self, key, nonce):
+        self.key, self.nonce = key, nonce
+        self.seek(0)
+    '''seek'''
+    def seek(self, offset: int):
+        # ctr keystream blocks are independent, so decryption can restart at any byte offset, e.g., when a download is retried
+        self.cipher = AES.new(self.key, AES.MODE_CTR, counter=Counter.new(64, prefix=self.nonce, initial_value=offset // 16))
+        if offset % 16: self.cipher.decrypt(bytes(offset % 16))
+    '''decrypt'''
+    def decrypt(self, data: bytes) -> bytes:
+        return self.cipher.decrypt(data)
+
+
 '''decryptfile'''
-def decryptfile(efile, dfile, key, nonce):
-    counter = Counter.new(64, prefix=nonce, initial_value=0)
-    decryptor = AES.new(key, AES.MODE_CTR, counter=counter)
-    with open(efile, 'rb') as eflac:
-        flac = decryptor.decrypt(eflac.read())
-        with open(dfile, 'wb') as dflac:
-            dflac.write(flac)
+def decryptfile(efile, dfile, key, nonce, chunk_size=1048576):
+    decryptor = CTRDecryptor(key, nonce)
+    with open(efile, 'rb') as eflac, open(dfile, 'wb') as dflac:
+        for chunk in iter(lambda: eflac.read(chunk_size), b''): dflac.write(decryptor.decrypt(chunk))
 
 
 '''ffmpegready'''
@@ -9,10 +9,14 @@ WeChat Official Account (微信公众号):
 
 import sys
 import copy
+import time
+import asyncio
 import click
 import json_repair
 from threading import Lock
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Queue, Empty
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from rich.progress import (
     Progress,
     TextColumn,
@@ -27,6 +31,8 @@ if __name__ == "__main__":
         BuildMusicClient,
         LoggerHandle,
         MusicClientBuilder,
+        DownloadScheduler,
+        SearchResultsMerger,
         smarttrunctable,
         colorize,
         printfullline,
@@ -38,6 +44,8 @@ else:
         BuildMusicClient,
         LoggerHandle,
         MusicClientBuilder,
+        DownloadScheduler,
+        SearchResultsMerger,
         smarttrunctable,
         colorize,
         printfullline,
@@ -80,6 +88,9 @@ class MusicClient:
         clients_threadings: dict = {},
         requests_overrides: dict = {},
         search_rules: dict = {},
+        download_scheduler_cfg: dict = {},
+        merge_search_results: bool = False,
+        merge_cfg: dict = {},
     ):
         # assert
         assert (
@@ -88,6 +99,8 @@ class MusicClient:
             and isinstance(clients_threadings, dict)
             and isinstance(requests_overrides, dict)
             and isinstance(search_rules, dict)
+            and isinstance(download_scheduler_cfg, dict)
+            and isinstance(merge_cfg, dict)
         )
         (
             music_sources,
@@ -105,6 +118,11 @@ class MusicClient:
         # set attributes
         self.work_dirs = {}
         self.search_rules = search_rules
+        self.download_scheduler_cfg = copy.deepcopy(download_scheduler_cfg)
+        self.merge_search_results = merge_search_results
+        self.search_results_merger = SearchResultsMerger(**merge_cfg)
+        # results of recent searches, candidates for songs which fail to download and have no alternates yet
+        self.recent_search_results = deque(maxlen=4096)
         self.clients_threadings = clients_threadings
         self.requests_overrides = requests_overrides
         self.music_sources = music_sources if music_sources else DEFAULT_MUSIC_SOURCES
@@ -130,6 +148,13 @@ class MusicClient:
                 "search_size_per_page": 10,
                 "strict_limit_search_size_per_page": True,
                 "quark_parser_config": {},
+                "lazy_resolve": False,
+                "max_download_segments": 1,
+                "rate_limit_cfg": {},
+                "search_cache_cfg": {},
+                "results_store_cfg": {},
+                "library_index_cfg": {},
+                "hedge_delay": None,
             }
             if music_source in {"GDStudioMusicClient", "XimalayaMusicClient"}:
                 init_music_client_cfg["search_size_per_source"] = 3
@@ -160,9 +185,35 @@ class MusicClient:
         )
         printfullline(ch="-")
 
+    """streamsearchresults"""
+
+    def streamsearchresults(self, keyword, search_timeout: int = 30):
+        search_results = {}
+        for song_info in self.itersearch(keyword=keyword, search_timeout=search_timeout):
+            search_results.setdefault(song_info.source, []).append(song_info)
+            print(
+                f"{colorize(song_info.singers, 'singer')} - {song_info.song_name} "
+                f"({colorize(song_info.file_size, 'flac' if song_info.ext in {'flac', 'wav', 'ape'} else 'number')}, "
+                f"{colorize(song_info.source.removesuffix('MusicClient').upper(), 'highlight')})"
+            )
+        return search_results
+
+    """mergesearchresults"""
+
+    def mergesearchresults(self, search_results: dict | list):
+        """
+        合并多个平台的搜索结果, 同一首歌(歌手/歌名/时长相近)只保留音质最好的一个, 其余的作为备选下载源
+        :param search_results: 搜索结果字典 {source: song_infos} 或 song_infos 列表
+        :return: 合并后的 song_infos, 每个 song_info.alternates 按音质从高到低排列
+        """
+        return self.search_results_merger.merge(search_results)
+
     """printandselectsearchresults"""
 
-    def printandselectsearchresults(self, search_results: dict):
+    def printandselectsearchresults(self, search_results: dict, merge: bool = None):
+        merge = self.merge_search_results if merge is None else merge
+        if merge:
+            search_results = {"merged": self.mergesearchresults(search_results)}
         print_titles, print_items, song_infos, row_ids, song_info_pointer = (
             ["ID", "Singers", "Songname", "Filesize", "Duration", "Album", "Source"],
             [],
@@ -203,6 +254,11 @@ class MusicClient:
                                     ]
                                     if s
                                 ]
+                            )
+                            + (
+                                f" +{len(search_result['alternates'])}"
+                                if search_result["alternates"]
+                                else ""
                             ),
                             "highlight",
                         ),
@@ -240,7 +296,7 @@ class MusicClient:
             user_input_keyword = self.processinputs(
                 "Please enter keywords to search for songs: "
             )
-            search_results = self.search(keyword=user_input_keyword)
+            search_results = self.streamsearchresults(keyword=user_input_keyword)
             selected_song_infos, final_selected_song_infos = (
                 self.printandselectsearchresults(search_results=search_results),
                 [],
@@ -249,26 +305,30 @@ class MusicClient:
                 if song_info.episodes:
                     final_selected_song_infos.extend(
                         self.printandselectsearchresults(
-                            {song_info.source: song_info.episodes}
+                            {song_info.source: song_info.episodes}, merge=False
                         )
                     )
                 else:
                     final_selected_song_infos.append(song_info)
             self.download(final_selected_song_infos)
 
-    """search"""
+    """asearch"""
 
-    def search(self, keyword, search_timeout: int = 30):
+    async def asearch(self, keyword, search_timeout: int = 30, max_workers: int = None):
         """
-        搜索音乐
+        异步搜索音乐, 所有平台共享同一个事件循环和同一个有界线程池
         :param keyword: 搜索关键词
         :param search_timeout: 单个平台搜索超时时间(秒)，默认30秒
+        :param max_workers: 共享线程池的最大线程数, 默认为各平台线程数之和(不超过64)
         :return: 搜索结果字典 {source: song_infos}
         """
         self.logger_handle.info(
             f"Searching {colorize(keyword, 'highlight')} From {colorize('|'.join(self.music_sources), 'highlight')}"
         )
-        max_workers, main_progress_lock = min(len(self.music_sources), 10), Lock()
+        max_workers = max_workers or min(
+            sum(self.clients_threadings[ms] for ms in self.music_clients) or 1, 64
+        )
+        executor, main_progress_lock = ThreadPoolExecutor(max_workers=max_workers), Lock()
         with Progress(
             TextColumn("{task.description}"),
             BarColumn(bar_width=None),
@@ -279,10 +339,72 @@ class MusicClient:
             main_progress_id = main_process_context.add_task(
                 f"ALL sources >>> completed (0/0)", total=0
             )
+            tasks = {
+                ms: asyncio.ensure_future(
+                    self.music_clients[ms].asearch(
+                        keyword=keyword,
+                        num_threadings=self.clients_threadings[ms],
+                        request_overrides=self.requests_overrides[ms],
+                        rule=self.search_rules[ms],
+                        main_process_context=main_process_context,
+                        main_progress_id=main_progress_id,
+                        main_progress_lock=main_progress_lock,
+                        executor=executor,
+                    )
+                )
+                for ms in self.music_clients
+            }
+            # 使用超时机制，避免卡死
+            results = {}
+            if tasks:
+                await asyncio.wait(tasks.values(), timeout=search_timeout)
+            for ms, task in tasks.items():
+                if not task.done():
+                    task.cancel()
+                    self.logger_handle.warning(
+                        f"MusicClient.{ms}.search >>> {keyword} (Timeout after {search_timeout}s)"
+                    )
+                    results[ms] = []
+                elif task.exception() is not None:
+                    self.logger_handle.error(
+                        f"MusicClient.{ms}.search >>> {keyword} (Error: {task.exception()})"
+                    )
+                    results[ms] = []
+                else:
+                    results[ms] = task.result()
+                    self.recent_search_results.extend(results[ms])
+            # let the cancelled searches run their cleanup, i.e., close their results stores and stop their executor work
+            await asyncio.gather(*[task for task in tasks.values() if not task.done()], return_exceptions=True)
+        executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    """itersearch"""
+
+    def itersearch(self, keyword, search_timeout: int = 30):
+        """
+        流式搜索音乐, 每个平台一旦解析出结果就立刻返回, 不需要等待最慢的平台
+        :param keyword: 搜索关键词
+        :param search_timeout: 单个平台搜索超时时间(秒)，默认30秒
+        :return: 逐个产出 SongInfo 的生成器
+        """
+        self.logger_handle.info(
+            f"Searching {colorize(keyword, 'highlight')} From {colorize('|'.join(self.music_sources), 'highlight')}"
+        )
+        results_queue, main_progress_lock = Queue(), Lock()
+        with Progress(
+            TextColumn("{task.description}"),
+            BarColumn(bar_width=None),
+            MofNCompleteColumn(),
+            TimeRemainingColumn(),
+            refresh_per_second=10,
+        ) as main_process_context:
+            main_progress_id = main_process_context.add_task(
+                "ALL sources >>> completed (0/0)", total=0
+            )
 
-            def _search(ms):
+            def _itersearch(ms):
                 try:
-                    return ms, self.music_clients[ms].search(
+                    for song_info in self.music_clients[ms].itersearch(
                         keyword=keyword,
                         num_threadings=self.clients_threadings[ms],
                         request_overrides=self.requests_overrides[ms],
@@ -290,51 +412,125 @@ class MusicClient:
                         main_process_context=main_process_context,
                         main_progress_id=main_progress_id,
                         main_progress_lock=main_progress_lock,
-                    )
+                    ):
+                        results_queue.put((ms, song_info))
                 except Exception as err:
                     self.logger_handle.error(
                         f"MusicClient.{ms}.search >>> {keyword} (Error: {err})"
                     )
-                    return ms, []
+                results_queue.put((ms, None))
 
+            ex = ThreadPoolExecutor(max_workers=max(len(self.music_clients), 1))
+            pending_sources = set(self.music_clients)
+            for ms in pending_sources:
+                ex.submit(_itersearch, ms)
             # 使用超时机制，避免卡死
-            results = {}
-            with ThreadPoolExecutor(max_workers=max_workers) as ex:
-                futures = {ex.submit(_search, ms): ms for ms in self.music_sources}
-                for future in as_completed(futures, timeout=search_timeout):
-                    ms = futures[future]
+            deadline = time.monotonic() + search_timeout
+            try:
+                while pending_sources:
                     try:
-                        source, song_infos = future.result()
-                        results[source] = song_infos
-                    except Exception as err:
-                        self.logger_handle.error(
-                            f"MusicClient.{ms}.search >>> {keyword} (Error: {err})"
+                        ms, song_info = results_queue.get(
+                            timeout=max(deadline - time.monotonic(), 0)
                         )
-                        results[ms] = []
-                # 检查是否有未完成的任务
-                for future, ms in list(futures.items()):
-                    if not future.done():
-                        self.logger_handle.warning(
-                            f"MusicClient.{ms}.search >>> {keyword} (Timeout after {search_timeout}s)"
-                        )
-                        results[ms] = []
-            return results
+                    except Empty:
+                        for ms in pending_sources:
+                            self.logger_handle.warning(
+                                f"MusicClient.{ms}.search >>> {keyword} (Timeout after {search_timeout}s)"
+                            )
+                        break
+                    if song_info is None:
+                        pending_sources.discard(ms)
+                        continue
+                    self.recent_search_results.append(song_info)
+                    yield song_info
+            finally:
+                ex.shutdown(wait=False, cancel_futures=True)
+
+    """search"""
+
+    def search(self, keyword, search_timeout: int = 30):
+        """
+        搜索音乐
+        :param keyword: 搜索关键词
+        :param search_timeout: 单个平台搜索超时时间(秒)，默认30秒
+        :return: 搜索结果字典 {source: song_infos}
+        """
+        coro = self.asearch(keyword=keyword, search_timeout=search_timeout)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+        # called from inside a running event loop (e.g., MCP tools), drive the coroutine from a helper thread
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            return ex.submit(asyncio.run, coro).result()
 
     """download"""
 
     def download(self, song_infos: list[dict]):
+        downloaded_song_infos, attempt_song_infos = {}, list(song_infos)
+        # songs which fail to download are retried with their next alternate (see mergesearchresults), or with equivalent songs
+        # from other sources found by recent searches, until one succeeds
+        while attempt_song_infos:
+            for source, items in self._download(attempt_song_infos).items():
+                downloaded_song_infos.setdefault(source, []).extend(items)
+            attempt_song_infos = self._nextalternates(attempt_song_infos, downloaded_song_infos)
+        return downloaded_song_infos
+
+    """_download"""
+
+    def _download(self, song_infos: list[dict]):
         classified_song_infos = {}
         for song_info in song_infos:
             if song_info["source"] in classified_song_infos:
                 classified_song_infos[song_info["source"]].append(song_info)
             else:
                 classified_song_infos[song_info["source"]] = [song_info]
-        for source, source_song_infos in classified_song_infos.items():
-            self.music_clients[source].download(
-                song_infos=source_song_infos,
-                num_threadings=self.clients_threadings[source],
-                request_overrides=self.requests_overrides[source],
+        scheduler = DownloadScheduler(
+            **{"max_workers": 16, "max_workers_per_host": 4, **self.download_scheduler_cfg}
+        )
+        return scheduler.run(
+            [
+                (
+                    self.music_clients[source],
+                    source_song_infos,
+                    self.clients_threadings[source],
+                    self.requests_overrides[source],
+                )
+                for source, source_song_infos in classified_song_infos.items()
+            ]
+        )
+
+    """_nextalternates"""
+
+    def _nextalternates(self, song_infos: list[dict], downloaded_song_infos: dict):
+        downloaded_keys = {
+            (s.source, str(s.identifier)) for items in downloaded_song_infos.values() for s in items
+        }
+        next_song_infos = []
+        for song_info in song_infos:
+            if (song_info.source, str(song_info.identifier)) in downloaded_keys:
+                continue
+            # songs skipped because they are already in the library index did not fail
+            library_index = self.music_clients[song_info.source].library_index
+            if library_index is not None and library_index.lookup(song_info):
+                continue
+            if song_info.episodes:
+                continue
+            alternates = (
+                self.search_results_merger.alternatesof(song_info, self.recent_search_results)
+                if song_info.alternates is None
+                else song_info.alternates
             )
+            alternates = [s for s in alternates if s.source in self.music_clients]
+            if not alternates:
+                continue
+            alternate = copy.copy(alternates[0])
+            alternate.alternates = alternates[1:]
+            self.logger_handle.warning(
+                f"MusicClient.download >>> {song_info.song_name} (Failed with {song_info.source}, falling back to {alternate.source})"
+            )
+            next_song_infos.append(alternate)
+        return next_song_infos
 
     """processinputs"""
 
@@ -418,6 +614,15 @@ class MusicClient:
     type=str,
     show_default=True,
 )
+@click.option(
+    "-g",
+    "--merge-search-results",
+    "--merge_search_results",
+    is_flag=True,
+    default=False,
+    help="Show one row per song merged across sources, alternates are used as fallbacks if downloading fails.",
+    show_default=True,
+)
 def MusicClientCMD(
     keyword: str,
     music_sources: str,
@@ -425,6 +630,7 @@ def MusicClientCMD(
     requests_overrides: str,
     clients_threadings: str,
     search_rules: str,
+    merge_search_results: bool,
 ):
     # load json string
     safe_load_func = lambda s: (json_repair.loads(s) or {}) if s else {}
@@ -440,13 +646,14 @@ def MusicClientCMD(
         clients_threadings=clients_threadings,
         requests_overrides=requests_overrides,
         search_rules=search_rules,
+        merge_search_results=merge_search_results,
     )
     # switch according to keyword
     if keyword is None:
         music_client.startcmdui()
     else:
         print(music_client)
-        search_results = music_client.search(keyword=keyword)
+        search_results = music_client.streamsearchresults(keyword=keyword)
         selected_song_infos, final_selected_song_infos = (
             music_client.printandselectsearchresults(search_results=search_results),
             [],
@@ -455,7 +662,7 @@ def MusicClientCMD(
             if song_info.episodes:
                 final_selected_song_infos.extend(
                     music_client.printandselectsearchresults(
-                        {song_info.source: song_info.episodes}
+                        {song_info.source: song_info.episodes}, merge=False
                     )
                 )
             else:
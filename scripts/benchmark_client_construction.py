@@ -0,0 +1,54 @@
+'''
+Function:
+    Benchmark MusicClient(...) construction time, e.g., python scripts/benchmark_client_construction.py --runs 3 --curl-cffi
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+
+'''settings'''
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MUSIC_SOURCES = [
+    'NeteaseMusicClient', 'QQMusicClient', 'KuwoMusicClient', 'KugouMusicClient', 'MiguMusicClient', 'QianqianMusicClient', 'GDStudioMusicClient', 'JooxMusicClient',
+    'MituMusicClient', 'BuguyyMusicClient', 'GequbaoMusicClient', 'FangpiMusicClient', 'LizhiMusicClient', 'QingtingMusicClient', 'YinyuedaoMusicClient', 'JamendoMusicClient',
+]
+SNIPPET = '''
+import time, tempfile
+from musicdl.musicdl import MusicClient
+music_sources, curl_cffi = {music_sources!r}, {curl_cffi!r}
+init_music_clients_cfg = {{s: {{'enable_search_curl_cffi': curl_cffi, 'work_dir': tempfile.mkdtemp()}} for s in music_sources}}
+t = time.perf_counter()
+MusicClient(music_sources=music_sources, init_music_clients_cfg=init_music_clients_cfg)
+print(time.perf_counter() - t)
+'''
+
+
+'''timeconstruction'''
+def timeconstruction(runs: int, curl_cffi: bool, music_sources: list):
+    code = SNIPPET.format(music_sources=music_sources, curl_cffi=curl_cffi)
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join([ROOT_DIR, os.environ.get('PYTHONPATH', '')]).rstrip(os.pathsep)}
+    # a fresh interpreter per run, so the first run pays for filling the on-disk caches and later runs show the warm start
+    timings = [float(subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    return timings
+
+
+'''main'''
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MusicClient(...) construction time')
+    parser.add_argument('--runs', type=int, default=3, help='number of fresh interpreters')
+    parser.add_argument('--curl-cffi', action='store_true', help='construct every client with enable_search_curl_cffi=True')
+    args = parser.parse_args()
+    timings = timeconstruction(args.runs, args.curl_cffi, MUSIC_SOURCES)
+    print(f'MusicClient with {len(MUSIC_SOURCES)} sources (curl_cffi={args.curl_cffi}): ' + ', '.join(f'{t * 1000:.1f} ms' for t in timings) + f'    median {statistics.median(timings) * 1000:.1f} ms')
+
+
+'''tests'''
+if __name__ == '__main__':
+    main()
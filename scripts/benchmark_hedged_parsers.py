@@ -0,0 +1,60 @@
+'''
+Function:
+    Benchmark per-result latency of third-party parser chains with different hedge delays, e.g., python scripts/benchmark_hedged_parsers.py --num-results 200
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import os
+import sys
+import time
+import random
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from musicdl.modules.sources import BaseMusicClient
+from musicdl.modules.utils import SongInfo
+
+
+'''FakeMusicClient'''
+class FakeMusicClient(BaseMusicClient):
+    source = 'FakeMusicClient'
+    # (failure rate, median latency, slow tail probability, slow tail latency) of each parser, roughly what the QQ third-party apis look like
+    PARSER_PROFILES = [(0.3, 0.20, 0.10, 3.0), (0.3, 0.30, 0.10, 3.0), (0.2, 0.40, 0.05, 3.0)]
+    '''buildparser'''
+    def buildparser(self, failure_rate: float, latency: float, tail_probability: float, tail_latency: float):
+        def _parser(search_result: dict, request_overrides: dict = None):
+            time.sleep(tail_latency if random.random() < tail_probability else latency * random.uniform(0.5, 1.5))
+            if random.random() < failure_rate: raise RuntimeError('parser failed')
+            return SongInfo(source=self.source, song_name=str(search_result['id']), download_url='https://example.com/x.mp3', download_url_status={'ok': True})
+        return _parser
+
+
+'''benchmark'''
+def benchmark(hedge_delay: float, num_results: int, seed: int):
+    random.seed(seed)
+    client = FakeMusicClient(disable_print=True, hedge_delay=hedge_delay, work_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__'))
+    parsers = [client.buildparser(*profile) for profile in FakeMusicClient.PARSER_PROFILES]
+    latencies, num_valid = [], 0
+    for idx in range(num_results):
+        start = time.perf_counter()
+        num_valid += client._hedgedparse(parsers, {'id': idx}).with_valid_download_url
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)], latencies[-1], num_valid / num_results
+
+
+'''main'''
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-result latency of third-party parser chains with different hedge delays')
+    parser.add_argument('--num-results', type=int, default=200, help='number of simulated search results')
+    parser.add_argument('--seed', type=int, default=0, help='random seed, shared by all hedge delays')
+    args = parser.parse_args()
+    for hedge_delay in [None, 1.0, 0.5, 0]:
+        p50, p95, worst, success_rate = benchmark(hedge_delay, args.num_results, args.seed)
+        print(f'hedge_delay={str(hedge_delay):>4}: p50 {p50 * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, max {worst * 1000:.0f} ms, success rate {success_rate:.1%}')
+
+
+'''tests'''
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+'''
+Function:
+    Benchmark the cold import time of musicdl (what the CLI pays before doing anything), e.g., python scripts/benchmark_import_time.py --runs 10
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+
+'''settings'''
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNIPPETS = {
+    'import musicdl.musicdl': 'import musicdl.musicdl',
+    'build NeteaseMusicClient': "from musicdl.modules import MusicClientBuilder; MusicClientBuilder().loadmodule('NeteaseMusicClient')",
+    'import all clients': 'from musicdl.modules import MusicClientBuilder; [MusicClientBuilder().loadmodule(name) for name in list(MusicClientBuilder.REGISTERED_MODULES)]',
+}
+
+
+'''timesnippet'''
+def timesnippet(snippet: str, runs: int):
+    code = f'import time; t = time.perf_counter(); {snippet}; print(time.perf_counter() - t)'
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join([ROOT_DIR, os.environ.get('PYTHONPATH', '')]).rstrip(os.pathsep)}
+    # each run uses a fresh interpreter so nothing is already in sys.modules, bytecode caches are warmed by a discarded first run
+    subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True)
+    timings = [float(subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    return statistics.median(timings), min(timings)
+
+
+'''main'''
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cold import time of musicdl')
+    parser.add_argument('--runs', type=int, default=10, help='number of fresh interpreters per snippet')
+    args = parser.parse_args()
+    for name, snippet in SNIPPETS.items():
+        median, best = timesnippet(snippet, args.runs)
+        print(f'{name:<28} median {median * 1000:8.1f} ms    best {best * 1000:8.1f} ms')
+
+
+'''tests'''
+if __name__ == '__main__':
+    main()
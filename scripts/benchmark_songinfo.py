@@ -0,0 +1,65 @@
+'''
+Function:
+    Benchmark SongInfo key access cost and per-object memory for large result sets, e.g., python scripts/benchmark_songinfo.py --num-songs 100000
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from musicdl.modules.utils import SongInfo
+
+
+'''buildsonginfos'''
+def buildsonginfos(num_songs: int):
+    return [
+        SongInfo(
+            raw_data={'search': {'id': idx}}, source='NeteaseMusicClient', song_name=f'song {idx}', singers=f'singer {idx % 97}', album=f'album {idx % 1013}',
+            ext='mp3', file_size='3.21MB', duration='00:03:30', identifier=str(idx), download_url=f'https://example.com/{idx}.mp3', download_url_status={'ok': True},
+        )
+        for idx in range(num_songs)
+    ]
+
+
+'''benchmarkmemory'''
+def benchmarkmemory(num_songs: int):
+    tracemalloc.start()
+    song_infos = buildsonginfos(num_songs)
+    total_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the object itself plus its instance __dict__ (absent with __slots__), field values are identical in both layouts
+    object_bytes = sum(sys.getsizeof(s) + (sys.getsizeof(s.__dict__) if hasattr(s, '__dict__') else 0) for s in song_infos)
+    return song_infos, object_bytes / num_songs, total_bytes / num_songs
+
+
+'''benchmarkaccess'''
+def benchmarkaccess(song_infos: list, repeats: int):
+    keys = ('song_name', 'singers', 'album', 'file_size', 'duration', 'source')
+    start = time.perf_counter()
+    # mirrors printandselectsearchresults / download bookkeeping, which index SongInfo by key in loops
+    for _ in range(repeats):
+        for song_info in song_infos:
+            for key in keys: song_info[key]
+            song_info.get('ext'); 'lyric' in song_info
+    return (time.perf_counter() - start) / (repeats * len(song_infos) * (len(keys) + 2))
+
+
+'''main'''
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SongInfo key access cost and per-object memory')
+    parser.add_argument('--num-songs', type=int, default=100000, help='number of SongInfo objects, e.g., singerlyricsanalysis with search_size_per_source=2000')
+    parser.add_argument('--repeats', type=int, default=3, help='passes over all objects when timing key access')
+    args = parser.parse_args()
+    song_infos, object_bytes, total_bytes = benchmarkmemory(args.num_songs)
+    per_access = benchmarkaccess(song_infos, args.repeats)
+    print(f'SongInfo x {args.num_songs}: {object_bytes:.0f} bytes per object, {total_bytes:.0f} bytes per result including field values, {per_access * 1e9:.0f} ns per key access')
+
+
+'''tests'''
+if __name__ == '__main__':
+    main()
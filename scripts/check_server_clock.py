@@ -0,0 +1,83 @@
+'''
+Function:
+    Check ServerClock against a local stand-in time server serving a skewed clock, e.g., python scripts/check_server_clock.py --skew-ms 90000
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import os
+import sys
+import time
+import argparse
+import requests
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from musicdl.modules.utils import ServerClock
+
+
+'''StandInTimeServer'''
+class StandInTimeServer():
+    def __init__(self, skew_ms: int):
+        # plain text milliseconds like https://www.ximalaya.com/revision/time, skew / latency / availability can be changed while running
+        self.skew_ms, self.latency, self.available, self.num_requests = skew_ms, 0.0, True, 0
+        server = self
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+            def do_GET(self):
+                server.num_requests += 1
+                time.sleep(server.latency)
+                if not server.available: self.send_response(503); self.send_header('Content-Length', '0'); self.end_headers(); return
+                body = str(int(time.time() * 1000 + server.skew_ms)).encode()
+                self.send_response(200); self.send_header('Content-Length', str(len(body))); self.end_headers(); self.wfile.write(body)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/revision/time'
+    '''fetchservertime'''
+    def fetchservertime(self):
+        resp = requests.get(self.url, timeout=10)
+        resp.raise_for_status()
+        return int(resp.text.strip())
+
+
+'''check'''
+def check(name: str, passed: bool, detail: str = ''):
+    print(f"{'PASS' if passed else 'FAIL'} {name}{': ' + detail if detail else ''}")
+    return passed
+
+
+'''main'''
+def main():
+    parser = argparse.ArgumentParser(description='Check ServerClock against a local stand-in time server serving a skewed clock')
+    parser.add_argument('--skew-ms', type=int, default=90000, help='how far the stand-in server clock is ahead of the local one')
+    args = parser.parse_args()
+    server, results = StandInTimeServer(args.skew_ms), []
+    clock = ServerClock(server.fetchservertime, refresh_interval=0.5, retry_interval=0.5)
+    # first call syncs and applies the skew
+    error_ms = clock.now() - (time.time() * 1000 + args.skew_ms)
+    results.append(check('offset', abs(error_ms) < 50, f'{error_ms:.1f} ms away from the server clock'))
+    # later calls inside refresh_interval are served from the cached offset
+    num_requests = server.num_requests
+    for _ in range(1000): clock.now()
+    results.append(check('cached', server.num_requests == num_requests, f'{server.num_requests - num_requests} requests for 1000 calls'))
+    # once refresh_interval passed, a slow server must not block callers and the refresh lands in the background
+    time.sleep(0.6)
+    server.latency, server.skew_ms = 1.0, args.skew_ms + 5000
+    start = time.perf_counter(); stale_ms = clock.now() - time.time() * 1000; elapsed = time.perf_counter() - start
+    results.append(check('non-blocking refresh', elapsed < 0.05 and abs(stale_ms - args.skew_ms) < 50, f'now() took {elapsed * 1000:.1f} ms and kept the previous offset'))
+    time.sleep(1.5)
+    fresh_ms = clock.now() - time.time() * 1000
+    results.append(check('refreshed offset', abs(fresh_ms - server.skew_ms) < 1100, f'offset moved to {fresh_ms:.0f} ms'))
+    # an unreachable server on the first sync falls back to the local clock
+    server.latency, server.available = 0.0, False
+    fallback_clock = ServerClock(server.fetchservertime)
+    error_ms = fallback_clock.now() - time.time() * 1000
+    results.append(check('local fallback', abs(error_ms) < 50, f'{error_ms:.1f} ms away from the local clock'))
+    server.httpd.shutdown()
+    sys.exit(0 if all(results) else 1)
+
+
+'''tests'''
+if __name__ == '__main__':
+    main()
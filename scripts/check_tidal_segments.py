@@ -0,0 +1,125 @@
+'''
+Function:
+    Check TIDALMusicClient segment downloads against a local stand-in cdn with injected failures, e.g., python scripts/check_tidal_segments.py --num-segments 40
+Author:
+    Zhenchao Jin
+WeChat Official Account (微信公众号):
+    Charles的皮卡丘
+'''
+import os
+import sys
+import random
+import argparse
+import threading
+from collections import Counter as RequestCounter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from rich.progress import Progress
+from Crypto.Cipher import AES
+from Crypto.Util import Counter
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from musicdl.modules.sources.tidal import TIDALMusicClient
+from musicdl.modules.utils import buildrequestssession
+from musicdl.modules.utils.tidalutils import CTRDecryptor
+
+
+'''StandInCDNServer'''
+class StandInCDNServer():
+    def __init__(self, files: dict):
+        # files maps request paths to bytes, paths in fail_once answer 503 on their first request and paths in cut_once drop the connection halfway through the body
+        self.files, self.fail_once, self.cut_once, self.requests, self.lock = files, set(), set(), RequestCounter(), threading.Lock()
+        server = self
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            def log_message(self, *args): pass
+            def do_GET(self):
+                with server.lock:
+                    server.requests[self.path] += 1
+                    first = server.requests[self.path] == 1
+                data = server.files[self.path]
+                if first and self.path in server.fail_once: self.send_response(503); self.send_header('Content-Length', '0'); self.end_headers(); return
+                self.send_response(200); self.send_header('Content-Length', str(len(data))); self.end_headers()
+                if first and self.path in server.cut_once: self.wfile.write(data[:len(data) // 2 + 5]); self.wfile.flush(); self.close_connection = True; return
+                self.wfile.write(data)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.httpd.server_port}'
+    '''reset'''
+    def reset(self, fail_once=(), cut_once=()):
+        with self.lock: self.fail_once, self.cut_once = set(fail_once), set(cut_once); self.requests.clear()
+
+
+'''buildclient'''
+def buildclient(max_segment_workers: int):
+    # only the attributes the segment downloader touches, so no TIDAL session or credentials are needed
+    client = object.__new__(TIDALMusicClient)
+    client.max_retries, client.max_segment_workers = 3, max_segment_workers
+    client.segment_session = buildrequestssession(pool_connections=max_segment_workers, pool_maxsize=max_segment_workers)
+    return client
+
+
+'''download'''
+def download(client: TIDALMusicClient, urls: list, save_path: str, decryptor: CTRDecryptor = None):
+    with Progress(disable=True) as progress:
+        song_progress_id = progress.add_task('check', total=1)
+        client._downloadsegments(urls, save_path, progress=progress, song_progress_id=song_progress_id, song_name='check', decryptor=decryptor)
+        task = progress.tasks[0]
+    with open(save_path, 'rb') as fp: content = fp.read()
+    return content, task.completed, task.total
+
+
+'''check'''
+def check(name: str, passed: bool, detail: str = ''):
+    print(f"{'PASS' if passed else 'FAIL'} {name}{': ' + detail if detail else ''}")
+    return passed
+
+
+'''main'''
+def main():
+    parser = argparse.ArgumentParser(description='Check TIDALMusicClient segment downloads against a local stand-in cdn with injected failures')
+    parser.add_argument('--num-segments', type=int, default=40, help='number of media segments after the init segment')
+    parser.add_argument('--segment-size', type=int, default=96 * 1024, help='average size of a media segment in bytes')
+    parser.add_argument('--workers', type=int, default=8, help='max_segment_workers of the client')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of the segment sizes and contents')
+    args = parser.parse_args()
+    rng, results = random.Random(args.seed), []
+    save_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__', 'check_tidal_segments.part')
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    # an init segment plus media segments of uneven sizes, so segment boundaries do not line up with aes blocks or download chunks
+    plain_segments = [rng.randbytes(1200)] + [rng.randbytes(rng.randint(args.segment_size // 2, args.segment_size * 3 // 2)) for _ in range(args.num_segments)]
+    plain = b''.join(plain_segments)
+    key, nonce = rng.randbytes(16), rng.randbytes(8)
+    encrypted = AES.new(key, AES.MODE_CTR, counter=Counter.new(64, prefix=nonce, initial_value=0)).encrypt(plain)
+    files, offset = {'/full': plain, '/full.enc': encrypted}, 0
+    for idx, segment in enumerate(plain_segments):
+        files[f'/seg/{idx}'], files[f'/enc/{idx}'] = segment, encrypted[offset: offset + len(segment)]
+        offset += len(segment)
+    server, client = StandInCDNServer(files), buildclient(args.workers)
+    seg_urls = [f'{server.base_url}/seg/{idx}' for idx in range(len(plain_segments))]
+    enc_urls = [f'{server.base_url}/enc/{idx}' for idx in range(len(plain_segments))]
+    # segments: one transient 503 and one connection dropped mid-body, each only costs a retry of its own segment
+    failed, cut = '/seg/3', f'/seg/{len(plain_segments) - 2}'
+    server.reset(fail_once=[failed], cut_once=[cut])
+    content, completed, total = download(client, seg_urls, save_path)
+    results.append(check('segments in order', content == plain, f'{len(content)} of {len(plain)} bytes from {len(seg_urls)} segments'))
+    results.append(check('segment retries', server.requests[failed] == 2 and server.requests[cut] == 2 and sum(server.requests.values()) == len(seg_urls) + 2, f'{sum(server.requests.values())} requests for {len(seg_urls)} segments'))
+    results.append(check('segment progress', completed == total == len(plain), f'completed {completed:.0f}, total {total:.0f}'))
+    # single url: a dropped connection restarts the file and the bytes of the failed attempt are taken back from the progress bar
+    server.reset(cut_once=['/full'])
+    content, completed, total = download(client, [f'{server.base_url}/full'], save_path)
+    results.append(check('single url', content == plain and server.requests['/full'] == 2, f'{server.requests["/full"]} requests'))
+    results.append(check('single url progress', completed == total == len(plain), f'completed {completed:.0f}, total {total:.0f}'))
+    # decryption happens while writing, retried segments and files must restart the keystream at the right offset
+    server.reset(fail_once=[failed.replace('/seg/', '/enc/')], cut_once=[cut.replace('/seg/', '/enc/')])
+    content, completed, total = download(client, enc_urls, save_path, decryptor=CTRDecryptor(key, nonce))
+    results.append(check('decrypted segments', content == plain and sum(server.requests.values()) == len(enc_urls) + 2, f'{sum(server.requests.values())} requests'))
+    server.reset(cut_once=['/full.enc'])
+    content, completed, total = download(client, [f'{server.base_url}/full.enc'], save_path, decryptor=CTRDecryptor(key, nonce))
+    results.append(check('decrypted single url', content == plain and server.requests['/full.enc'] == 2 and completed == total == len(plain), f'{server.requests["/full.enc"]} requests'))
+    server.httpd.shutdown()
+    os.remove(save_path)
+    sys.exit(0 if all(results) else 1)
+
+
+'''tests'''
+if __name__ == '__main__':
+    main()
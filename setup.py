@@ -37,6 +37,7 @@ setup(
     license_files=("LICENSE",),
     include_package_data=True,
     packages=find_packages(),
+    python_requires='>=3.9',
     package_data={"musicdl": ["modules/js/youtube/*.js"]},
     entry_points={'console_scripts': ['musicdl = musicdl.musicdl:MusicClientCMD']},
     install_requires=[lab.strip('\n') for lab in list(open('requirements.txt', 'r').readlines())],